@@ -0,0 +1,34 @@
+import time
+import numpy as np
+from src.transforms.affine import AffineTransform2D
+from src.transforms.projective import ProjectiveTransform2D
+
+
+def main(n: int = 10_000) -> None:
+    """
+    Compare decomposing N matrices one at a time with
+    the batched decomposition into a structured array.
+
+    Args:
+        n: Number of matrices.
+    """
+    rng = np.random.default_rng(0)
+    batch = ProjectiveTransform2D.from_params(rng.uniform(-1e-3, 1e-3, n), rng.uniform(-1e-3, 1e-3, n),
+                                              rng.uniform(0.5, 2.0, n), rng.uniform(0.5, 2.0, n),
+                                              rng.uniform(-0.5, 0.5, n), rng.uniform(-np.pi, np.pi, n),
+                                              rng.uniform(-200, 200, n), rng.uniform(-200, 200, n))
+    affine_Ms = batch.Ms.copy()
+    affine_Ms[:, 2] = [0., 0., 1.]
+    for name, cls, Ms in [("affine", AffineTransform2D, affine_Ms), ("projective", ProjectiveTransform2D, batch.Ms)]:
+        start = time.perf_counter()
+        for M in Ms:
+            cls.get_decomposed_from_M(M)
+        loop = time.perf_counter() - start
+        start = time.perf_counter()
+        cls.get_decomposed_params_from_Ms(Ms)
+        batched = time.perf_counter() - start
+        print(f"  {name:<12} loop {loop / n * 1e6:8.2f} usec   batched {batched / n * 1e6:8.3f} usec per matrix")
+
+
+if __name__ == "__main__":
+    main()
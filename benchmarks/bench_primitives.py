@@ -0,0 +1,105 @@
+import timeit
+import tracemalloc
+from typing import Callable, List
+import numpy as np
+from src.primitives.point import Point2D, Point3D
+from src.primitives.line import Line2D
+from src.primitives.rectangle import Rectangle2D
+
+
+class DictPoint2D(Point2D):
+    """
+    Subclass without __slots__, so instances get a __dict__ like
+    Point2D had before. Used as the baseline for memory.
+    """
+
+
+class DictLine2D(Line2D):
+    """
+    Line2D baseline with a __dict__.
+    """
+
+
+class DictRectangle2D(Rectangle2D):
+    """
+    Rectangle2D baseline with a __dict__.
+    """
+
+
+def bytes_per_object(make: Callable[[int], object], n: int = 100_000) -> float:
+    """
+    Measure the memory allocated per object by creating n objects.
+
+    Args:
+        make: Function that creates one object from an index.
+        n: Number of objects to create.
+
+    Returns:
+        Bytes per object.
+    """
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    objs: List[object] = [make(i) for i in range(n)]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Do not count the list holding the objects.
+    return (end - start) / n - 8
+
+
+def usec_per_call(stmt: Callable[[], object], number: int = 200_000) -> float:
+    """
+    Time a statement.
+
+    Args:
+        stmt: The statement to time.
+        number: Number of calls.
+
+    Returns:
+        Microseconds per call (best of 5 repeats).
+    """
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    """
+    Compare the __slots__ primitives against __dict__ baselines, and the
+    validated constructors against the trusted _new constructors.
+    """
+    print("Memory (bytes per object)")
+    rows = [
+        ("Point2D", lambda i: Point2D(float(i), 1.0, 1.0), lambda i: DictPoint2D(float(i), 1.0, 1.0)),
+        ("Point3D", lambda i: Point3D(float(i), 1.0, 1.0, 1.0), None),
+        ("Line2D", lambda i: Line2D(coeffs=(float(i), 1.0, 1.0)), lambda i: DictLine2D(coeffs=(float(i), 1.0, 1.0))),
+    ]
+    for name, make_slots, make_dict in rows:
+        slots_bytes = bytes_per_object(make_slots)
+        line = f"  {name:<12} slots: {slots_bytes:7.1f}"
+        if make_dict is not None:
+            line += f"   dict: {bytes_per_object(make_dict):7.1f}"
+        print(line)
+    corners = [Point2D(0.0, 0.0, 1.0), Point2D(1.0, 0.0, 1.0), Point2D(1.0, 1.0, 1.0), Point2D(0.0, 1.0, 1.0)]
+    rect_slots = bytes_per_object(lambda i: Rectangle2D(*corners))
+    rect_dict = bytes_per_object(lambda i: DictRectangle2D(*corners))
+    print(f"  {'Rectangle2D':<12} slots: {rect_slots:7.1f}   dict: {rect_dict:7.1f}")
+
+    print("Construction (usec per object)")
+    validated = usec_per_call(lambda: Point2D(1.0, 2.0, 1.0))
+    trusted = usec_per_call(lambda: Point2D._new(1.0, 2.0, 1.0))
+    dict_validated = usec_per_call(lambda: DictPoint2D(1.0, 2.0, 1.0))
+    print(f"  Point2D(...)        {validated:.3f}")
+    print(f"  Point2D._new(...)   {trusted:.3f}")
+    print(f"  DictPoint2D(...)    {dict_validated:.3f}")
+    p = Point2D(1.0, 2.0, 1.0)
+    print(f"  Point2D.copy()      {usec_per_call(p.copy):.3f}")
+    rect = Rectangle2D(*corners)
+    print(f"  Rectangle2D.copy()  {usec_per_call(rect.copy, number=50_000):.3f}")
+
+    print("Transform (usec per point)")
+    M = np.array([[0.7, -0.7, 160.], [0.7, 0.7, 20.], [0., 0., 1.]])
+    numpy_product = usec_per_call(lambda: Point2D(*(v.item() for v in np.dot(M, p.vector).ravel())), number=50_000)
+    print(f"  np.dot + Point2D    {numpy_product:.3f}")
+    print(f"  apply_transform     {usec_per_call(lambda: p.apply_transform(M), number=50_000):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import time
+from typing import List
+import numpy as np
+from src.transforms.projective import ProjectiveTransform2D
+
+
+def random_homographies(n: int, seed: int = 0) -> List[np.ndarray]:
+    """
+    Make random homographies that are normalized by the bottom right
+    value, like the output of the DLT estimation.
+
+    Args:
+        n: Number of homographies.
+        seed: Random seed.
+
+    Returns:
+        List of 3x3 matrices.
+    """
+    rng = np.random.default_rng(seed)
+    Ms = []
+    for _ in range(n):
+        t = ProjectiveTransform2D(per_x=rng.uniform(-1e-3, 1e-3), per_y=rng.uniform(-1e-3, 1e-3),
+                                  sx=rng.uniform(0.5, 2.0), sy=rng.uniform(0.5, 2.0),
+                                  shear_theta=rng.uniform(-0.5, 0.5), theta=rng.uniform(-np.pi, np.pi),
+                                  tx=rng.uniform(-200, 200), ty=rng.uniform(-200, 200))
+        Ms.append(t.normalized_M)
+    return Ms
+
+
+def run(method: str, Ms: List[np.ndarray]) -> None:
+    """
+    Decompose every matrix and report the time per matrix and the
+    largest error of the recomposed (normalized) matrix.
+
+    Args:
+        method: Decomposition method.
+        Ms: The matrices.
+    """
+    start = time.perf_counter()
+    results = [ProjectiveTransform2D.get_decomposed_from_M(M, method=method) for M in Ms]
+    elapsed = time.perf_counter() - start
+    errors = []
+    for M, (affine, perspective) in zip(Ms, results):
+        recomposed = perspective.M @ affine.M
+        errors.append(np.max(np.abs(recomposed / recomposed[2, 2] - M)))
+    print(f"  {method:<12} {elapsed / len(Ms) * 1e6:10.1f} usec per matrix   max error {max(errors):.2e}")
+
+
+def main() -> None:
+    """
+    Compare the closed form decomposition with the optimizer.
+    """
+    Ms = random_homographies(200)
+    print("ProjectiveTransform2D.get_decomposed_from_M on random homographies")
+    run("closed_form", Ms)
+    run("optimize", Ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from .correspondences import estimate_transform, hartley_matrix
+from .homography import dlt_homography, quad_to_quad, square_to_quad
+from .irls import irls_line, irls_transform, weighted_transform
+from .least_squares import (affine_least_squares, perspective_least_squares, scale_least_squares,
+                            shear_least_squares)
+from .line_fit import fit_line_groups, fit_lines
+from .procrustes import procrustes_rigid, procrustes_rotation, umeyama_similarity
+from .ransac import ransac_line, ransac_lines, ransac_transform
+from .refine import refine_homography
+from .vanishing_points import ransac_vanishing_points
+
+
+__all__ = [
+    "affine_least_squares",
+    "dlt_homography",
+    "estimate_transform",
+    "fit_line_groups",
+    "fit_lines",
+    "hartley_matrix",
+    "irls_line",
+    "irls_transform",
+    "perspective_least_squares",
+    "procrustes_rigid",
+    "procrustes_rotation",
+    "quad_to_quad",
+    "ransac_line",
+    "ransac_lines",
+    "ransac_transform",
+    "ransac_vanishing_points",
+    "refine_homography",
+    "scale_least_squares",
+    "shear_least_squares",
+    "square_to_quad",
+    "umeyama_similarity",
+    "weighted_transform",
+]
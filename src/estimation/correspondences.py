@@ -0,0 +1,369 @@
+from typing import Callable, Dict, Iterator, Tuple, Type, Union
+import numpy as np
+from src.transforms import *
+from src.estimation.least_squares import perspective_least_squares, scale_least_squares, shear_least_squares
+from src.estimation.procrustes import _translation
+
+
+# Points are accumulated in chunks of this many rows, so the temporary
+# arrays (and so the memory) do not grow with the number of points.
+CHUNK_SIZE = 8192
+
+
+def _mean(points: np.ndarray) -> np.ndarray:
+    """
+    Centroid of the points as a product with a vector of ones, which is
+    much faster than points.mean(axis=-2) for tall (N, 2) arrays.
+
+    Args:
+        points: (..., N, 2) cartesian points.
+
+    Returns:
+        (..., 2) centroids.
+    """
+    n = points.shape[-2]
+    return np.full(n, 1.0 / n) @ points
+
+
+def hartley_matrix(points: np.ndarray) -> np.ndarray:
+    """
+    Hartley normalization: the similarity that moves the centroid of the points
+    to the origin and scales them so the RMS distance to the origin is sqrt(2).
+    The statistics are reductions, so no (N, 2) temporaries are made.
+    Broadcasts over any leading dimensions.
+
+    Args:
+        points: (..., N, 2) cartesian points.
+
+    Returns:
+        (..., 3, 3) normalizing matrices.
+    """
+    points = np.asarray(points, dtype=float)
+    mean = _mean(points)
+    mean_sq = np.einsum("...ij,...ij->...", points, points) / points.shape[-2]
+    rms = np.sqrt(np.maximum(mean_sq - (mean * mean).sum(axis=-1), 0.0))
+    with np.errstate(divide="ignore"):
+        k = np.where(rms > 0.0, np.sqrt(2.0) / rms, 1.0)
+    T = np.zeros(points.shape[:-2] + (3, 3))
+    T[..., 0, 0] = k
+    T[..., 1, 1] = k
+    T[..., :2, 2] = -k[..., None] * mean
+    T[..., 2, 2] = 1.0
+    return T
+
+
+def _normalized_chunks(src: np.ndarray, dst: np.ndarray, T_src: np.ndarray, T_dst: np.ndarray,
+                       chunk_size: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yield the Hartley normalized source and destination points chunk_size rows at a time.
+
+    Args:
+        src: (N, 2) cartesian source points.
+        dst: (N, 2) cartesian destination points.
+        T_src: Normalizing matrix of src.
+        T_dst: Normalizing matrix of dst.
+        chunk_size: Number of points per chunk.
+
+    Returns:
+        (normalized src chunk, normalized dst chunk) pairs.
+    """
+    for start in range(0, src.shape[0], chunk_size):
+        yield (src[start:start + chunk_size] * T_src[0, 0] + T_src[:2, 2],
+               dst[start:start + chunk_size] * T_dst[0, 0] + T_dst[:2, 2])
+
+
+def _moment_matrix(src: np.ndarray, dst: np.ndarray, T_src: np.ndarray, T_dst: np.ndarray,
+                   chunk_size: int) -> np.ndarray:
+    """
+    Sum of z @ z.T over the points with z = (x, y, u, v, 1) in normalized coords.
+    Every linear least squares problem between the point sets (affine, and the
+    Procrustes problems on centered points) only needs these sums.
+
+    Args:
+        src: (N, 2) cartesian source points.
+        dst: (N, 2) cartesian destination points.
+        T_src: Normalizing matrix of src.
+        T_dst: Normalizing matrix of dst.
+        chunk_size: Number of points per chunk.
+
+    Returns:
+        5x5 moment matrix.
+    """
+    S = np.zeros((5, 5))
+    for s, d in _normalized_chunks(src, dst, T_src, T_dst, chunk_size):
+        z = np.concatenate([s, d, np.ones((s.shape[0], 1))], axis=1)
+        S += z.T @ z
+    return S
+
+
+def _centered_moments(S: np.ndarray) -> np.ndarray:
+    """
+    4x4 moments of (x, y, u, v) about their means from the 5x5 moment matrix.
+    Broadcasts over any leading dimensions.
+
+    Args:
+        S: (..., 5, 5) moment matrices (see _moment_matrix).
+
+    Returns:
+        (..., 4, 4) centered moment matrices.
+    """
+    n = S[..., 4, 4, None, None]
+    mean = S[..., :4, 4] / S[..., 4, 4, None]
+    return S[..., :4, :4] - n * mean[..., :, None] * mean[..., None, :]
+
+
+def _procrustes_terms(S: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sums of dot and cross products of the centered points, and the spread
+    of the centered source points (see procrustes._cross_covariance).
+    Broadcasts over any leading dimensions.
+
+    Args:
+        S: (..., 5, 5) moment matrices (see _moment_matrix).
+
+    Returns:
+        (sum of dot products, sum of cross products, sum of squared source norms)
+    """
+    C = _centered_moments(S)
+    dot = C[..., 0, 2] + C[..., 1, 3]
+    cross = C[..., 0, 3] - C[..., 1, 2]
+    spread = C[..., 0, 0] + C[..., 1, 1]
+    return dot, cross, spread
+
+
+def estimate_translation(src: np.ndarray, dst: np.ndarray, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Translation that maps the source centroid to the destination centroid.
+
+    Args:
+        src: (N, 2) cartesian source points.
+        dst: (N, 2) cartesian destination points.
+        chunk_size: Unused, kept so every estimator has the same signature.
+
+    Returns:
+        3x3 translation matrix.
+    """
+    M = np.identity(3)
+    M[:2, 2] = _mean(dst) - _mean(src)
+    return M
+
+
+def estimate_rotation(src: np.ndarray, dst: np.ndarray, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Rotation that best aligns the centered points (see procrustes_rotation).
+
+    Args:
+        src: (N, 2) cartesian source points.
+        dst: (N, 2) cartesian destination points.
+        chunk_size: Number of points per chunk.
+
+    Returns:
+        3x3 rotation matrix.
+    """
+    return RotationTransform2D(_similarity_params(src, dst, chunk_size)[1]).M
+
+
+def estimate_rigid(src: np.ndarray, dst: np.ndarray, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Rigid transform that minimizes the squared distances (see procrustes_rigid).
+
+    Args:
+        src: (N, 2) cartesian source points.
+        dst: (N, 2) cartesian destination points.
+        chunk_size: Number of points per chunk.
+
+    Returns:
+        3x3 rigid matrix.
+    """
+    _, theta, src_mean, dst_mean = _similarity_params(src, dst, chunk_size)
+    tx, ty = _translation(theta, 1.0, src_mean, dst_mean)
+    return RigidTransform2D(theta, tx, ty).M
+
+
+def estimate_similarity(src: np.ndarray, dst: np.ndarray, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Similarity transform that minimizes the squared distances (see umeyama_similarity).
+
+    Args:
+        src: (N, 2) cartesian source points.
+        dst: (N, 2) cartesian destination points.
+        chunk_size: Number of points per chunk.
+
+    Returns:
+        3x3 similarity matrix.
+    """
+    scale, theta, src_mean, dst_mean = _similarity_params(src, dst, chunk_size)
+    tx, ty = _translation(theta, scale, src_mean, dst_mean)
+    return SimilarityTransform2D(scale, scale, theta, tx, ty).M
+
+
+def _similarity_params(src: np.ndarray, dst: np.ndarray,
+                       chunk_size: int) -> Tuple[float, float, np.ndarray, np.ndarray]:
+    """
+    Umeyama scale and rotation from the accumulated moments. The normalization
+    scales each point set uniformly, which does not change the rotation, and
+    the scale is converted back with the ratio of the normalizing scales.
+
+    Args:
+        src: (N, 2) cartesian source points.
+        dst: (N, 2) cartesian destination points.
+        chunk_size: Number of points per chunk.
+
+    Returns:
+        (scale, theta, src centroid, dst centroid)
+    """
+    T_src, T_dst = hartley_matrix(src), hartley_matrix(dst)
+    dot, cross, spread = _procrustes_terms(_moment_matrix(src, dst, T_src, T_dst, chunk_size))
+    theta = float(np.arctan2(cross, dot))
+    scale = float(np.hypot(dot, cross) / spread * T_src[0, 0] / T_dst[0, 0])
+    return scale, theta, _mean(src), _mean(dst)
+
+
+def estimate_affine(src: np.ndarray, dst: np.ndarray, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Affine transform that minimizes the squared distances. The 3x3 normal
+    equations are accumulated in Hartley normalized coords, where they are
+    well conditioned, and the solution is converted back to the original coords.
+
+    Args:
+        src: (N, 2) cartesian source points, N >= 3 and not collinear.
+        dst: (N, 2) cartesian destination points.
+        chunk_size: Number of points per chunk.
+
+    Returns:
+        3x3 affine matrix.
+    """
+    T_src, T_dst = hartley_matrix(src), hartley_matrix(dst)
+    S = _moment_matrix(src, dst, T_src, T_dst, chunk_size)
+    design, rhs = [0, 1, 4], [2, 3]
+    X = np.linalg.solve(S[np.ix_(design, design)], S[np.ix_(design, rhs)])
+    M_normalized = np.identity(3)
+    M_normalized[:2] = X.T
+    M = np.linalg.inv(T_dst) @ M_normalized @ T_src
+    M[2] = (0., 0., 1.)
+    return M
+
+
+def estimate_projective(src: np.ndarray, dst: np.ndarray, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Hartley normalized DLT. Instead of building the (2N, 9) equation matrix
+    (see dlt_homography), its 9x9 normal matrix A.T @ A is accumulated chunk by
+    chunk and the homography is the eigenvector of the smallest eigenvalue.
+
+    Args:
+        src: (N, 2) cartesian source points, N >= 4.
+        dst: (N, 2) cartesian destination points.
+        chunk_size: Number of points per chunk.
+
+    Returns:
+        3x3 homography normalized by the bottom right value.
+    """
+    T_src, T_dst = hartley_matrix(src), hartley_matrix(dst)
+    AtA = np.zeros((9, 9))
+    for s, d in _normalized_chunks(src, dst, T_src, T_dst, chunk_size):
+        x, y = s[:, :1], s[:, 1:]
+        u, v = d[:, :1], d[:, 1:]
+        ones, zeros = np.ones_like(x), np.zeros_like(x)
+        A = np.concatenate([np.hstack([-x, -y, -ones, zeros, zeros, zeros, x * u, y * u, u]),
+                            np.hstack([zeros, zeros, zeros, -x, -y, -ones, x * v, y * v, v])])
+        AtA += A.T @ A
+    _, eigvecs = np.linalg.eigh(AtA)
+    H = np.linalg.inv(T_dst) @ eigvecs[:, 0].reshape(3, 3) @ T_src
+    return H / H[2, 2]
+
+
+def estimate_scale(src: np.ndarray, dst: np.ndarray, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Scale about the centroids (see scale_least_squares).
+
+    Args:
+        src: (N, 2) cartesian source points.
+        dst: (N, 2) cartesian destination points.
+        chunk_size: Unused, kept so every estimator has the same signature.
+
+    Returns:
+        3x3 scale matrix.
+    """
+    sx, sy = scale_least_squares(src, dst)
+    return ScaleTransform2D(float(sx), float(sy)).M
+
+
+def estimate_shear(src: np.ndarray, dst: np.ndarray, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Shear about the centroids (see shear_least_squares).
+
+    Args:
+        src: (N, 2) cartesian source points.
+        dst: (N, 2) cartesian destination points.
+        chunk_size: Unused, kept so every estimator has the same signature.
+
+    Returns:
+        3x3 shear matrix.
+    """
+    return ShearTransform2D(float(shear_least_squares(src, dst))).M
+
+
+def estimate_perspective(src: np.ndarray, dst: np.ndarray, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Pure perspective transform (see perspective_least_squares).
+
+    Args:
+        src: (N, 2) cartesian source points.
+        dst: (N, 2) cartesian destination points.
+        chunk_size: Unused, kept so every estimator has the same signature.
+
+    Returns:
+        3x3 perspective matrix.
+    """
+    per_x, per_y = perspective_least_squares(src, dst)
+    return PerspectiveTransform2D(float(per_x), float(per_y)).M
+
+
+# Matrix estimator and minimum number of correspondences for each model.
+ESTIMATORS: Dict[Type[TransformBase2D], Tuple[Callable[..., np.ndarray], int]] = {
+    TranslationTransform2D: (estimate_translation, 1),
+    RotationTransform2D: (estimate_rotation, 2),
+    ScaleTransform2D: (estimate_scale, 2),
+    ShearTransform2D: (estimate_shear, 2),
+    PerspectiveTransform2D: (estimate_perspective, 2),
+    RigidTransform2D: (estimate_rigid, 2),
+    SimilarityTransform2D: (estimate_similarity, 2),
+    AffineTransform2D: (estimate_affine, 3),
+    ProjectiveTransform2D: (estimate_projective, 4),
+}
+
+
+def estimate_transform(src: np.ndarray, dst: np.ndarray,
+                       model: Union[Type[TransformBase2D], TransformBase2D],
+                       chunk_size: int = CHUNK_SIZE) -> TransformBase2D:
+    """
+    Least squares transform of the given model that maps the source points
+    to the destination points, for any number of correspondences.
+
+    Args:
+        src: (N, 2) cartesian source points.
+        dst: (N, 2) cartesian destination points.
+        model: The type of transform (a subclass of TransformBase2D or an instance of one).
+        chunk_size: Number of points accumulated at a time.
+
+    Returns:
+        The transform with from_origin set to True.
+    """
+    if isinstance(model, TransformBase2D):
+        model = type(model)
+    if model not in ESTIMATORS:
+        raise ValueError(f"No estimator for {model.__name__}.")
+    src = np.asarray(src, dtype=float)
+    dst = np.asarray(dst, dtype=float)
+    if src.ndim != 2 or src.shape[1] != 2 or src.shape != dst.shape:
+        raise ValueError(f"Need (N, 2) corresponding points, not {src.shape} and {dst.shape}.")
+    estimator, min_points = ESTIMATORS[model]
+    if src.shape[0] < min_points:
+        raise ValueError(f"{model.__name__} needs at least {min_points} correspondences, not {src.shape[0]}.")
+    t = model.from_M(estimator(src, dst, chunk_size=chunk_size))
+    t.from_origin = True
+    return t
+
+
+if __name__ == "__main__":
+    pass
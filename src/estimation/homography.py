@@ -0,0 +1,212 @@
+from typing import Optional, List, Tuple
+import numpy as np
+
+
+# Quads whose smallest |sin| of a corner angle is below this are
+# treated as near-degenerate (three corners are almost collinear).
+DEGENERATE_TOL = 1e-6
+
+
+def square_to_quad(quads: np.ndarray) -> np.ndarray:
+    """
+    Closed form homography that maps the unit square corners (0, 0), (1, 0),
+    (1, 1), (0, 1) to the four corners of each quad (Heckbert's square to quad
+    mapping). Broadcasts over any leading dimensions.
+
+    Args:
+        quads: (..., 4, 2) cartesian corners in cyclic order.
+
+    Returns:
+        (..., 3, 3) homographies (not normalized).
+    """
+    quads = np.asarray(quads, dtype=float)
+    x0, x1, x2, x3 = (quads[..., i, 0] for i in range(4))
+    y0, y1, y2, y3 = (quads[..., i, 1] for i in range(4))
+    dx1, dx2, dx3 = x1 - x2, x3 - x2, x0 - x1 + x2 - x3
+    dy1, dy2, dy3 = y1 - y2, y3 - y2, y0 - y1 + y2 - y3
+    with np.errstate(divide="ignore", invalid="ignore"):
+        det = dx1 * dy2 - dx2 * dy1
+        g = (dx3 * dy2 - dx2 * dy3) / det
+        h = (dx1 * dy3 - dx3 * dy1) / det
+    H = np.empty(quads.shape[:-2] + (3, 3))
+    H[..., 0, 0] = x1 - x0 + g * x1
+    H[..., 0, 1] = x3 - x0 + h * x3
+    H[..., 0, 2] = x0
+    H[..., 1, 0] = y1 - y0 + g * y1
+    H[..., 1, 1] = y3 - y0 + h * y3
+    H[..., 1, 2] = y0
+    H[..., 2, 0] = g
+    H[..., 2, 1] = h
+    H[..., 2, 2] = 1.0
+    return H
+
+
+def adjugate(Ms: np.ndarray) -> np.ndarray:
+    """
+    Adjugate of 3x3 matrices, which is the inverse up to scale
+    (enough for homographies) without dividing by the determinant.
+
+    Args:
+        Ms: (..., 3, 3) matrices.
+
+    Returns:
+        (..., 3, 3) adjugates.
+    """
+    c0, c1, c2 = Ms[..., :, 0], Ms[..., :, 1], Ms[..., :, 2]
+    # Rows of the adjugate are cross products of the columns.
+    return np.stack([np.cross(c1, c2), np.cross(c2, c0), np.cross(c0, c1)], axis=-2)
+
+
+def quad_min_sin(quads: np.ndarray) -> np.ndarray:
+    """
+    Smallest |sin| of the four corner angles of each quad. This is 0 when
+    three corners are collinear, which makes the 4 point homography degenerate.
+
+    Args:
+        quads: (..., 4, 2) cartesian corners in cyclic order.
+
+    Returns:
+        (...) array in [0, 1].
+    """
+    quads = np.asarray(quads, dtype=float)
+    edges = np.roll(quads, -1, axis=-2) - quads
+    prev_edges = np.roll(edges, 1, axis=-2)
+    cross = prev_edges[..., 0] * edges[..., 1] - prev_edges[..., 1] * edges[..., 0]
+    lengths = np.linalg.norm(edges, axis=-1) * np.linalg.norm(prev_edges, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sin = np.abs(cross) / lengths
+    return np.nan_to_num(sin, nan=0.0).min(axis=-1)
+
+
+def dlt_homography(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Direct linear transform: the homography H with dst ~ H @ src as the
+    last right singular vector of the (2N, 9) equation matrix.
+    Broadcasts over any leading dimensions.
+
+    Args:
+        src: (..., N, 2) cartesian source points, N >= 4.
+        dst: (..., N, 2) cartesian destination points.
+
+    Returns:
+        (..., 3, 3) homographies normalized by the bottom right value.
+    """
+    src = np.asarray(src, dtype=float)
+    dst = np.asarray(dst, dtype=float)
+    x, y = src[..., 0], src[..., 1]
+    u, v = dst[..., 0], dst[..., 1]
+    ones, zeros = np.ones_like(x), np.zeros_like(x)
+    rows_x = np.stack([-x, -y, -ones, zeros, zeros, zeros, x * u, y * u, u], axis=-1)
+    rows_y = np.stack([zeros, zeros, zeros, -x, -y, -ones, x * v, y * v, v], axis=-1)
+    # Interleave so the rows are in the same order as building them point by point.
+    equation_matrix = np.stack([rows_x, rows_y], axis=-2).reshape(src.shape[:-2] + (-1, 9))
+    _, _, Vt = np.linalg.svd(equation_matrix)
+    H = Vt[..., -1, :].reshape(src.shape[:-2] + (3, 3))
+    return H / H[..., 2:, 2:]
+
+
+def quad_to_quad(src: np.ndarray, dst: np.ndarray, tol: float = DEGENERATE_TOL) -> np.ndarray:
+    """
+    Homography that maps each source quad to the destination quad, as
+    square_to_quad(dst) @ adjugate(square_to_quad(src)). Quads that are
+    near-degenerate (see quad_min_sin) are solved with dlt_homography
+    instead. Broadcasts over any leading dimensions.
+
+    Args:
+        src: (..., 4, 2) cartesian source corners in cyclic order.
+        dst: (..., 4, 2) cartesian destination corners in the same order.
+        tol: Quads with quad_min_sin below tol use the SVD fallback.
+
+    Returns:
+        (..., 3, 3) homographies normalized by the bottom right value.
+    """
+    src = np.asarray(src, dtype=float)
+    dst = np.asarray(dst, dtype=float)
+    if src.shape[-2:] != (4, 2) or dst.shape[-2:] != (4, 2):
+        raise ValueError(f"Need (..., 4, 2) quads, not {src.shape} and {dst.shape}.")
+    if src.ndim == 2 and dst.ndim == 2:
+        H = quad_to_quad_single(src.tolist(), dst.tolist(), tol=tol)
+        if H is None:
+            return dlt_homography(src, dst)
+        return np.array(H).reshape(3, 3)
+    src, dst = np.broadcast_arrays(src, dst)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        H = square_to_quad(dst) @ adjugate(square_to_quad(src))
+        H = H / H[..., 2:, 2:]
+    degenerate = (np.minimum(quad_min_sin(src), quad_min_sin(dst)) < tol) | ~np.isfinite(H).all(axis=(-2, -1))
+    if np.any(degenerate):
+        H[degenerate] = dlt_homography(src[degenerate], dst[degenerate])
+    return H
+
+
+def _square_to_quad_single(quad: List[List[float]], tol: float) -> Optional[Tuple[float, ...]]:
+    """
+    square_to_quad for a single quad with python floats, which avoids
+    the overhead of numpy calls on tiny arrays. The quad_min_sin test
+    is done on the same corners with squared values, without square roots.
+
+    Args:
+        quad: Four [x, y] corners in cyclic order.
+        tol: Quads with a corner |sin| below tol are near-degenerate.
+
+    Returns:
+        The 9 values of the homography (row major), or None if near-degenerate.
+    """
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = quad
+    dx1, dx2, dx3 = x1 - x2, x3 - x2, x0 - x1 + x2 - x3
+    dy1, dy2, dy3 = y1 - y2, y3 - y2, y0 - y1 + y2 - y3
+    # Edges leaving corners 0 and 3 (the other two are -d1 and d2).
+    ex0, ey0, ex3, ey3 = x1 - x0, y1 - y0, x0 - x3, y0 - y3
+    l0, l1, l2, l3 = ex0 * ex0 + ey0 * ey0, dx1 * dx1 + dy1 * dy1, dx2 * dx2 + dy2 * dy2, ex3 * ex3 + ey3 * ey3
+    c0, c1 = ex3 * ey0 - ey3 * ex0, ey0 * dx1 - ex0 * dy1
+    c2, c3 = dx1 * dy2 - dy1 * dx2, dx2 * ey3 - dy2 * ex3
+    tol_sq = tol * tol
+    if (c2 == 0.0 or l0 * l1 * l2 * l3 == 0.0 or c0 * c0 < tol_sq * l3 * l0 or c1 * c1 < tol_sq * l0 * l1
+            or c2 * c2 < tol_sq * l1 * l2 or c3 * c3 < tol_sq * l2 * l3):
+        return None
+    # c2 is also the determinant of the 2x2 system of square_to_quad.
+    g = (dx3 * dy2 - dx2 * dy3) / c2
+    h = (dx1 * dy3 - dx3 * dy1) / c2
+    return (x1 - x0 + g * x1, x3 - x0 + h * x3, x0,
+            y1 - y0 + g * y1, y3 - y0 + h * y3, y0,
+            g, h, 1.0)
+
+
+def quad_to_quad_single(src: List[List[float]], dst: List[List[float]],
+                        tol: float = DEGENERATE_TOL) -> Optional[Tuple[float, ...]]:
+    """
+    quad_to_quad for a single pair of quads with python floats. This is
+    the fast path for interactive use, e.g. re-estimating on every mouse move.
+
+    Args:
+        src: Four [x, y] source corners in cyclic order.
+        dst: Four [x, y] destination corners in the same order.
+        tol: Quads with a corner |sin| below tol are near-degenerate.
+
+    Returns:
+        The 9 values of the homography (row major) normalized by the bottom
+        right value, or None if either quad is near-degenerate.
+    """
+    S = _square_to_quad_single(src, tol)
+    if S is None:
+        return None
+    D = _square_to_quad_single(dst, tol)
+    if D is None:
+        return None
+    a, b, c, d, e, f, g, h, i = S
+    # Adjugate of S (its inverse up to scale).
+    A0, A1, A2 = e * i - f * h, c * h - b * i, b * f - c * e
+    A3, A4, A5 = f * g - d * i, a * i - c * g, c * d - a * f
+    A6, A7, A8 = d * h - e * g, b * g - a * h, a * e - b * d
+    a, b, c, d, e, f, g, h, i = D
+    scale = g * A2 + h * A5 + i * A8
+    if scale == 0.0:
+        return None
+    s = 1.0 / scale
+    return ((a * A0 + b * A3 + c * A6) * s, (a * A1 + b * A4 + c * A7) * s, (a * A2 + b * A5 + c * A8) * s,
+            (d * A0 + e * A3 + f * A6) * s, (d * A1 + e * A4 + f * A7) * s, (d * A2 + e * A5 + f * A8) * s,
+            (g * A0 + h * A3 + i * A6) * s, (g * A1 + h * A4 + i * A7) * s, 1.0)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,500 @@
+from typing import Callable, Dict, Optional, Tuple, Type, Union
+import numpy as np
+from src.transforms import *
+from src.estimation.correspondences import ESTIMATORS, hartley_matrix, _centered_moments, _procrustes_terms
+from src.estimation.least_squares import perspective_least_squares
+from src.estimation.line_fit import fit_lines, line_residuals
+from src.estimation.procrustes import _translation
+from src.estimation.ransac import squared_residuals
+
+
+# Scale of a standard normal distribution from the median absolute residual.
+MAD_TO_SIGMA = 1.4826
+# Scale (per coordinate) of 2D normal errors from the median of their Euclidean
+# lengths, which are Rayleigh distributed with median sigma * sqrt(2 ln 2).
+RAYLEIGH_MEDIAN_TO_SIGMA = 1.0 / np.sqrt(2.0 * np.log(2.0))
+
+
+def huber_weights(r: np.ndarray) -> np.ndarray:
+    """
+    Huber loss: quadratic for |r| <= 1 and linear beyond.
+
+    Args:
+        r: Residuals divided by the tuning constant and scale.
+
+    Returns:
+        Weights in (0, 1].
+    """
+    r = np.abs(r)
+    with np.errstate(divide="ignore"):
+        return np.where(r <= 1.0, 1.0, 1.0 / r)
+
+
+def tukey_weights(r: np.ndarray) -> np.ndarray:
+    """
+    Tukey biweight loss: residuals with |r| >= 1 are ignored.
+
+    Args:
+        r: Residuals divided by the tuning constant and scale.
+
+    Returns:
+        Weights in [0, 1].
+    """
+    return np.where(np.abs(r) < 1.0, (1.0 - r * r) ** 2, 0.0)
+
+
+def cauchy_weights(r: np.ndarray) -> np.ndarray:
+    """
+    Cauchy (Lorentzian) loss.
+
+    Args:
+        r: Residuals divided by the tuning constant and scale.
+
+    Returns:
+        Weights in (0, 1].
+    """
+    return 1.0 / (1.0 + r * r)
+
+
+# Weight function and tuning constant (95% efficiency for normal residuals) of each loss.
+ROBUST_LOSSES: Dict[str, Tuple[Callable[[np.ndarray], np.ndarray], float]] = {
+    "huber": (huber_weights, 1.345),
+    "tukey": (tukey_weights, 4.685),
+    "cauchy": (cauchy_weights, 2.385),
+}
+
+
+def robust_weights(residuals: np.ndarray, loss: str = "huber", scale: Optional[float] = None,
+                   planar: bool = False) -> np.ndarray:
+    """
+    IRLS weights of residuals. Without a scale, the scale of each problem
+    is estimated from its median absolute residual, with MAD_TO_SIGMA for 1D
+    residuals (e.g. distances to a line) or RAYLEIGH_MEDIAN_TO_SIGMA for 2D
+    Euclidean distances. With a zero scale, only zero residuals keep their weight.
+
+    Args:
+        residuals: (..., N) residuals (e.g. distances) of each problem.
+        loss: One of ROBUST_LOSSES.
+        scale: Standard deviation of the inlier residuals (per coordinate when planar).
+        planar: Whether the residuals are Euclidean distances between 2D points.
+
+    Returns:
+        (..., N) weights. Residuals that are not finite get weight 0.
+    """
+    if loss not in ROBUST_LOSSES:
+        raise ValueError(f"Loss must be one of {list(ROBUST_LOSSES)}, not {loss}.")
+    weight_fn, tuning = ROBUST_LOSSES[loss]
+    finite = np.isfinite(residuals)
+    residuals = np.where(finite, residuals, 0.0)
+    if scale is None:
+        to_sigma = RAYLEIGH_MEDIAN_TO_SIGMA if planar else MAD_TO_SIGMA
+        scale = to_sigma * np.median(np.abs(residuals), axis=-1, keepdims=True)
+    scale = np.asarray(scale, dtype=float) * tuning
+    # With a zero scale (e.g. most residuals are exactly zero) any other residual is an outlier.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(scale > 0.0, residuals / scale, np.where(residuals == 0.0, 0.0, np.inf))
+    return np.where(finite, weight_fn(r), 0.0)
+
+
+def _weighted_moments(src: np.ndarray, dst: np.ndarray,
+                      weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Weighted version of the 5x5 moment matrix of (x, y, u, v, 1) in Hartley
+    normalized coords (see correspondences._moment_matrix), for every problem at once.
+
+    Args:
+        src: (B, N, 2) cartesian source points.
+        dst: (B, N, 2) cartesian destination points.
+        weights: (B, N) weights.
+
+    Returns:
+        ((B, 5, 5) moment matrices, (B, 3, 3) src normalizations, (B, 3, 3) dst normalizations)
+    """
+    T_src, T_dst = hartley_matrix(src), hartley_matrix(dst)
+    z = np.concatenate([src * T_src[:, None, 0, 0, None] + T_src[:, None, :2, 2],
+                        dst * T_dst[:, None, 0, 0, None] + T_dst[:, None, :2, 2],
+                        np.ones(src.shape[:-1] + (1,))], axis=-1)
+    S = np.swapaxes(z * weights[..., None], -1, -2) @ z
+    return S, T_src, T_dst
+
+
+def _weighted_means(src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Weighted centroids of both point sets.
+
+    Args:
+        src: (B, N, 2) cartesian source points.
+        dst: (B, N, 2) cartesian destination points.
+        weights: (B, N) weights.
+
+    Returns:
+        ((B, 2) src centroids, (B, 2) dst centroids)
+    """
+    total = weights.sum(axis=-1)[:, None]
+    return (weights[:, None, :] @ src)[:, 0] / total, (weights[:, None, :] @ dst)[:, 0] / total
+
+
+def _weighted_similarity_params(src: np.ndarray, dst: np.ndarray,
+                                weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Weighted Umeyama scale and rotation (see correspondences._similarity_params).
+
+    Args:
+        src: (B, N, 2) cartesian source points.
+        dst: (B, N, 2) cartesian destination points.
+        weights: (B, N) weights.
+
+    Returns:
+        ((B,) scales, (B,) thetas, (B, 2) src centroids, (B, 2) dst centroids)
+    """
+    S, T_src, T_dst = _weighted_moments(src, dst, weights)
+    dot, cross, spread = _procrustes_terms(S)
+    theta = np.arctan2(cross, dot)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.hypot(dot, cross) / spread * T_src[:, 0, 0] / T_dst[:, 0, 0]
+    return (scale, theta) + _weighted_means(src, dst, weights)
+
+
+def _weighted_translation(src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted translation between the centroids.
+
+    Args:
+        src: (B, N, 2) cartesian source points.
+        dst: (B, N, 2) cartesian destination points.
+        weights: (B, N) weights.
+
+    Returns:
+        (B, 3, 3) transform matrices.
+    """
+    src_mean, dst_mean = _weighted_means(src, dst, weights)
+    t = dst_mean - src_mean
+    return TranslationTransform2D.from_params(t[:, 0], t[:, 1]).Ms
+
+
+def _weighted_rotation(src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted rotation about the centroids (see procrustes_rotation).
+
+    Args:
+        src: (B, N, 2) cartesian source points.
+        dst: (B, N, 2) cartesian destination points.
+        weights: (B, N) weights.
+
+    Returns:
+        (B, 3, 3) transform matrices.
+    """
+    _, theta, _, _ = _weighted_similarity_params(src, dst, weights)
+    return RotationTransform2D.from_params(theta).Ms
+
+
+def _weighted_rigid(src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted rigid transform (see procrustes_rigid).
+
+    Args:
+        src: (B, N, 2) cartesian source points.
+        dst: (B, N, 2) cartesian destination points.
+        weights: (B, N) weights.
+
+    Returns:
+        (B, 3, 3) transform matrices.
+    """
+    _, theta, src_mean, dst_mean = _weighted_similarity_params(src, dst, weights)
+    return RigidTransform2D.from_params(theta, *_translation(theta, 1.0, src_mean, dst_mean)).Ms
+
+
+def _weighted_similarity(src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted similarity transform (see umeyama_similarity).
+
+    Args:
+        src: (B, N, 2) cartesian source points.
+        dst: (B, N, 2) cartesian destination points.
+        weights: (B, N) weights.
+
+    Returns:
+        (B, 3, 3) transform matrices.
+    """
+    scale, theta, src_mean, dst_mean = _weighted_similarity_params(src, dst, weights)
+    tx, ty = _translation(theta, scale, src_mean, dst_mean)
+    return SimilarityTransform2D.from_params(scale, scale, theta, tx, ty).Ms
+
+
+def _weighted_scale(src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted scale about the centroids, sx = sum(w * x * u) / sum(w * x^2)
+    and likewise for sy (see scale_least_squares).
+
+    Args:
+        src: (B, N, 2) cartesian source points.
+        dst: (B, N, 2) cartesian destination points.
+        weights: (B, N) weights.
+
+    Returns:
+        (B, 3, 3) transform matrices.
+    """
+    S, T_src, T_dst = _weighted_moments(src, dst, weights)
+    C = _centered_moments(S)
+    ratio = T_src[:, 0, 0] / T_dst[:, 0, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return ScaleTransform2D.from_params(C[:, 0, 2] / C[:, 0, 0] * ratio, C[:, 1, 3] / C[:, 1, 1] * ratio).Ms
+
+
+def _weighted_shear(src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted shear about the centroids, tan(theta) = sum(w * y * (u - x)) / sum(w * y^2)
+    (see shear_least_squares).
+
+    Args:
+        src: (B, N, 2) cartesian source points.
+        dst: (B, N, 2) cartesian destination points.
+        weights: (B, N) weights.
+
+    Returns:
+        (B, 3, 3) transform matrices.
+    """
+    S, T_src, T_dst = _weighted_moments(src, dst, weights)
+    C = _centered_moments(S)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = (C[:, 1, 2] * T_src[:, 0, 0] / T_dst[:, 0, 0] - C[:, 0, 1]) / C[:, 1, 1]
+    return ShearTransform2D.from_params(np.arctan(k)).Ms
+
+
+def _weighted_perspective(src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted pure perspective transform (see perspective_least_squares).
+
+    Args:
+        src: (B, N, 2) cartesian source points.
+        dst: (B, N, 2) cartesian destination points.
+        weights: (B, N) weights.
+
+    Returns:
+        (B, 3, 3) transform matrices.
+    """
+    return PerspectiveTransform2D.from_params(*perspective_least_squares(src, dst, weights=weights)).Ms
+
+
+def _weighted_affine(src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted affine transform, the normal equations of estimate_affine
+    built from the weighted moments.
+
+    Args:
+        src: (B, N, 2) cartesian source points.
+        dst: (B, N, 2) cartesian destination points.
+        weights: (B, N) weights.
+
+    Returns:
+        (B, 3, 3) transform matrices.
+    """
+    S, T_src, T_dst = _weighted_moments(src, dst, weights)
+    design, rhs = [0, 1, 4], [2, 3]
+    X = np.linalg.solve(S[:, design][:, :, design], S[:, design][:, :, rhs])
+    M_normalized = np.broadcast_to(np.identity(3), X.shape[:1] + (3, 3)).copy()
+    M_normalized[:, :2] = np.swapaxes(X, -1, -2)
+    Ms = np.linalg.inv(T_dst) @ M_normalized @ T_src
+    Ms[:, 2] = (0., 0., 1.)
+    return Ms
+
+
+def _weighted_projective(src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted Hartley normalized DLT (see estimate_projective). Each
+    point weights both of its rows of the equation matrix.
+
+    Args:
+        src: (B, N, 2) cartesian source points.
+        dst: (B, N, 2) cartesian destination points.
+        weights: (B, N) weights.
+
+    Returns:
+        (B, 3, 3) transform matrices.
+    """
+    T_src, T_dst = hartley_matrix(src), hartley_matrix(dst)
+    s = src * T_src[:, None, 0, 0, None] + T_src[:, None, :2, 2]
+    d = dst * T_dst[:, None, 0, 0, None] + T_dst[:, None, :2, 2]
+    x, y, u, v = s[..., 0], s[..., 1], d[..., 0], d[..., 1]
+    ones, zeros = np.ones_like(x), np.zeros_like(x)
+    A = np.concatenate([np.stack([-x, -y, -ones, zeros, zeros, zeros, x * u, y * u, u], axis=-1),
+                        np.stack([zeros, zeros, zeros, -x, -y, -ones, x * v, y * v, v], axis=-1)], axis=1)
+    w = np.concatenate([weights, weights], axis=1)
+    _, eigvecs = np.linalg.eigh(np.swapaxes(A * w[..., None], -1, -2) @ A)
+    Ms = np.linalg.inv(T_dst) @ eigvecs[:, :, 0].reshape(-1, 3, 3) @ T_src
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return Ms / Ms[:, 2:, 2:]
+
+
+# Batched weighted least squares solver of each model.
+WEIGHTED_SOLVERS: Dict[Type[TransformBase2D], Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]] = {
+    TranslationTransform2D: _weighted_translation,
+    RotationTransform2D: _weighted_rotation,
+    ScaleTransform2D: _weighted_scale,
+    ShearTransform2D: _weighted_shear,
+    PerspectiveTransform2D: _weighted_perspective,
+    RigidTransform2D: _weighted_rigid,
+    SimilarityTransform2D: _weighted_similarity,
+    AffineTransform2D: _weighted_affine,
+    ProjectiveTransform2D: _weighted_projective,
+}
+
+
+def weighted_transform(src: np.ndarray, dst: np.ndarray, weights: np.ndarray,
+                       model: Union[Type[TransformBase2D], TransformBase2D]) -> np.ndarray:
+    """
+    Weighted least squares transform matrices of the given model, for
+    many independent problems at once. Broadcasts over any leading dimensions.
+
+    Args:
+        src: (..., N, 2) cartesian source points.
+        dst: (..., N, 2) cartesian destination points.
+        weights: (..., N) weight per correspondence.
+        model: The type of transform (a subclass of TransformBase2D or an instance of one).
+
+    Returns:
+        (..., 3, 3) transform matrices.
+    """
+    if isinstance(model, TransformBase2D):
+        model = type(model)
+    if model not in WEIGHTED_SOLVERS:
+        raise ValueError(f"No weighted solver for {model.__name__}.")
+    src, dst, weights, lead = _flatten_problems(src, dst, weights)
+    return WEIGHTED_SOLVERS[model](src, dst, weights).reshape(lead + (3, 3))
+
+
+def _flatten_problems(src: np.ndarray, dst: np.ndarray,
+                      weights: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Tuple[int, ...]]:
+    """
+    Broadcast the problems and flatten their leading dimensions.
+
+    Args:
+        src: (..., N, 2) cartesian source points.
+        dst: (..., N, 2) cartesian destination points.
+        weights: Optional (..., N) weights (default 1).
+
+    Returns:
+        ((B, N, 2) src, (B, N, 2) dst, (B, N) weights, leading dimensions)
+    """
+    src = np.asarray(src, dtype=float)
+    dst = np.asarray(dst, dtype=float)
+    if src.shape[-1] != 2 or src.shape[-2:] != dst.shape[-2:]:
+        raise ValueError(f"Need (..., N, 2) corresponding points, not {src.shape} and {dst.shape}.")
+    n = src.shape[-2]
+    weights = np.ones(n) if weights is None else np.asarray(weights, dtype=float)
+    lead = np.broadcast_shapes(src.shape[:-2], dst.shape[:-2], weights.shape[:-1])
+    src = np.broadcast_to(src, lead + (n, 2)).reshape(-1, n, 2)
+    dst = np.broadcast_to(dst, lead + (n, 2)).reshape(-1, n, 2)
+    weights = np.broadcast_to(weights, lead + (n,)).reshape(-1, n).copy()
+    return src, dst, weights, lead
+
+
+def _irls(solve: Callable[[np.ndarray, np.ndarray], np.ndarray],
+          residuals: Callable[[np.ndarray, np.ndarray], np.ndarray], weights: np.ndarray,
+          min_points: int, loss: str, scale: Optional[float], max_iterations: int,
+          tol: float, planar: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Iteratively reweighted least squares for B independent problems. Each
+    iteration is one weighted solve of every problem that is still active.
+    A problem stops when its weights change by at most tol, or when the new
+    weights would leave fewer than min_points points.
+
+    Args:
+        solve: Maps (problem indices, (b, N) weights) to (b, ...) solutions.
+        residuals: Maps (problem indices, (b, ...) solutions) to (b, N) residuals.
+        weights: (B, N) initial weights, updated in place.
+        min_points: Minimum number of points with weight > 0.
+        loss: One of ROBUST_LOSSES.
+        scale: Standard deviation of the inlier residuals (estimated if None).
+        max_iterations: Maximum number of reweighting steps.
+        tol: Largest weight change of a converged problem.
+        planar: Whether the residuals are Euclidean distances between 2D points (see robust_weights).
+
+    Returns:
+        ((B, ...) solutions, (B, N) final weights)
+    """
+    every = np.arange(weights.shape[0])
+    solutions = solve(every, weights)
+    active = np.ones(weights.shape[0], dtype=bool)
+    for _ in range(max_iterations):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+        new_weights = robust_weights(residuals(idx, solutions[idx]), loss=loss, scale=scale, planar=planar)
+        enough = (new_weights > 0.0).sum(axis=-1) >= min_points
+        change = np.abs(new_weights - weights[idx]).max(axis=-1)
+        update = idx[enough]
+        if update.size > 0:
+            weights[update] = new_weights[enough]
+            solutions[update] = solve(update, weights[update])
+        active[idx] = enough & (change > tol)
+    return solutions, weights
+
+
+def irls_transform(src: np.ndarray, dst: np.ndarray, model: Union[Type[TransformBase2D], TransformBase2D],
+                   loss: str = "huber", scale: Optional[float] = None, max_iterations: int = 20,
+                   tol: float = 1e-3, weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Robust transform estimation with iteratively reweighted least squares.
+    The residuals are the distances between the transformed source points and
+    the destination points. Many independent problems are solved at once by
+    passing stacks of point sets. Broadcasts over any leading dimensions.
+
+    Args:
+        src: (..., N, 2) cartesian source points.
+        dst: (..., N, 2) cartesian destination points.
+        model: The type of transform (a subclass of TransformBase2D or an instance of one).
+        loss: One of ROBUST_LOSSES ("huber", "tukey" or "cauchy").
+        scale: Standard deviation of each coordinate of the inlier residuals
+               (estimated from the median distance if None).
+        max_iterations: Maximum number of reweighting steps.
+        tol: Stop a problem when none of its weights change by more than tol.
+        weights: Optional (..., N) initial weights (default 1).
+
+    Returns:
+        ((..., 3, 3) transform matrices, (..., N) final weights)
+    """
+    if isinstance(model, TransformBase2D):
+        model = type(model)
+    if model not in WEIGHTED_SOLVERS:
+        raise ValueError(f"No weighted solver for {model.__name__}.")
+    src, dst, weights, lead = _flatten_problems(src, dst, weights)
+    if src.shape[1] < ESTIMATORS[model][1]:
+        raise ValueError(f"{model.__name__} needs at least {ESTIMATORS[model][1]} correspondences, "
+                         f"not {src.shape[1]}.")
+    solver = WEIGHTED_SOLVERS[model]
+    Ms, weights = _irls(lambda idx, w: solver(src[idx], dst[idx], w),
+                        lambda idx, Ms: np.sqrt(squared_residuals(Ms, src[idx], dst[idx])),
+                        weights, ESTIMATORS[model][1], loss, scale, max_iterations, tol, planar=True)
+    return Ms.reshape(lead + (3, 3)), weights.reshape(lead + (-1,))
+
+
+def irls_line(points: np.ndarray, loss: str = "huber", scale: Optional[float] = None, max_iterations: int = 20,
+              tol: float = 1e-3, weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Robust total least squares line fit with iteratively reweighted least squares.
+    The residuals are the distances between the points and the line.
+    Broadcasts over any leading dimensions.
+
+    Args:
+        points: (..., N, 2) cartesian points.
+        loss: One of ROBUST_LOSSES ("huber", "tukey" or "cauchy").
+        scale: Standard deviation of the inlier distances (estimated from the median if None).
+        max_iterations: Maximum number of reweighting steps.
+        tol: Stop a problem when none of its weights change by more than tol.
+        weights: Optional (..., N) initial weights (default 1).
+
+    Returns:
+        ((..., 3) line coefficients (a, b, c) with a^2 + b^2 = 1, (..., N) final weights)
+    """
+    points, _, weights, lead = _flatten_problems(points, points, weights)
+    if points.shape[1] < 2:
+        raise ValueError(f"Need at least 2 points, not {points.shape[1]}.")
+    coeffs, weights = _irls(lambda idx, w: fit_lines(points[idx], w),
+                            lambda idx, coeffs: line_residuals(coeffs, points[idx]),
+                            weights, 2, loss, scale, max_iterations, tol)
+    return coeffs.reshape(lead + (3,)), weights.reshape(lead + (-1,))
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,128 @@
+from typing import Optional, Tuple
+import numpy as np
+
+
+def _check_points(src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert to float arrays and check that the points correspond.
+
+    Args:
+        src: (..., N, 2) cartesian source points.
+        dst: (..., N, 2) cartesian destination points.
+
+    Returns:
+        The points as float arrays.
+    """
+    src = np.asarray(src, dtype=float)
+    dst = np.asarray(dst, dtype=float)
+    if src.shape[-1] != 2 or src.shape[-2:] != dst.shape[-2:]:
+        raise ValueError(f"Need (..., N, 2) corresponding points, not {src.shape} and {dst.shape}.")
+    return src, dst
+
+
+def affine_least_squares(src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Affine matrices that best map the source points to the destination points
+    in the least squares sense. Each point gives a row [x, y, 1] of the N x 3
+    design matrix A, and A @ X = dst is solved with the QR decomposition of A
+    (R @ X = Q^T @ dst) instead of the normal equations, which square the
+    condition number. Broadcasts over any leading dimensions, so a single
+    source can be fit to a stack of destinations with one QR.
+
+    Args:
+        src: (..., N, 2) cartesian source points, N >= 3 and not collinear.
+        dst: (..., N, 2) cartesian destination points.
+
+    Returns:
+        ((..., 3, 3) affine matrices, (..., N) distances between the mapped source points and dst).
+    """
+    src, dst = _check_points(src, dst)
+    A = np.concatenate([src, np.ones(src.shape[:-1] + (1,))], axis=-1)
+    Q, R = np.linalg.qr(A)
+    X = np.linalg.solve(R, np.swapaxes(Q, -1, -2) @ dst)
+    residuals = np.linalg.norm(A @ X - dst, axis=-1)
+    M = np.zeros(X.shape[:-2] + (3, 3))
+    M[..., :2, :] = np.swapaxes(X, -1, -2)
+    M[..., 2, 2] = 1.0
+    return M, residuals
+
+
+def scale_least_squares(src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scales of [[sx, 0], [0, sy]] that best map the centered source points to
+    the centered destination points. Each axis is independent, so
+    sx = sum(x * u) / sum(x^2) and sy = sum(y * v) / sum(y^2).
+    Broadcasts over any leading dimensions.
+
+    Args:
+        src: (..., N, 2) cartesian source points.
+        dst: (..., N, 2) cartesian destination points.
+
+    Returns:
+        (sx, sy), each with shape (...).
+    """
+    src, dst = _check_points(src, dst)
+    src = src - src.mean(axis=-2, keepdims=True)
+    dst = dst - dst.mean(axis=-2, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scales = (src * dst).sum(axis=-2) / (src * src).sum(axis=-2)
+    return scales[..., 0], scales[..., 1]
+
+
+def shear_least_squares(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Angle of the upper-triangular shear [[1, tan(theta)], [0, 1]] that best
+    maps the centered source points to the centered destination points. With
+    k = tan(theta) only the x coordinates depend on k (u = x + k * y), so
+    the least squares solution is k = sum(y * (u - x)) / sum(y^2).
+    Broadcasts over any leading dimensions.
+
+    Args:
+        src: (..., N, 2) cartesian source points.
+        dst: (..., N, 2) cartesian destination points.
+
+    Returns:
+        (...) shear angles in radians.
+    """
+    src, dst = _check_points(src, dst)
+    src = src - src.mean(axis=-2, keepdims=True)
+    dst = dst - dst.mean(axis=-2, keepdims=True)
+    x, y = src[..., 0], src[..., 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = (y * (dst[..., 0] - x)).sum(axis=-1) / (y * y).sum(axis=-1)
+    return np.arctan(k)
+
+
+def perspective_least_squares(src: np.ndarray, dst: np.ndarray,
+                              weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Perspective values of [[1, 0, 0], [0, 1, 0], [per_x, per_y, 1]] that best map
+    the source points to the destination points. With w = per_x * x + per_y * y + 1,
+    u * w = x and v * w = y are linear in (per_x, per_y), so each point gives two
+    rows of a N*2 x 2 system, solved with the closed form 2x2 normal equations.
+    Broadcasts over any leading dimensions.
+
+    Args:
+        src: (..., N, 2) cartesian source points.
+        dst: (..., N, 2) cartesian destination points.
+        weights: Optional (..., N) weight per point (weighted least squares).
+
+    Returns:
+        (per_x, per_y), each with shape (...).
+    """
+    src, dst = _check_points(src, dst)
+    # Rows are [u * x, u * y] and [v * x, v * y] with right hand sides x - u and y - v.
+    A = dst[..., :, :, None] * src[..., :, None, :]
+    b = src - dst
+    wA = A if weights is None else A * np.asarray(weights, dtype=float)[..., None, None]
+    AtA = np.einsum("...nij,...nik->...jk", wA, A)
+    Atb = np.einsum("...nij,...ni->...j", wA, b)
+    det = AtA[..., 0, 0] * AtA[..., 1, 1] - AtA[..., 0, 1] * AtA[..., 1, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_x = (AtA[..., 1, 1] * Atb[..., 0] - AtA[..., 0, 1] * Atb[..., 1]) / det
+        per_y = (AtA[..., 0, 0] * Atb[..., 1] - AtA[..., 1, 0] * Atb[..., 0]) / det
+    return per_x, per_y
+
+
+if __name__ == "__main__":
+    pass
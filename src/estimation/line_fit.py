@@ -0,0 +1,113 @@
+from typing import Optional
+import numpy as np
+
+
+def line_from_scatter(sxx: np.ndarray, sxy: np.ndarray, syy: np.ndarray,
+                      cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+    """
+    Total least squares line through the centroid from the 2x2 scatter matrix
+    [[sxx, sxy], [sxy, syy]]. The principal eigenvector of a symmetric 2x2
+    matrix has the closed form angle 0.5 * atan2(2 * sxy, sxx - syy), so no
+    eigen solver is needed. The line normal is orthogonal to it.
+    Broadcasts over any shapes.
+
+    Args:
+        sxx: Scatter of x about the centroid.
+        sxy: Scatter of x and y about the centroid.
+        syy: Scatter of y about the centroid.
+        cx: Centroid x.
+        cy: Centroid y.
+
+    Returns:
+        (..., 3) line coefficients (a, b, c) with a^2 + b^2 = 1.
+    """
+    theta = 0.5 * np.arctan2(2.0 * sxy, sxx - syy)
+    a, b = -np.sin(theta), np.cos(theta)
+    return np.stack([a, b, -(a * cx + b * cy)], axis=-1)
+
+
+def fit_lines(points: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    (Weighted) total least squares line of each point set, which minimizes
+    the sum of squared distances between the points and the line.
+    Broadcasts over any leading dimensions.
+
+    Args:
+        points: (..., N, 2) cartesian points.
+        weights: Optional (..., N) weight per point.
+
+    Returns:
+        (..., 3) line coefficients (a, b, c) with a^2 + b^2 = 1.
+    """
+    points = np.asarray(points, dtype=float)
+    if weights is None:
+        weights = np.ones(points.shape[:-1])
+    weights = np.asarray(weights, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        centroid = (weights[..., None] * points).sum(axis=-2) / weights.sum(axis=-1)[..., None]
+    centered = points - centroid[..., None, :]
+    x, y = centered[..., 0], centered[..., 1]
+    sxx = (weights * x * x).sum(axis=-1)
+    sxy = (weights * x * y).sum(axis=-1)
+    syy = (weights * y * y).sum(axis=-1)
+    return line_from_scatter(sxx, sxy, syy, centroid[..., 0], centroid[..., 1])
+
+
+def fit_line_groups(points: np.ndarray, offsets: np.ndarray,
+                    weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    (Weighted) total least squares line of each group of a ragged set of point
+    groups, e.g. all contour fragments of an image. The 2x2 scatter matrices of
+    all groups are summed with one np.add.reduceat over the flat array and
+    solved with the closed form of line_from_scatter. Each group is shifted by
+    its first point before summing, so the scatter does not lose precision
+    to large coordinates.
+
+    Args:
+        points: (N, 2) cartesian points of all groups, one group after the other.
+        offsets: (G + 1,) group boundaries, group g is points[offsets[g]:offsets[g + 1]].
+        weights: Optional (N,) weight per point.
+
+    Returns:
+        (G, 3) line coefficients (a, b, c) with a^2 + b^2 = 1.
+    """
+    points = np.asarray(points, dtype=float)
+    offsets = np.asarray(offsets, dtype=np.intp)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError(f"Need (N, 2) points, not {points.shape}.")
+    counts = np.diff(offsets)
+    if offsets.ndim != 1 or offsets.size < 2 or offsets[0] != 0 or offsets[-1] != points.shape[0]:
+        raise ValueError(f"Need offsets from 0 to {points.shape[0]}, not {offsets}.")
+    if (counts <= 0).any():
+        raise ValueError("Every group needs at least one point.")
+    starts = offsets[:-1]
+    origin = points[starts]
+    x, y = (points - np.repeat(origin, counts, axis=0)).T
+    w = np.ones(points.shape[0]) if weights is None else np.asarray(weights, dtype=float)
+    wx, wy = w * x, w * y
+    sums = np.add.reduceat(np.stack([w, wx, wy, wx * x, wx * y, wy * y], axis=-1), starts, axis=0)
+    n, sx, sy, sxx, sxy, syy = sums.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mx, my = sx / n, sy / n
+    return line_from_scatter(sxx - sx * mx, sxy - sx * my, syy - sy * my,
+                             origin[:, 0] + mx, origin[:, 1] + my)
+
+
+def line_residuals(coeffs: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """
+    Distances between points and lines with normalized coefficients.
+    Broadcasts over any leading dimensions.
+
+    Args:
+        coeffs: (..., 3) line coefficients with a^2 + b^2 = 1.
+        points: (..., N, 2) cartesian points.
+
+    Returns:
+        (..., N) distances.
+    """
+    coeffs = np.asarray(coeffs, dtype=float)
+    return np.abs(points @ coeffs[..., :2, None] + coeffs[..., None, 2:])[..., 0]
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,127 @@
+from typing import Tuple
+import numpy as np
+
+
+def _cross_covariance(src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The two independent terms of the 2x2 cross covariance of centered point
+    sets that the rotation depends on, and the spread of the source points.
+    In 2D these are the sums of the dot and cross products of corresponding
+    points, so no SVD is needed.
+
+    Args:
+        src: (..., N, 2) centered source points.
+        dst: (..., N, 2) centered destination points.
+
+    Returns:
+        (sum of dot products, sum of cross products, sum of squared source norms)
+    """
+    dot = (src * dst).sum(axis=(-2, -1))
+    cross = (src[..., 0] * dst[..., 1] - src[..., 1] * dst[..., 0]).sum(axis=-1)
+    spread = (src * src).sum(axis=(-2, -1))
+    return dot, cross, spread
+
+
+def _centered(src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Subtract the centroid from each point set.
+
+    Args:
+        src: (..., N, 2) cartesian source points.
+        dst: (..., N, 2) cartesian destination points.
+
+    Returns:
+        (centered src, centered dst, (..., 2) src centroids, (..., 2) dst centroids)
+    """
+    src = np.asarray(src, dtype=float)
+    dst = np.asarray(dst, dtype=float)
+    if src.shape[-1] != 2 or src.shape[-2:] != dst.shape[-2:]:
+        raise ValueError(f"Need (..., N, 2) corresponding points, not {src.shape} and {dst.shape}.")
+    src_mean = src.mean(axis=-2)
+    dst_mean = dst.mean(axis=-2)
+    return src - src_mean[..., None, :], dst - dst_mean[..., None, :], src_mean, dst_mean
+
+
+def procrustes_rotation(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Rotation angle that best aligns the centered source points with the
+    centered destination points in the least squares sense (orthogonal
+    Procrustes). Translation between the point sets is ignored.
+    Broadcasts over any leading dimensions.
+
+    Args:
+        src: (..., N, 2) cartesian source points.
+        dst: (..., N, 2) cartesian destination points.
+
+    Returns:
+        (...) rotation angles in radians.
+    """
+    src, dst, _, _ = _centered(src, dst)
+    dot, cross, _ = _cross_covariance(src, dst)
+    return np.arctan2(cross, dot)
+
+
+def procrustes_rigid(src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rigid transform (rotation then translation) that minimizes the sum of
+    squared distances between the transformed source points and the
+    destination points. Broadcasts over any leading dimensions.
+
+    Args:
+        src: (..., N, 2) cartesian source points.
+        dst: (..., N, 2) cartesian destination points.
+
+    Returns:
+        (theta, tx, ty), each with shape (...).
+    """
+    src_c, dst_c, src_mean, dst_mean = _centered(src, dst)
+    dot, cross, _ = _cross_covariance(src_c, dst_c)
+    theta = np.arctan2(cross, dot)
+    tx, ty = _translation(theta, 1.0, src_mean, dst_mean)
+    return theta, tx, ty
+
+
+def umeyama_similarity(src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Similarity transform (uniform scale and rotation then translation) that
+    minimizes the sum of squared distances between the transformed source
+    points and the destination points (Umeyama). Broadcasts over any leading dimensions.
+
+    Args:
+        src: (..., N, 2) cartesian source points.
+        dst: (..., N, 2) cartesian destination points.
+
+    Returns:
+        (scale, theta, tx, ty), each with shape (...).
+    """
+    src_c, dst_c, src_mean, dst_mean = _centered(src, dst)
+    dot, cross, spread = _cross_covariance(src_c, dst_c)
+    theta = np.arctan2(cross, dot)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.hypot(dot, cross) / spread
+    tx, ty = _translation(theta, scale, src_mean, dst_mean)
+    return scale, theta, tx, ty
+
+
+def _translation(theta: np.ndarray, scale: np.ndarray, src_mean: np.ndarray,
+                 dst_mean: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Translation that maps the scaled and rotated source centroid to the destination centroid.
+
+    Args:
+        theta: (...) rotation angles.
+        scale: (...) scales.
+        src_mean: (..., 2) source centroids.
+        dst_mean: (..., 2) destination centroids.
+
+    Returns:
+        (tx, ty), each with shape (...).
+    """
+    cos, sin = scale * np.cos(theta), scale * np.sin(theta)
+    tx = dst_mean[..., 0] - (cos * src_mean[..., 0] - sin * src_mean[..., 1])
+    ty = dst_mean[..., 1] - (sin * src_mean[..., 0] + cos * src_mean[..., 1])
+    return tx, ty
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,509 @@
+from typing import Callable, Dict, Iterator, Optional, Tuple, Type, Union
+import math
+import numpy as np
+from src.transforms import *
+from src.estimation.correspondences import CHUNK_SIZE, ESTIMATORS, estimate_transform
+from src.estimation.homography import DEGENERATE_TOL, quad_min_sin, quad_to_quad
+from src.estimation.least_squares import affine_least_squares
+from src.estimation.line_fit import fit_line_groups, fit_lines
+from src.estimation.procrustes import procrustes_rigid, umeyama_similarity
+
+
+def _translation_hypotheses(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Translations from (H, 1, 2) samples.
+
+    Args:
+        src: (H, 1, 2) sampled source points.
+        dst: (H, 1, 2) sampled destination points.
+
+    Returns:
+        (H, 3, 3) matrices.
+    """
+    t = dst[:, 0] - src[:, 0]
+    return TranslationTransform2D.from_params(t[:, 0], t[:, 1]).Ms
+
+
+def _rigid_hypotheses(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Rigid transforms from (H, 2, 2) samples (see procrustes_rigid).
+
+    Args:
+        src: (H, 2, 2) sampled source points.
+        dst: (H, 2, 2) sampled destination points.
+
+    Returns:
+        (H, 3, 3) matrices.
+    """
+    return RigidTransform2D.from_params(*procrustes_rigid(src, dst)).Ms
+
+
+def _similarity_hypotheses(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Similarity transforms from (H, 2, 2) samples (see umeyama_similarity).
+
+    Args:
+        src: (H, 2, 2) sampled source points.
+        dst: (H, 2, 2) sampled destination points.
+
+    Returns:
+        (H, 3, 3) matrices.
+    """
+    scale, theta, tx, ty = umeyama_similarity(src, dst)
+    return SimilarityTransform2D.from_params(scale, scale, theta, tx, ty).Ms
+
+
+def _affine_hypotheses(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Affine transforms from (H, 3, 2) samples, which are solved exactly.
+
+    Args:
+        src: (H, 3, 2) sampled source points.
+        dst: (H, 3, 2) sampled destination points.
+
+    Returns:
+        (H, 3, 3) matrices.
+    """
+    Ms, _ = affine_least_squares(src, dst)
+    return Ms
+
+
+def _projective_hypotheses(src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Homographies from (H, 4, 2) samples (see quad_to_quad).
+
+    Args:
+        src: (H, 4, 2) sampled source points.
+        dst: (H, 4, 2) sampled destination points.
+
+    Returns:
+        (H, 3, 3) matrices.
+    """
+    return quad_to_quad(src, dst)
+
+
+# Batched minimal solver and sample size for each model.
+MINIMAL_SOLVERS: Dict[Type[TransformBase2D], Tuple[Callable[[np.ndarray, np.ndarray], np.ndarray], int]] = {
+    TranslationTransform2D: (_translation_hypotheses, 1),
+    RigidTransform2D: (_rigid_hypotheses, 2),
+    SimilarityTransform2D: (_similarity_hypotheses, 2),
+    AffineTransform2D: (_affine_hypotheses, 3),
+    ProjectiveTransform2D: (_projective_hypotheses, 4),
+}
+
+
+def sample_indices(rng: np.random.Generator, n: int, k: int, size: int) -> np.ndarray:
+    """
+    Draw size samples of k distinct indices in [0, n) at once. Each index
+    is drawn from the n - m indices that are left and shifted past the
+    ones already in the sample (in ascending order), which is uniform
+    without replacement and needs no rejection loop.
+
+    Args:
+        rng: Random generator.
+        n: Number of points.
+        k: Sample size (k <= n).
+        size: Number of samples.
+
+    Returns:
+        (size, k) indices.
+    """
+    idx = np.empty((size, k), dtype=np.intp)
+    for m in range(k):
+        r = rng.integers(0, n - m, size)
+        for prev in np.sort(idx[:, :m], axis=1).T:
+            r += r >= prev
+        idx[:, m] = r
+    return idx
+
+
+def degenerate_samples(points: np.ndarray, tol: float = DEGENERATE_TOL) -> np.ndarray:
+    """
+    Samples that cannot determine a transform: two points that coincide, or
+    three points that are (almost) collinear, measured by the smallest |sin|
+    of the angles between the points (see quad_min_sin).
+
+    Args:
+        points: (H, k, 2) sampled points, k <= 4.
+        tol: Samples with |sin| (or relative distance for k = 2) below tol are degenerate.
+
+    Returns:
+        (H,) boolean mask.
+    """
+    k = points.shape[1]
+    if k == 1:
+        return np.zeros(points.shape[0], dtype=bool)
+    if k == 2:
+        lengths = np.linalg.norm(points[:, 1] - points[:, 0], axis=-1)
+        extent = np.abs(points).max(axis=(1, 2))
+        return lengths <= tol * np.maximum(extent, 1.0)
+    if k == 3:
+        a, b = points[:, 1] - points[:, 0], points[:, 2] - points[:, 0]
+        cross = a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sin = np.abs(cross) / (np.linalg.norm(a, axis=-1) * np.linalg.norm(b, axis=-1))
+        return ~(sin >= tol)
+    # The four cyclic triples of a quad are all the triples of four points.
+    return quad_min_sin(points) < tol
+
+
+def _residual_chunks(Ms: np.ndarray, src: np.ndarray, dst: np.ndarray,
+                     chunk_size: int) -> Iterator[Tuple[slice, np.ndarray]]:
+    """
+    Yield the squared residuals of chunk_size points at a time, so the
+    (H, chunk_size, 2) projected points are the largest temporaries.
+
+    Args:
+        Ms: (H, 3, 3) transform matrices.
+        src: (N, 2) or (H, N, 2) cartesian source points.
+        dst: (N, 2) or (H, N, 2) cartesian destination points.
+        chunk_size: Number of points per chunk.
+
+    Returns:
+        (slice of the chunk, (H, k) squared residuals of the chunk) pairs.
+    """
+    A, t = np.swapaxes(Ms[:, :2, :2], -1, -2), Ms[:, None, :2, 2]
+    projective = (Ms[:, 2] != (0., 0., 1.)).any()
+    for start in range(0, src.shape[-2], chunk_size):
+        rows = slice(start, start + chunk_size)
+        s = src[..., rows, :]
+        projected = s @ A + t
+        if projective:
+            w = (s @ Ms[:, 2, :2, None])[..., 0] + Ms[:, 2, 2:]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                projected /= w[:, :, None]
+        projected -= dst[..., rows, :]
+        yield rows, np.einsum("hni,hni->hn", projected, projected)
+
+
+def squared_residuals(Ms: np.ndarray, src: np.ndarray, dst: np.ndarray, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Squared distances between each transformed source point and its
+    destination point, for every transform at once. The residual matrix
+    is built chunk_size points at a time.
+
+    Args:
+        Ms: (H, 3, 3) transform matrices.
+        src: (N, 2) cartesian source points, or (H, N, 2) for a point set per transform.
+        dst: (N, 2) or (H, N, 2) cartesian destination points.
+        chunk_size: Number of points per chunk.
+
+    Returns:
+        (H, N) residual matrix. Points mapped to infinity are nan.
+    """
+    residuals = np.empty((Ms.shape[0], src.shape[-2]))
+    for rows, chunk in _residual_chunks(Ms, src, dst, chunk_size):
+        residuals[:, rows] = chunk
+    return residuals
+
+
+def inlier_matrix(Ms: np.ndarray, src: np.ndarray, dst: np.ndarray, threshold: float,
+                  chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """
+    Correspondences whose residual is below the threshold, for every transform
+    at once. Only the (H, N) boolean matrix is kept, and the residuals are
+    computed chunk_size points at a time (see squared_residuals).
+
+    Args:
+        Ms: (H, 3, 3) transform matrices.
+        src: (N, 2) cartesian source points.
+        dst: (N, 2) cartesian destination points.
+        threshold: Maximum distance (in dst units) for an inlier.
+        chunk_size: Number of points per chunk.
+
+    Returns:
+        (H, N) boolean inlier matrix.
+    """
+    threshold_sq = threshold * threshold
+    inliers = np.empty((Ms.shape[0], src.shape[0]), dtype=bool)
+    for rows, chunk in _residual_chunks(Ms, src, dst, chunk_size):
+        np.less(chunk, threshold_sq, out=inliers[:, rows])
+    return inliers
+
+
+def required_iterations(inlier_ratio: float, k: int, confidence: float) -> float:
+    """
+    Number of samples needed to draw at least one all-inlier sample of size k
+    with the given confidence.
+
+    Args:
+        inlier_ratio: Fraction of inliers.
+        k: Sample size.
+        confidence: Probability in (0, 1).
+
+    Returns:
+        Number of iterations (inf if there are no inliers).
+    """
+    p_good = inlier_ratio ** k
+    if p_good >= 1.0:
+        return 1.0
+    if p_good <= 0.0:
+        return math.inf
+    return math.log(1.0 - confidence) / math.log1p(-p_good)
+
+
+def ransac(n: int, k: int, hypotheses: Callable[[np.ndarray], np.ndarray],
+           score: Callable[[np.ndarray], np.ndarray], refit: Callable[[np.ndarray], Optional[np.ndarray]],
+           confidence: float, max_iterations: int, batch_size: int, lo_iterations: int,
+           rng: np.random.Generator, weights: Optional[np.ndarray] = None) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    """
+    The RANSAC loop shared by all models. Minimal samples of k of the n data
+    are drawn batch_size at a time, hypotheses are built from the whole batch
+    at once, and all of them are scored against all data with one (H, n) inlier
+    matrix. The number of iterations adapts to the best support so far, and
+    every new best hypothesis is refit to its inliers while the support does
+    not decrease (local optimization). A refit that loses a single borderline
+    inlier is rejected there, so the best hypothesis may still be a minimal
+    one, and it is refit to its inliers once more before it is returned.
+
+    Args:
+        n: Number of data.
+        k: Sample size.
+        hypotheses: Maps (S, k) sample indices to (H, ...) hypotheses, H <= S
+                    (degenerate samples are dropped).
+        score: Maps (H, ...) hypotheses to the (H, n) boolean inlier matrix.
+        refit: Maps an (n,) inlier mask to the least squares hypothesis
+               of the inliers, or None if there are too few of them.
+        confidence: Probability that an all-inlier sample was drawn before stopping.
+        max_iterations: Maximum number of samples.
+        batch_size: Number of samples drawn at once.
+        lo_iterations: Maximum number of refits of each new best hypothesis.
+        rng: Random generator.
+        weights: Optional (n,) weight of each datum in the support (default is the inlier count).
+
+    Returns:
+        (least squares hypothesis of the inliers or None if every sample was degenerate,
+         (n,) boolean inlier mask)
+    """
+    def support(inliers: np.ndarray) -> np.ndarray:
+        return inliers.sum(axis=-1) if weights is None else inliers @ weights
+
+    total = n if weights is None else float(weights.sum())
+    best, best_mask, best_support = None, np.zeros(n, dtype=bool), -math.inf
+    iterations, needed = 0, float(max_iterations)
+    while iterations < min(needed, max_iterations):
+        size = int(min(batch_size, max_iterations - iterations))
+        iterations += size
+        candidates = hypotheses(sample_indices(rng, n, k, size))
+        if len(candidates) == 0:
+            continue
+        inliers = score(candidates)
+        supports = support(inliers)
+        i = int(np.argmax(supports))
+        if supports[i] <= best_support:
+            continue
+        candidate, mask = candidates[i], inliers[i]
+        for _ in range(lo_iterations):
+            refit_candidate = refit(mask)
+            if refit_candidate is None:
+                break
+            refit_mask = score(refit_candidate[None])[0]
+            if support(refit_mask) < support(mask):
+                break
+            converged = np.array_equal(refit_mask, mask)
+            candidate, mask = refit_candidate, refit_mask
+            if converged:
+                break
+        best, best_mask, best_support = candidate, mask, float(support(mask))
+        needed = required_iterations(best_support / total, k, confidence)
+    if best is not None:
+        final = refit(best_mask)
+        if final is not None:
+            best = final
+    return best, best_mask
+
+
+def ransac_transform(src: np.ndarray, dst: np.ndarray, model: Union[Type[TransformBase2D], TransformBase2D],
+                     threshold: float = 3.0, confidence: float = 0.99, max_iterations: int = 10_000,
+                     batch_size: int = 256, lo_iterations: int = 5, degenerate_tol: float = DEGENERATE_TOL,
+                     rng: Optional[np.random.Generator] = None,
+                     chunk_size: int = CHUNK_SIZE) -> Tuple[TransformBase2D, np.ndarray]:
+    """
+    Robustly estimate the transform between corresponding points with outliers.
+    Minimal samples are drawn batch_size at a time, samples that are degenerate
+    in either point set are dropped, every hypothesis of the batch is solved with
+    a batched minimal solver, and all of them are scored with one (H, N) inlier
+    matrix (built chunk_size points at a time). The number of iterations adapts to the best inlier ratio so far, and
+    every new best hypothesis is refit to its inliers (local optimization, see ransac).
+
+    Args:
+        src: (N, 2) cartesian source points.
+        dst: (N, 2) cartesian destination points.
+        model: The type of transform (a subclass of TransformBase2D or an instance of one).
+        threshold: Maximum distance (in dst units) between a transformed source point and its
+                   destination point for the correspondence to be an inlier.
+        confidence: Probability that an all-inlier sample was drawn before stopping.
+        max_iterations: Maximum number of samples.
+        batch_size: Number of samples solved and scored at once.
+        lo_iterations: Maximum number of least squares refits of each new best hypothesis.
+        degenerate_tol: See degenerate_samples.
+        rng: Random generator (default is a new unseeded generator).
+        chunk_size: Number of points whose residuals are computed at once (see inlier_matrix).
+
+    Returns:
+        (transform with from_origin set to True, (N,) boolean inlier mask)
+    """
+    if isinstance(model, TransformBase2D):
+        model = type(model)
+    if model not in MINIMAL_SOLVERS:
+        raise ValueError(f"No minimal solver for {model.__name__}.")
+    src = np.asarray(src, dtype=float)
+    dst = np.asarray(dst, dtype=float)
+    if src.ndim != 2 or src.shape[1] != 2 or src.shape != dst.shape:
+        raise ValueError(f"Need (N, 2) corresponding points, not {src.shape} and {dst.shape}.")
+    solver, k = MINIMAL_SOLVERS[model]
+    n = src.shape[0]
+    if n < k:
+        raise ValueError(f"{model.__name__} needs at least {k} correspondences, not {n}.")
+    rng = np.random.default_rng() if rng is None else rng
+    min_points = ESTIMATORS[model][1]
+
+    def hypotheses(idx: np.ndarray) -> np.ndarray:
+        src_samples, dst_samples = src[idx], dst[idx]
+        valid = ~(degenerate_samples(src_samples, degenerate_tol) | degenerate_samples(dst_samples, degenerate_tol))
+        if not valid.any():
+            return np.empty((0, 3, 3))
+        return solver(src_samples[valid], dst_samples[valid])
+
+    def refit(mask: np.ndarray) -> Optional[np.ndarray]:
+        if mask.sum() < min_points:
+            return None
+        return estimate_transform(src[mask], dst[mask], model).M
+
+    best_M, best_mask = ransac(n, k, hypotheses, lambda Ms: inlier_matrix(Ms, src, dst, threshold, chunk_size),
+                               refit, confidence, max_iterations, batch_size, lo_iterations, rng)
+    if best_M is None:
+        raise ValueError("Every sample was degenerate.")
+    t = model.from_M(best_M)
+    t.from_origin = True
+    return t, best_mask
+
+
+def line_hypotheses(points: np.ndarray, idx: np.ndarray) -> np.ndarray:
+    """
+    Lines through pairs of points, as the cross products of the homogenous
+    points, normalized so that a^2 + b^2 = 1 (the line through two
+    coinciding points is nan).
+
+    Args:
+        points: (N, 2) cartesian points.
+        idx: (H, 2) indices of the pairs.
+
+    Returns:
+        (H, 3) line coefficients (a, b, c).
+    """
+    p, q = points[idx[:, 0]], points[idx[:, 1]]
+    a, b = p[:, 1] - q[:, 1], q[:, 0] - p[:, 0]
+    lines = np.stack([a, b, p[:, 0] * q[:, 1] - p[:, 1] * q[:, 0]], axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return lines / np.hypot(a, b)[:, None]
+
+
+def _ransac_line(points: np.ndarray, threshold: float, confidence: float, max_iterations: int,
+                 batch_size: int, lo_iterations: int, degenerate_tol: float,
+                 rng: np.random.Generator) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    """
+    See ransac_line.
+
+    Returns:
+        ((3,) line coefficients or None if every sample was degenerate, (N,) boolean inlier mask)
+    """
+    n = points.shape[0]
+    # Distances of all points to all lines of a batch are one (H, 3) x (3, N) product.
+    homogenous_T = np.concatenate([points, np.ones((n, 1))], axis=1).T
+
+    def hypotheses(idx: np.ndarray) -> np.ndarray:
+        return line_hypotheses(points, idx[~degenerate_samples(points[idx], degenerate_tol)])
+
+    def refit(mask: np.ndarray) -> Optional[np.ndarray]:
+        return fit_lines(points[mask]) if mask.sum() >= 2 else None
+
+    return ransac(n, 2, hypotheses, lambda lines: np.abs(lines @ homogenous_T) < threshold, refit,
+                  confidence, max_iterations, batch_size, lo_iterations, rng)
+
+
+def ransac_line(points: np.ndarray, threshold: float = 3.0, confidence: float = 0.99,
+                max_iterations: int = 10_000, batch_size: int = 256, lo_iterations: int = 5,
+                degenerate_tol: float = DEGENERATE_TOL,
+                rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Robustly fit a line to points with outliers. Pairs of points are drawn
+    batch_size at a time, and the lines through them are all scored against
+    all points with one matrix product of the (H, 3) lines and the (3, N)
+    homogenous points. The number of iterations adapts to the best inlier
+    ratio so far, and every new best line is refit to its inliers with
+    total least squares (see fit_lines), as is the returned line.
+
+    Args:
+        points: (N, 2) cartesian points, N >= 2.
+        threshold: Maximum distance between a point and the line for the point to be an inlier.
+        confidence: Probability that an all-inlier sample was drawn before stopping.
+        max_iterations: Maximum number of samples.
+        batch_size: Number of samples scored at once.
+        lo_iterations: Maximum number of least squares refits of each new best line.
+        degenerate_tol: See degenerate_samples.
+        rng: Random generator (default is a new unseeded generator).
+
+    Returns:
+        ((3,) line coefficients (a, b, c) with a^2 + b^2 = 1, (N,) boolean inlier mask)
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2 or points.shape[1] != 2 or points.shape[0] < 2:
+        raise ValueError(f"Need (N, 2) points with N >= 2, not {points.shape}.")
+    rng = np.random.default_rng() if rng is None else rng
+    line, mask = _ransac_line(points, threshold, confidence, max_iterations, batch_size,
+                              lo_iterations, degenerate_tol, rng)
+    if line is None:
+        raise ValueError("Every sample was degenerate.")
+    return line, mask
+
+
+def ransac_lines(points: np.ndarray, max_lines: int = 10, min_inliers: int = 10, threshold: float = 3.0,
+                 confidence: float = 0.99, max_iterations: int = 10_000, batch_size: int = 256,
+                 lo_iterations: int = 5, degenerate_tol: float = DEGENERATE_TOL,
+                 rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Detect several lines in points with clutter. Lines are found one after
+    the other with ransac_line, and the inliers of each line are removed
+    before the next one is searched. At the end, every line is refit to
+    all of its points at once (see fit_line_groups).
+
+    Args:
+        points: (N, 2) cartesian points.
+        max_lines: Maximum number of lines.
+        min_inliers: Stop when the best line has fewer inliers than this.
+        threshold: Maximum distance between a point and a line for the point to belong to it.
+        confidence: See ransac_line.
+        max_iterations: Maximum number of samples per line.
+        batch_size: See ransac_line.
+        lo_iterations: See ransac_line.
+        degenerate_tol: See degenerate_samples.
+        rng: Random generator (default is a new unseeded generator).
+
+    Returns:
+        ((L, 3) line coefficients, (N,) index of the line of each point, -1 for clutter)
+    """
+    points = np.asarray(points, dtype=float)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError(f"Need (N, 2) points, not {points.shape}.")
+    rng = np.random.default_rng() if rng is None else rng
+    labels = np.full(points.shape[0], -1, dtype=np.intp)
+    remaining = np.arange(points.shape[0])
+    num_lines = 0
+    while num_lines < max_lines and remaining.size >= max(min_inliers, 2):
+        line, mask = _ransac_line(points[remaining], threshold, confidence, max_iterations, batch_size,
+                                  lo_iterations, degenerate_tol, rng)
+        if line is None or mask.sum() < min_inliers:
+            break
+        labels[remaining[mask]] = num_lines
+        remaining = remaining[~mask]
+        num_lines += 1
+    if num_lines == 0:
+        return np.empty((0, 3)), labels
+    order = np.argsort(labels, kind="stable")[np.count_nonzero(labels < 0):]
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(labels[order], minlength=num_lines))])
+    return fit_line_groups(points[order], offsets), labels
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,112 @@
+from typing import Tuple
+import numpy as np
+from src.estimation.correspondences import hartley_matrix
+
+
+def _residuals_jacobian(params: np.ndarray, src: np.ndarray,
+                        dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Reprojection residuals of homographies with h22 = 1 and their analytic
+    Jacobian with respect to the other 8 values. With w = h6 * x + h7 * y + 1
+    and u = (h0 * x + h1 * y + h2) / w, du/dh = (x, y, 1, 0, 0, 0, -u * x, -u * y) / w,
+    and likewise for v with (0, 0, 0, x, y, 1, -v * x, -v * y) / w.
+
+    Args:
+        params: (B, 8) homography values (row major, without h22).
+        src: (B, N, 2) cartesian source points.
+        dst: (B, N, 2) cartesian destination points.
+
+    Returns:
+        ((B,) sums of squared residuals, (B, 2N) residuals, (B, 2N, 8) Jacobians)
+    """
+    x, y = src[..., 0], src[..., 1]
+    h = params[:, :, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inv_w = 1.0 / (h[:, 6] * x + h[:, 7] * y + 1.0)
+        u = (h[:, 0] * x + h[:, 1] * y + h[:, 2]) * inv_w
+        v = (h[:, 3] * x + h[:, 4] * y + h[:, 5]) * inv_w
+    r = np.stack([u - dst[..., 0], v - dst[..., 1]], axis=-1)
+    J = np.zeros(src.shape[:2] + (2, 8))
+    xw, yw = x * inv_w, y * inv_w
+    J[..., 0, 0], J[..., 0, 1], J[..., 0, 2] = xw, yw, inv_w
+    J[..., 1, 3], J[..., 1, 4], J[..., 1, 5] = xw, yw, inv_w
+    J[..., 0, 6], J[..., 0, 7] = -u * xw, -u * yw
+    J[..., 1, 6], J[..., 1, 7] = -v * xw, -v * yw
+    r = r.reshape(r.shape[0], -1)
+    cost = np.einsum("bn,bn->b", r, r)
+    return np.where(np.isfinite(cost), cost, np.inf), r, J.reshape(J.shape[0], -1, 8)
+
+
+def refine_homography(H: np.ndarray, src: np.ndarray, dst: np.ndarray, iterations: int = 20,
+                      damping: float = 1e-3, tol: float = 1e-10) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Levenberg-Marquardt refinement of homographies that minimizes the reprojection
+    error sum(|H(src) - dst|^2), which is the geometric error that the DLT
+    (algebraic error) does not minimize. The Jacobian is analytic (see
+    _residuals_jacobian) and every homography of the batch is refined at once,
+    each with its own damping. The points are Hartley normalized for conditioning,
+    which scales the reprojection error uniformly, so the optimum does not change.
+    Pass the homographies of the previous frame as H to warm start.
+    Broadcasts over any leading dimensions.
+
+    Args:
+        H: (..., 3, 3) initial homographies (e.g. from the DLT or the previous frame).
+        src: (..., N, 2) cartesian source points, N >= 4.
+        dst: (..., N, 2) cartesian destination points.
+        iterations: Maximum number of iterations.
+        damping: Initial Levenberg-Marquardt damping.
+        tol: Stop refining a homography when a step reduces its error by less than this fraction.
+
+    Returns:
+        ((..., 3, 3) refined homographies normalized by the bottom right value,
+         (...) sums of squared reprojection errors)
+    """
+    H = np.asarray(H, dtype=float)
+    src = np.asarray(src, dtype=float)
+    dst = np.asarray(dst, dtype=float)
+    if src.shape[-1] != 2 or src.shape[-2:] != dst.shape[-2:]:
+        raise ValueError(f"Need (..., N, 2) corresponding points, not {src.shape} and {dst.shape}.")
+    n = src.shape[-2]
+    if n < 4:
+        raise ValueError(f"A homography needs at least 4 correspondences, not {n}.")
+    lead = np.broadcast_shapes(H.shape[:-2], src.shape[:-2], dst.shape[:-2])
+    H = np.broadcast_to(H, lead + (3, 3)).reshape(-1, 3, 3)
+    src = np.broadcast_to(src, lead + (n, 2)).reshape(-1, n, 2)
+    dst = np.broadcast_to(dst, lead + (n, 2)).reshape(-1, n, 2)
+    T_src, T_dst = hartley_matrix(src), hartley_matrix(dst)
+    src_n = src * T_src[:, None, 0, 0, None] + T_src[:, None, :2, 2]
+    dst_n = dst * T_dst[:, None, 0, 0, None] + T_dst[:, None, :2, 2]
+    H_n = T_dst @ H @ np.linalg.inv(T_src)
+    params = (H_n / H_n[:, 2:, 2:]).reshape(-1, 9)[:, :8].copy()
+    cost, r, J = _residuals_jacobian(params, src_n, dst_n)
+    lam = np.full(params.shape[0], damping)
+    active = np.isfinite(cost)
+    for _ in range(iterations):
+        # Only the homographies that have not converged are stepped.
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+        J_T = np.swapaxes(J[idx], 1, 2)
+        JtJ = J_T @ J[idx]
+        Jtr = (J_T @ r[idx, :, None])[:, :, 0]
+        diag = np.einsum("bii->bi", JtJ) + 1e-12
+        A = JtJ + (lam[idx, None] * diag)[:, :, None] * np.identity(8)
+        step = np.linalg.solve(A, -Jtr[:, :, None])[:, :, 0]
+        new_params = params[idx] + step
+        new_cost, new_r, new_J = _residuals_jacobian(new_params, src_n[idx], dst_n[idx])
+        improved = new_cost < cost[idx]
+        converged = improved & (cost[idx] - new_cost <= tol * cost[idx])
+        better = idx[improved]
+        params[better], r[better], J[better] = new_params[improved], new_r[improved], new_J[improved]
+        cost[better] = new_cost[improved]
+        lam[idx] = np.where(improved, lam[idx] * 0.1, lam[idx] * 10.0)
+        active[idx] = ~converged & (lam[idx] < 1e12)
+    H_n = np.concatenate([params, np.ones((params.shape[0], 1))], axis=1).reshape(-1, 3, 3)
+    H = np.linalg.inv(T_dst) @ H_n @ T_src
+    H = H / H[:, 2:, 2:]
+    cost = cost / T_dst[:, 0, 0] ** 2
+    return H.reshape(lead + (3, 3)), cost.reshape(lead)
+
+
+if __name__ == "__main__":
+    pass
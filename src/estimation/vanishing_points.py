@@ -0,0 +1,141 @@
+from typing import Optional, Tuple
+import numpy as np
+from src.estimation.ransac import ransac
+
+
+def line_conditioning(lines: np.ndarray) -> np.ndarray:
+    """
+    Similarity transform for points that moves the median of the points
+    of the lines closest to the origin to the origin and scales their median
+    distance to 1. Angles between homogenous vectors only make sense when
+    a, b and c have similar magnitudes, which pixel coordinates do not give.
+
+    Args:
+        lines: (N, 3) line coefficients (a, b, c).
+
+    Returns:
+        The 3x3 matrix T for points (lines are mapped by (T^-1)^T).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        feet = -lines[:, 2:] * lines[:, :2] / (lines[:, :2] ** 2).sum(axis=1, keepdims=True)
+    feet = feet[np.isfinite(feet).all(axis=1)]
+    if feet.shape[0] == 0:
+        return np.identity(3)
+    center = np.median(feet, axis=0)
+    scale = np.median(np.linalg.norm(feet - center, axis=1))
+    s = 1.0 / scale if scale > 0.0 else 1.0
+    return np.array([[s, 0.0, -s * center[0]], [0.0, s, -s * center[1]], [0.0, 0.0, 1.0]])
+
+
+def weighted_closest_points(lines: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Point that minimizes the sum of weighted squared (algebraic) distances
+    to the lines, for several weightings of the same lines at once. This is
+    the last right singular vector of A = L^T W L, as in
+    Lines2D.calculate_closest_point, with a batched SVD.
+
+    Args:
+        lines: (N, 3) line coefficients.
+        weights: (K, N) weight per line of each point.
+
+    Returns:
+        (K, 3) unit homogenous points.
+    """
+    A = np.swapaxes(weights[:, :, None] * lines, 1, 2) @ lines
+    _, _, Vt = np.linalg.svd(A)
+    return Vt[:, -1]
+
+
+def _ransac_vanishing_point(unit_lines: np.ndarray, weights: np.ndarray, sin_threshold: float,
+                            confidence: float, max_iterations: int, batch_size: int, lo_iterations: int,
+                            rng: np.random.Generator) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    """
+    See ransac_vanishing_points. The lines are conditioned unit vectors.
+
+    Returns:
+        ((3,) unit homogenous point or None if every pair was parallel, (N,) boolean inlier mask)
+    """
+    def hypotheses(idx: np.ndarray) -> np.ndarray:
+        candidates = np.cross(unit_lines[idx[:, 0]], unit_lines[idx[:, 1]])
+        norms = np.linalg.norm(candidates, axis=1)
+        valid = norms > 1e-12
+        return candidates[valid] / norms[valid, None]
+
+    def score(candidates: np.ndarray) -> np.ndarray:
+        # |l . v| of unit vectors is the sine of the angle between the
+        # point and the great circle of the line on the unit sphere.
+        return np.abs(candidates @ unit_lines.T) < sin_threshold
+
+    def refit(mask: np.ndarray) -> np.ndarray:
+        return weighted_closest_points(unit_lines, (weights * mask)[None])[0]
+
+    return ransac(unit_lines.shape[0], 2, hypotheses, score, refit, confidence, max_iterations,
+                  batch_size, lo_iterations, rng, weights=weights)
+
+
+def ransac_vanishing_points(lines: np.ndarray, weights: Optional[np.ndarray] = None, max_points: int = 3,
+                            min_inliers: int = 10, threshold: float = 0.01, confidence: float = 0.99,
+                            max_iterations: int = 10_000, batch_size: int = 256, lo_iterations: int = 5,
+                            rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Detect the vanishing points of lines with outliers, e.g. the (up to)
+    three vanishing points of a Manhattan world scene. The lines are
+    conditioned (see line_conditioning) and normalized to unit vectors, so
+    lines and points are great circles and points of the unit sphere, and
+    points at infinity need no special case. Candidates are the intersections
+    of pairs of lines drawn batch_size at a time, and every candidate is scored
+    against every line with one (H, 3) x (3, N) product of angular distances.
+    Vanishing points are found one after the other, and the inliers of each
+    point are removed before the next one is searched. At the end, every point
+    is refit to all of its lines with the SVD solve of calculate_closest_point
+    (see weighted_closest_points).
+
+    Args:
+        lines: (N, 3) line coefficients (a, b, c).
+        weights: Optional (N,) weight per line (e.g. segment length), default 1.0 for each line.
+        max_points: Maximum number of vanishing points.
+        min_inliers: Stop when the best point has fewer inlier lines than this.
+        threshold: Maximum angle (in radians, on the unit sphere of the conditioned
+                   lines) between a point and a line for the line to be an inlier.
+        confidence: Probability that an all-inlier pair was drawn before stopping.
+        max_iterations: Maximum number of pairs per point.
+        batch_size: Number of candidates scored at once.
+        lo_iterations: Maximum number of least squares refits of each new best point.
+        rng: Random generator (default is a new unseeded generator).
+
+    Returns:
+        ((K, 3) unit homogenous vanishing points with w >= 0, (N,) index of the point of each line, -1 for outliers)
+    """
+    lines = np.asarray(lines, dtype=float)
+    if lines.ndim != 2 or lines.shape[1] != 3:
+        raise ValueError(f"Need (N, 3) lines, not {lines.shape}.")
+    n = lines.shape[0]
+    weights = np.ones(n) if weights is None else np.asarray(weights, dtype=float)
+    rng = np.random.default_rng() if rng is None else rng
+    T = line_conditioning(lines)
+    conditioned = lines @ np.linalg.inv(T)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        unit_lines = conditioned / np.linalg.norm(conditioned, axis=1, keepdims=True)
+    labels = np.full(n, -1, dtype=np.intp)
+    remaining = np.flatnonzero(np.isfinite(unit_lines).all(axis=1))
+    sin_threshold = np.sin(threshold)
+    num_points = 0
+    while num_points < max_points and remaining.size >= max(min_inliers, 2):
+        point, mask = _ransac_vanishing_point(unit_lines[remaining], weights[remaining], sin_threshold, confidence,
+                                              max_iterations, batch_size, lo_iterations, rng)
+        if point is None or mask.sum() < min_inliers:
+            break
+        labels[remaining[mask]] = num_points
+        remaining = remaining[~mask]
+        num_points += 1
+    if num_points == 0:
+        return np.empty((0, 3)), labels
+    members = (labels == np.arange(num_points)[:, None]) * weights
+    points = weighted_closest_points(np.nan_to_num(unit_lines), members) @ np.linalg.inv(T).T
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    points *= np.where(points[:, 2:] < 0.0, -1.0, 1.0)
+    return points, labels
+
+
+if __name__ == "__main__":
+    pass
@@ -11,6 +11,8 @@ class Line2D:
     with form (x, y, w), or by the coefficients of the line a, b, c. See page 30.
     """
 
+    __slots__ = ("_p1", "_p2", "_a", "_b", "_c")
+
     def __init__(self, points: Optional[tuple[Point2D, Point2D]] = None,
                  coeffs: Optional[tuple[float, float, float]] = None) -> None:
         """
@@ -23,6 +25,25 @@ class Line2D:
             coeffs = np.cross(self._p1.vector, self._p2.vector, axis=0)
             self._a, self._b, self._c = coeffs[0][0], coeffs[1][0], coeffs[2][0]
 
+    @classmethod
+    def _new(cls, a: float, b: float, c: float) -> "Line2D":
+        """
+        Trusted constructor for library-internal callers that
+        already have the coefficients of the line.
+
+        Args:
+            a: Coefficient a
+            b: Coefficient b
+            c: Coefficient c
+
+        Returns:
+            New line object.
+        """
+        line = object.__new__(cls)
+        line._p1, line._p2 = None, None
+        line._a, line._b, line._c = a, b, c
+        return line
+
     def __repr__(self) -> str:
         """
         Use the vector of coefficients to represent the line.
@@ -42,7 +63,7 @@ class Line2D:
         Returns:
             The (3, 1) shape column vector
         """
-        return np.vstack([self._a, self._b, self._c])
+        return np.array([[self._a], [self._b], [self._c]])
 
     @property
     def p1(self) -> Optional[Point2D]:
@@ -195,7 +216,7 @@ class Line2D:
             The intersection point
         """
         intersec = np.cross(self.vector, other.vector, axis=0)
-        return Point2D(intersec[0].item(), intersec[1].item(), intersec[2].item())
+        return Point2D._new(intersec[0].item(), intersec[1].item(), intersec[2].item())
 
     def contains_point(self, point: Point2D) -> bool:
         """
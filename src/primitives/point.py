@@ -11,6 +11,8 @@ class Point2D:
     to the cartesian coordinate, and if w equals 0.0 this is a point at infinity
     which has a direction with no fixed location. See page 30.
     """
+
+    __slots__ = ("_x", "_y", "_w")
     
     def __init__(self, x: float = 0.0, y: float = 0.0, w: float = 1.0) -> None:
         """
@@ -24,6 +26,26 @@ class Point2D:
             logging.warning(" Created a point at infinity.")
         self._w = w
 
+    @classmethod
+    def _new(cls, x: float, y: float, w: float) -> "Point2D":
+        """
+        Trusted constructor for library-internal callers that already
+        have valid float coordinates. Skips the checks in __init__.
+
+        Args:
+            x: The x coordinate
+            y: The y coordinate
+            w: The w coordinate
+
+        Returns:
+            New point object.
+        """
+        point = object.__new__(cls)
+        point._x = x
+        point._y = y
+        point._w = w
+        return point
+
     def __repr__(self) -> str:
         """
         Use the vector / coordinates to represent the point.
@@ -43,7 +65,7 @@ class Point2D:
         Returns:
             The (3, 1) shape column vector
         """
-        return np.vstack([self._x, self._y, self._w])
+        return np.array([[self._x], [self._y], [self._w]])
 
     @property
     def cartesian_vector(self) -> Optional[np.ndarray]:
@@ -143,7 +165,7 @@ class Point2D:
             self._x = new_x
             self._y = new_y
         else:
-            return Point2D(new_x, new_y, self._w)
+            return Point2D._new(new_x, new_y, self._w)
     
     def normalize(self) -> None:
         """
@@ -167,7 +189,7 @@ class Point2D:
             norm_x = self._x / self._w
             norm_y = self._y / self._w
             norm_w = self._w / self._w
-            return Point2D(norm_x, norm_y, norm_w)
+            return Point2D._new(norm_x, norm_y, norm_w)
         else:
             logging.warning(" Point was at infinity, so aborted normalize.")
 
@@ -179,7 +201,7 @@ class Point2D:
             New point object.
         """
         x, y, w = self._x, self._y, self._w
-        return Point2D(x, y, w)
+        return Point2D._new(x, y, w)
     
     def apply_transform(self, M: np.ndarray, inplace: bool = False) -> "Point2D":
         """
@@ -195,13 +217,17 @@ class Point2D:
         Returns:
             Either self or a new Point2D instance.
         """
-        transformed = np.dot(M, self.vector)
-        x, y, w = transformed[0][0].item(), transformed[1][0].item(), transformed[2][0].item()
+        # A 3x3 @ 3x1 product is cheaper with python floats than numpy.
+        (m00, m01, m02), (m10, m11, m12), (m20, m21, m22) = M.tolist()
+        px, py, pw = self._x, self._y, self._w
+        x = m00 * px + m01 * py + m02 * pw
+        y = m10 * px + m11 * py + m12 * pw
+        w = m20 * px + m21 * py + m22 * pw
         if inplace:
             self._x, self._y, self._w = x, y, w
             return self
         else:
-            return Point2D(x, y, w)
+            return Point2D._new(x, y, w)
     
     def __eq__(self, other: "Point2D") -> bool:
         """
@@ -266,7 +292,7 @@ class Point2D:
             x_sum = (self_norm.x + other_norm.x)
             y_sum = (self_norm.y + other_norm.y)
             w_sum = 1.0
-        return Point2D(x_sum, y_sum, w_sum)
+        return Point2D._new(x_sum, y_sum, w_sum)
 
     def __iadd__(self, other: "Point2D") -> "Point2D":
         """
@@ -312,7 +338,7 @@ class Point2D:
             x_diff = self._x - other.x
             y_diff = self._y - other.y
             w_diff = 0.0
-        return Point2D(x_diff, y_diff, w_diff)
+        return Point2D._new(x_diff, y_diff, w_diff)
 
     def __isub__(self, other: "Point2D") -> Optional["Point2D"]:
         """
@@ -352,16 +378,82 @@ class Point2D:
         assert self._w == 1.0
         new_x = self._x / other
         new_y = self._y / other
-        return Point2D(new_x, new_y, self._w)
+        return Point2D._new(new_x, new_y, self._w)
+
+
+class Point2DView(Point2D):
+    """
+    A Point2D that reads and writes x, y, w directly from one row of an
+    (N, 3) array. An array-backed Points2D creates these on demand when it
+    is indexed or iterated, so no per-point objects need to be stored.
+    Changing the view changes the array and vice versa.
+    """
+
+    __slots__ = ("_row",)
+
+    def __init__(self, row: np.ndarray) -> None:
+        """
+        Args:
+            row: A (3,) view into the array that holds the point.
+        """
+        self._row = row
+
+    @property
+    def _x(self) -> float:
+        return self._row[0].item()
+
+    @_x.setter
+    def _x(self, new_x: float) -> None:
+        self._row[0] = new_x
+
+    @property
+    def _y(self) -> float:
+        return self._row[1].item()
+
+    @_y.setter
+    def _y(self, new_y: float) -> None:
+        self._row[1] = new_y
+
+    @property
+    def _w(self) -> float:
+        return self._row[2].item()
+
+    @_w.setter
+    def _w(self, new_w: float) -> None:
+        self._row[2] = new_w
 
 
 class Point3D(Point2D):
 
+    __slots__ = ("_z",)
+
     def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0, w: float = 1.0) -> None:
         super().__init__(x=x, y=y, w=w)
         assert isinstance(z, float), f"Can't have {z.__class__}"
         self._z = z
 
+    @classmethod
+    def _new(cls, x: float, y: float, z: float, w: float) -> "Point3D":
+        """
+        Trusted constructor for library-internal callers that already
+        have valid float coordinates. Skips the checks in __init__.
+
+        Args:
+            x: The x coordinate
+            y: The y coordinate
+            z: The z coordinate
+            w: The w coordinate
+
+        Returns:
+            New point object.
+        """
+        point = object.__new__(cls)
+        point._x = x
+        point._y = y
+        point._z = z
+        point._w = w
+        return point
+
     @property
     def z(self) -> float:
         """
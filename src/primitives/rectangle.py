@@ -4,6 +4,9 @@ import numpy as np
 from src.primitives.point import Point2D
 from src.primitives_lists.points import Points2D
 from src.transforms import *
+from src.estimation.homography import dlt_homography, quad_to_quad_single
+from src.estimation.least_squares import affine_least_squares, perspective_least_squares, shear_least_squares
+from src.estimation.procrustes import procrustes_rigid, procrustes_rotation, umeyama_similarity
 
 
 class Rectangle2D:
@@ -13,6 +16,8 @@ class Rectangle2D:
     transforms and redrawn with lines. Currently, all point w should be the same.
     """
 
+    __slots__ = ("_left_top", "_right_top", "_right_bottom", "_left_bottom")
+
     def __init__(self, left_top: Point2D, right_top: Point2D, right_bottom: Point2D, left_bottom: Point2D) -> None:
         """
         """
@@ -159,6 +164,18 @@ class Rectangle2D:
         """
         return Points2D([self._left_top, self._right_top, self._right_bottom, self._left_bottom])
 
+    @property
+    def cartesian_corners(self) -> list:
+        """
+        Corners in the same order as corners, normalized to
+        cartesian coords, as python floats.
+
+        Returns:
+            Four [x, y] lists.
+        """
+        return [[p.x / p.w, p.y / p.w] for p in (self._left_top, self._right_top,
+                                                  self._right_bottom, self._left_bottom)]
+
     @property
     def center(self) -> Point2D:
         """
@@ -169,7 +186,7 @@ class Rectangle2D:
         Returns:
             Rectangle center point.
         """
-        p_sum: Point2D = Point2D()
+        p_sum: Point2D = Point2D._new(0.0, 0.0, 1.0)
         for p in self.corners:
             p_sum = p_sum + p
         return p_sum / 4
@@ -225,10 +242,13 @@ class Rectangle2D:
         Returns:
             The new transform matrix.
         """
-        cx, cy = self.center.x, self.center.y
-        to_origin = TranslationTransform2D(-cx, -cy)
-        to_center = TranslationTransform2D(cx, cy)
-        return to_center.M @ M @ to_origin.M
+        center = self.center
+        cx, cy = center.x, center.y
+        # Same as TranslationTransform2D(cx, cy).M @ M @ TranslationTransform2D(-cx, -cy).M
+        # without building the translation objects.
+        to_origin = np.array([[1., 0., -cx], [0., 1., -cy], [0., 0., 1.]])
+        to_center = np.array([[1., 0., cx], [0., 1., cy], [0., 0., 1.]])
+        return to_center @ M @ to_origin
     
     def __getitem__(self, corner_index: int) -> Point2D:
         """
@@ -321,7 +341,9 @@ class Rectangle2D:
     
     def calculate_rotationtransform2d(self, other: "Rectangle2D") -> RotationTransform2D:
         """
-        Calculate the rotation transform matrix based on two rectangles.
+        Calculate the rotation transform matrix based on two rectangles. Rectangle
+        may also be translated, but only calculate the rotation that best aligns
+        all four corners around the rectangle centers (see procrustes_rotation).
 
         Args:
             other: The other rectangle.
@@ -329,7 +351,8 @@ class Rectangle2D:
         Returns:
             The rotation transform.
         """
-        raise NotImplementedError
+        theta = procrustes_rotation(np.array(self.cartesian_corners), np.array(other.cartesian_corners))
+        return RotationTransform2D(theta.item())
     
     def calculate_scaletransform2d(self, other: "Rectangle2D") -> ScaleTransform2D:
         """
@@ -348,29 +371,68 @@ class Rectangle2D:
     
     def calculate_perspectivetransform2d(self, other: "Rectangle2D") -> PerspectiveTransform2D:
         """
+        Calculate the pure perspective transform between two rectangles
+        as the least squares fit over all four corners (see perspective_least_squares).
+
+        Args:
+            other: The other rectangle.
+
+        Returns:
+            The perspective transform.
         """
-        raise NotImplementedError
+        per_x, per_y = perspective_least_squares(np.array(self.cartesian_corners), np.array(other.cartesian_corners))
+        return PerspectiveTransform2D(per_x.item(), per_y.item())
     
     def calculate_sheartransform2d(self, other: "Rectangle2D") -> ShearTransform2D:
         """
+        Calculate the shear transform between two rectangles. Rectangle may
+        also be translated, but only calculate the shear that best fits all
+        four corners around the rectangle centers (see shear_least_squares).
+
+        Args:
+            other: The other rectangle.
+
+        Returns:
+            The shear transform.
         """
-        raise NotImplementedError
+        theta = shear_least_squares(np.array(self.cartesian_corners), np.array(other.cartesian_corners))
+        return ShearTransform2D(theta.item())
     
     def calculate_rigidtransform2d(self, other: "Rectangle2D") -> RigidTransform2D:
         """
+        Calculate the rigid transform between two rectangles with the closed
+        form Procrustes solution over all four corners (see procrustes_rigid).
+
+        Args:
+            other: The other rectangle.
+
+        Returns:
+            The rigid transform.
         """
-        raise NotImplementedError
+        theta, tx, ty = procrustes_rigid(np.array(self.cartesian_corners), np.array(other.cartesian_corners))
+        return RigidTransform2D(theta.item(), tx.item(), ty.item())
     
     def calculate_similaritytransform2d(self, other: "Rectangle2D") -> SimilarityTransform2D:
         """
+        Calculate the similarity transform between two rectangles with the closed
+        form Umeyama solution over all four corners (see umeyama_similarity).
+        The scale is uniform, so sx and sy are equal.
+
+        Args:
+            other: The other rectangle.
+
+        Returns:
+            The similarity transform.
         """
-        raise NotImplementedError
+        scale, theta, tx, ty = umeyama_similarity(np.array(self.cartesian_corners), np.array(other.cartesian_corners))
+        scale = scale.item()
+        return SimilarityTransform2D(scale, scale, theta.item(), tx.item(), ty.item())
     
     def calculate_affinetransform2d(self, other: "Rectangle2D") -> AffineTransform2D:
         """
-        Calculate the affine transform between two rectangles. Only use three
-        corresponding points to exactly solve for 6 unknowns. Using all corners
-        will cause system to be overdetermined and will need to fit least squares.
+        Calculate the affine transform between two rectangles. All four
+        corners are used, so the 6 unknowns are overdetermined and are fit
+        with least squares (see affine_least_squares).
 
         Args:
             other: The other rectangle.
@@ -378,18 +440,15 @@ class Rectangle2D:
         Returns:
             The affine transform.
         """
-        self_use_corners: Points2D = self.corners[:3]
-        other_use_corners: Points2D = other.corners[:3]
-        self_arr = self_use_corners.array_form.T
-        other_arr = other_use_corners.array_form.T
-        M = other_arr @ np.linalg.inv(self_arr)
+        M, _ = affine_least_squares(np.array(self.cartesian_corners), np.array(other.cartesian_corners))
         return AffineTransform2D.from_M(M)
     
     def calculate_projectivetransform2d(self, other: "Rectangle2D") -> ProjectiveTransform2D:
         """
         Calculate the projective transform between two rectangles.
-        Use four corresponding points and SVD. Projective transform
-        is defined up to scale, so it is normalized by bottom right value.
+        Use the closed form for four corresponding points (through the
+        unit square), or SVD if either rectangle is near-degenerate. Projective
+        transform is defined up to scale, so it is normalized by bottom right value.
 
         Args:
             other: The other rectangle.
@@ -397,18 +456,13 @@ class Rectangle2D:
         Returns:
             The projective transform.
         """
-        self_arr = self.corners.cartesian_array_form
-        other_arr = other.corners.cartesian_array_form
-        equation_matrix = []
-        for (self_x, self_y), (other_x, other_y) in zip(self_arr, other_arr):
-            equation_matrix.append([-self_x, -self_y, -1, 0, 0, 0, self_x * other_x, self_y * other_x, other_x])
-            equation_matrix.append([0, 0, 0, -self_x, -self_y, -1, self_x * other_y, self_y * other_y, other_y])
-        equation_matrix = np.array(equation_matrix)
-        _, _, Vt = np.linalg.svd(equation_matrix)
-        m = Vt[-1]
-        M = m.reshape(3, 3)
-        # Normalize
-        M = M / M[2, 2]
+        self_quad = self.cartesian_corners
+        other_quad = other.cartesian_corners
+        H = quad_to_quad_single(self_quad, other_quad)
+        if H is None:
+            M = dlt_homography(np.array(self_quad), np.array(other_quad))
+        else:
+            M = np.array(H).reshape(3, 3)
         return ProjectiveTransform2D.from_M(M)
         
 
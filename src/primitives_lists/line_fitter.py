@@ -0,0 +1,339 @@
+from typing import Iterable, Optional, Tuple, Union
+import itertools
+import numpy as np
+from src.primitives.point import Point2D
+from src.primitives.line import Line2D
+from src.primitives_lists.points import Points2D
+from src.estimation.correspondences import CHUNK_SIZE
+from src.estimation.line_fit import line_from_scatter
+
+# Weight, mean x, mean y, sxx, sxy, syy of a set of points.
+Moments = Tuple[float, float, float, float, float, float]
+
+
+class LineFitter2D:
+    """
+    A class that fits a line to a stream of points without keeping the
+    stream. Only the total weight, the running mean and the 2x2 scatter
+    about the mean are kept, and they are updated with Welford's method
+    (Chan's method for a chunk of points), so the memory is constant and
+    the current line is available in O(1) at any time. Optionally, only
+    the last window points are fit (they are kept in a ring buffer, so
+    they can be subtracted again when they leave the window), and the
+    weights of previous points are multiplied by a forgetting factor
+    whenever a point is added (exponential forgetting).
+    """
+
+    def __init__(self, window: Optional[int] = None, forgetting: float = 1.0) -> None:
+        """
+        Args:
+            window: Number of most recent points to fit (default is all points).
+            forgetting: Factor in (0, 1] that the weights of all previous points
+                        are multiplied by when a point is added.
+        """
+        assert window is None or window > 0, f"Window must be positive, not {window}."
+        assert 0.0 < forgetting <= 1.0, f"Forgetting factor must be in (0, 1], not {forgetting}."
+        self._window: Optional[int] = window
+        self._forgetting: float = forgetting
+        # Ring buffer of (x, y, weight when added, index in the stream) of the points in the window.
+        self._ring: Optional[np.ndarray] = None if window is None else np.empty((window, 4))
+        self._head: int = 0
+        self._count: int = 0
+        self._seen: int = 0
+        self._moments: Moments = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+    @property
+    def window(self) -> Optional[int]:
+        """
+        Number of most recent points that are fit.
+
+        Returns:
+            The window size (None for all points)
+        """
+        return self._window
+
+    @property
+    def forgetting(self) -> float:
+        """
+        Factor that previous weights are multiplied by when a point is added.
+
+        Returns:
+            The forgetting factor
+        """
+        return self._forgetting
+
+    @property
+    def num_points(self) -> int:
+        """
+        Number of points that are fit (at most the window size).
+
+        Returns:
+            Number of points
+        """
+        return self._count
+
+    @property
+    def total_weight(self) -> float:
+        """
+        Sum of the effective weights of the points that are fit.
+
+        Returns:
+            The total weight
+        """
+        return self._moments[0]
+
+    @property
+    def centroid(self) -> Optional[np.ndarray]:
+        """
+        Weighted centroid of the points in cartesian space with w equal to 1.
+
+        Returns:
+            Centroid
+        """
+        w, mx, my = self._moments[:3]
+        if w <= 0.0:
+            return None
+        return np.array([mx, my, 1.0])
+
+    def calculate_covariance_matrix(self) -> Optional[np.ndarray]:
+        """
+        Weighted covariance matrix of the cartesian points.
+
+        Returns:
+            A 2x2 matrix
+        """
+        w, _, _, sxx, sxy, syy = self._moments
+        if w <= 0.0:
+            return None
+        return np.array([[sxx, sxy], [sxy, syy]]) / w
+
+    def calculate_fit_line(self) -> Optional[Line2D]:
+        """
+        Calculate the line that minimizes the (weighted) distance to the
+        points that are fit. This only uses the running moments, so it is O(1).
+
+        Returns:
+            The best line (None before any point is added)
+        """
+        w, mx, my, sxx, sxy, syy = self._moments
+        if w <= 0.0:
+            return None
+        a, b, c = line_from_scatter(sxx, sxy, syy, mx, my).tolist()
+        return Line2D._new(a, b, c)
+
+    def append(self, new_point: Union[Point2D, Tuple[float, float]], weight: float = 1.0) -> None:
+        """
+        Add a point with a single Welford update.
+
+        Args:
+            new_point: The new point (a Point2D or cartesian (x, y)).
+            weight: Weight of the new point.
+        """
+        if isinstance(new_point, Point2D):
+            x, y = new_point.x / new_point.w, new_point.y / new_point.w
+        else:
+            x, y = new_point
+        x, y, weight = float(x), float(y), float(weight)
+        self._decay(1)
+        self._seen += 1
+        if self._ring is not None:
+            if self._count == self._window:
+                ox, oy, ow, ot = self._ring[self._head].tolist()
+                self._remove((ow * self._forgetting ** (self._seen - 1 - ot), ox, oy, 0.0, 0.0, 0.0))
+                self._count -= 1
+            self._ring[self._head] = (x, y, weight, self._seen - 1)
+            self._head = (self._head + 1) % self._window
+        self._count += 1
+        self._moments = self._merge(self._moments, (weight, x, y, 0.0, 0.0, 0.0))
+
+    def extend(self, points: Union[np.ndarray, Points2D, Iterable[Union[Point2D, Tuple[float, float]]]],
+               weights: Optional[np.ndarray] = None, chunk_size: int = CHUNK_SIZE) -> None:
+        """
+        Add many points in order. Arrays are added chunk_size points at a time
+        and iterables (e.g. generators) are consumed chunk_size points at a
+        time, so the memory does not grow with the number of points.
+
+        Args:
+            points: (N, 2) cartesian points, (N, 3) homogenous points, a Points2D,
+                    or an iterable of Point2D or (x, y).
+            weights: Optional (N,) weight per point (only for arrays and Points2D).
+            chunk_size: Number of points that are added at once.
+        """
+        if isinstance(points, Points2D):
+            points = points.cartesian_array_form
+            if points is None:
+                return
+        if isinstance(points, np.ndarray):
+            if points.ndim != 2 or points.shape[1] not in (2, 3):
+                raise ValueError(f"Need (N, 2) or (N, 3) array, not {points.shape}.")
+            if points.shape[1] == 3:
+                points = points[:, :2] / points[:, 2:]
+            if weights is None:
+                weights = np.ones(points.shape[0])
+            weights = np.asarray(weights, dtype=float)
+            for start in range(0, points.shape[0], chunk_size):
+                self._extend_array(points[start:start + chunk_size], weights[start:start + chunk_size])
+            return
+        assert weights is None, "Weights are only supported for arrays and Points2D."
+        iterator = iter(points)
+        while True:
+            chunk = list(itertools.islice(iterator, chunk_size))
+            if not chunk:
+                break
+            arr = np.array([(p.x / p.w, p.y / p.w) if isinstance(p, Point2D) else p for p in chunk], dtype=float)
+            self._extend_array(arr, np.ones(arr.shape[0]))
+
+    def recalculate(self) -> None:
+        """
+        Rebuild the moments from the points in the window. Points that leave
+        the window are subtracted from the running moments, so this can be
+        called once in a while to clear accumulated floating point error.
+        Without a window, there is nothing to rebuild from.
+        """
+        if self._ring is None:
+            return
+        start = (self._head - self._count) % self._window
+        self._moments = self._ring_moments(start, self._count)
+
+    def _extend_array(self, points: np.ndarray, weights: np.ndarray) -> None:
+        """
+        Add (k, 2) cartesian points at once, which is the same as appending
+        them one at a time.
+
+        Args:
+            points: (k, 2) cartesian points.
+            weights: (k,) weight per point.
+        """
+        k = points.shape[0]
+        if k == 0:
+            return
+        if self._ring is not None and k >= self._window:
+            # Every point that is fit now comes from this chunk.
+            self._seen += k - self._window
+            points, weights, k = points[-self._window:], weights[-self._window:], self._window
+            self._head, self._count = 0, 0
+            self._moments = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        self._decay(k)
+        times = np.arange(self._seen, self._seen + k, dtype=float)
+        self._seen += k
+        if self._ring is not None:
+            evicted = max(self._count + k - self._window, 0)
+            if evicted:
+                start = (self._head - self._count) % self._window
+                self._remove(self._ring_moments(start, evicted))
+                self._count -= evicted
+            idx = (self._head + np.arange(k)) % self._window
+            self._ring[idx, :2], self._ring[idx, 2], self._ring[idx, 3] = points, weights, times
+            self._head = (self._head + k) % self._window
+        self._count += k
+        self._moments = self._merge(self._moments, self._array_moments(points, weights * self._decay_weights(times)))
+
+    def _decay(self, k: int) -> None:
+        """
+        Multiply the weights of all current points by forgetting ** k,
+        which scales the weight and scatter, but not the mean.
+
+        Args:
+            k: Number of points that are about to be added.
+        """
+        if self._forgetting == 1.0:
+            return
+        f = self._forgetting ** k
+        w, mx, my, sxx, sxy, syy = self._moments
+        self._moments = (w * f, mx, my, sxx * f, sxy * f, syy * f)
+
+    def _decay_weights(self, times: np.ndarray) -> np.ndarray:
+        """
+        Factor that the weight of each point has been multiplied by since it was added.
+
+        Args:
+            times: Index of each point in the stream.
+
+        Returns:
+            The factors
+        """
+        if self._forgetting == 1.0:
+            return np.ones_like(times)
+        return self._forgetting ** (self._seen - 1 - times)
+
+    def _ring_moments(self, start: int, k: int) -> Moments:
+        """
+        Moments of k consecutive points of the ring buffer with their current weights.
+
+        Args:
+            start: Ring index of the first point.
+            k: Number of points.
+
+        Returns:
+            The moments
+        """
+        rows = self._ring[(start + np.arange(k)) % self._window]
+        return self._array_moments(rows[:, :2], rows[:, 2] * self._decay_weights(rows[:, 3]))
+
+    @staticmethod
+    def _array_moments(points: np.ndarray, weights: np.ndarray) -> Moments:
+        """
+        Weight, mean and scatter about the mean of an array of points.
+
+        Args:
+            points: (k, 2) cartesian points.
+            weights: (k,) weight per point.
+
+        Returns:
+            The moments
+        """
+        w = float(weights.sum())
+        if w <= 0.0:
+            return (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        mx, my = (weights @ points / w).tolist()
+        x, y = points[:, 0] - mx, points[:, 1] - my
+        wx = weights * x
+        return (w, mx, my, float(wx @ x), float(wx @ y), float(weights @ (y * y)))
+
+    @staticmethod
+    def _merge(a: Moments, b: Moments) -> Moments:
+        """
+        Moments of the union of two sets of points (Chan et al.). With a
+        single point as b, this is Welford's update.
+
+        Args:
+            a: Moments of the first set.
+            b: Moments of the second set.
+
+        Returns:
+            The moments
+        """
+        wa, wb = a[0], b[0]
+        w = wa + wb
+        if wb <= 0.0:
+            return a
+        if w <= 0.0 or wa <= 0.0:
+            return b
+        dx, dy = b[1] - a[1], b[2] - a[2]
+        r = wb / w
+        f = wa * r
+        return (w, a[1] + r * dx, a[2] + r * dy,
+                a[3] + b[3] + f * dx * dx, a[4] + b[4] + f * dx * dy, a[5] + b[5] + f * dy * dy)
+
+    def _remove(self, b: Moments) -> None:
+        """
+        Subtract the moments of points that leave the window, which
+        inverts _merge.
+
+        Args:
+            b: Moments of the points that leave.
+        """
+        w, mx, my, sxx, sxy, syy = self._moments
+        wa = w - b[0]
+        if wa <= 1e-12 * w:
+            self._moments = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+            return
+        ax, ay = (w * mx - b[0] * b[1]) / wa, (w * my - b[0] * b[2]) / wa
+        dx, dy = b[1] - ax, b[2] - ay
+        f = wa * b[0] / w
+        self._moments = (wa, ax, ay, max(sxx - b[3] - f * dx * dx, 0.0), sxy - b[4] - f * dx * dy,
+                         max(syy - b[5] - f * dy * dy, 0.0))
+
+
+if __name__ == "__main__":
+    pass
@@ -1,30 +1,181 @@
-from typing import Optional, List
+from typing import Optional, List, Union, Iterator, Tuple
 import numpy as np
 from src.primitives.point import Point2D
 from src.primitives.line import Line2D
+from src.primitives_lists.points import Points2D
+from src.estimation.line_fit import fit_line_groups
+from src.estimation.vanishing_points import ransac_vanishing_points
 
 
 class Lines2D:
     """
     A class that holds multiple Line2D objects in instance variable
-    and performs calculations on those lines.
+    and performs calculations on those lines. The sum of weighted outer
+    products of the line vectors (the A matrix) is kept up to date as
+    lines are appended, removed and replaced, so the closest point can be
+    re-solved without summing over every line again. Lines are either
+    stored as a list of Line2D objects, or (when created with from_array)
+    as a single (N, 3) array of coefficients (a, b, c).
     """
 
-    def __init__(self, lines: Optional[List[Line2D]] = None) -> None:
+    def __init__(self, lines: Optional[List[Line2D]] = None, weights: Optional[List[float]] = None,
+                 forgetting: float = 1.0) -> None:
+        """
+        Args:
+            lines: The lines.
+            weights: Optional weight per line (default 1.0 for each line).
+            forgetting: Factor in (0, 1] that the weights of all previous lines
+                        are multiplied by when a line is appended (exponential forgetting).
+        """
+        # Copy, so that changing the caller's list cannot get A out of sync.
         if lines:
-            self._lines: list[Line2D] = lines
+            self._lines: list[Line2D] = list(lines)
         else:
             self._lines: list[Line2D] = []
-    
+        if weights is None:
+            weights = [1.0] * len(self._lines)
+        assert len(weights) == len(self._lines), "Need one weight per line."
+        assert 0.0 < forgetting <= 1.0, f"Forgetting factor must be in (0, 1], not {forgetting}."
+        self._forgetting: float = forgetting
+        # Effective weight of a line is its stored weight multiplied by _weight_scale,
+        # so that forgetting all previous lines is O(1).
+        self._weights: Union[list[float], np.ndarray] = [float(w) for w in weights]
+        self._weight_scale: float = 1.0
+        # Array storage. The buffers may have spare rows at the end
+        # so that appending is amortized O(1).
+        self._buffer: Optional[np.ndarray] = None
+        self._size: int = 0
+        self._A: np.ndarray = self._sum_outer_products()
+
+    @classmethod
+    def from_array(cls, coeffs: np.ndarray, weights: Optional[np.ndarray] = None,
+                   forgetting: float = 1.0, copy: bool = True) -> "Lines2D":
+        """
+        Construct an array backed Lines2D object. The coefficients are
+        copied by default, because A is computed once and would not follow
+        changes made to the caller's array. With copy=False, a C-contiguous
+        float array is used as the storage without copying, and recalculate_A
+        must be called after changing it.
+
+        Args:
+            coeffs: (N, 3) array with the coefficients (a, b, c) of a line per row.
+            weights: Optional (N,) weight per line (default 1.0 for each line).
+            forgetting: Factor in (0, 1] that the weights of all previous lines
+                        are multiplied by when a line is appended.
+            copy: If False, share the memory of coeffs when possible.
+
+        Returns:
+            A Lines2D instance.
+        """
+        if copy:
+            coeffs = np.array(coeffs, dtype=float, order="C")
+        else:
+            coeffs = np.ascontiguousarray(coeffs, dtype=float)
+        if coeffs.ndim != 2 or coeffs.shape[1] != 3:
+            raise ValueError(f"Need (N, 3) array, not {coeffs.shape}.")
+        if weights is None:
+            weights = np.ones(coeffs.shape[0])
+        else:
+            weights = np.array(weights, dtype=float)
+            assert weights.shape == (coeffs.shape[0],), "Need one weight per line."
+        lines = cls(forgetting=forgetting)
+        lines._buffer = coeffs
+        lines._weights = weights
+        lines._size = coeffs.shape[0]
+        lines._A = lines._sum_outer_products()
+        return lines
+
+    @classmethod
+    def from_point_groups(cls, points: Union[np.ndarray, Points2D], offsets: np.ndarray,
+                          weights: Optional[np.ndarray] = None) -> "Lines2D":
+        """
+        Fit a line to each group of a ragged set of point groups at once
+        (see src.estimation.line_fit.fit_line_groups), e.g. the fragments
+        of all contours of an image.
+
+        Args:
+            points: (N, 2) cartesian points or a Points2D with the points of all groups, one group after the other.
+            offsets: (G + 1,) group boundaries, group g is points[offsets[g]:offsets[g + 1]].
+            weights: Optional (N,) weight per point.
+
+        Returns:
+            An array backed Lines2D instance with the G fit lines.
+        """
+        if isinstance(points, Points2D):
+            points = points.cartesian_array_form
+        return cls.from_array(fit_line_groups(points, offsets, weights), copy=False)
+
+    @property
+    def is_array_backed(self) -> bool:
+        """
+        Whether the lines are stored in a single (N, 3) array.
+
+        Returns:
+            True if created with from_array.
+        """
+        return self._buffer is not None
+
     @property
     def lines(self) -> list[Line2D]:
         """
-        All lines belonging to instance
-        
+        All lines belonging to instance. This is a copy of the list,
+        use append, remove and item assignment to change the lines,
+        so that A stays in sync.
+
         Returns:
             The list of lines
         """
-        return self._lines
+        if self._buffer is not None:
+            return [Line2D._new(a, b, c) for a, b, c in self.array_form.tolist()]
+        return list(self._lines)
+
+    @property
+    def array_form(self) -> Optional[np.ndarray]:
+        """
+        Make an array with each row being the coefficients of a line.
+        When array backed, this is a view of the storage (not a copy).
+
+        Returns:
+            nx3 array because (a, b, c) for each line.
+        """
+        if len(self) == 0:
+            return None
+        if self._buffer is not None:
+            return self._buffer[:self._size]
+        return np.array([(l.a, l.b, l.c) for l in self._lines], dtype=float)
+
+    @property
+    def weights(self) -> list[float]:
+        """
+        Effective weight of each line (includes forgetting).
+
+        Returns:
+            The list of weights
+        """
+        if self._buffer is not None:
+            return (self._weights[:self._size] * self._weight_scale).tolist()
+        return [w * self._weight_scale for w in self._weights]
+
+    @property
+    def forgetting(self) -> float:
+        """
+        Factor that previous weights are multiplied by on append.
+
+        Returns:
+            The forgetting factor
+        """
+        return self._forgetting
+
+    @forgetting.setter
+    def forgetting(self, new_forgetting: float) -> None:
+        """
+        Set the forgetting factor.
+
+        Args:
+            new_forgetting: New factor in (0, 1]
+        """
+        assert 0.0 < new_forgetting <= 1.0, f"Forgetting factor must be in (0, 1], not {new_forgetting}."
+        self._forgetting = new_forgetting
 
     def calculate_closest_point(self, verbose: bool = False) -> Optional[Point2D]:
         """
@@ -53,43 +204,287 @@ class Lines2D:
             print(f"Solution point: {solution}\n")
         return solution
 
+    def calculate_vanishing_points(self, max_points: int = 3, min_inliers: int = 10, threshold: float = 0.01,
+                                   confidence: float = 0.99, max_iterations: int = 10_000,
+                                   rng: Optional[np.random.Generator] = None) -> Tuple[Points2D, np.ndarray]:
+        """
+        Calculate the points that several groups of the lines meet in, when
+        some lines belong to no group, e.g. the vanishing points of a scene
+        (see src.estimation.vanishing_points.ransac_vanishing_points).
+        The weights of the lines weight their votes and the refits.
+
+        Args:
+            max_points: Maximum number of points.
+            min_inliers: Minimum number of lines through a point.
+            threshold: Maximum angle (radians) between a point and a line for the line to pass through it.
+            confidence: Probability that an all-inlier pair of lines was drawn before stopping.
+            max_iterations: Maximum number of pairs per point.
+            rng: Random generator.
+
+        Returns:
+            (array backed Points2D with the homogenous points (w is 0 for points at infinity),
+             (N,) index of the point of each line, -1 for lines through none)
+        """
+        L = self.array_form
+        if L is None:
+            return Points2D(), np.empty(0, dtype=np.intp)
+        points, labels = ransac_vanishing_points(L, weights=np.asarray(self.weights), max_points=max_points,
+                                                 min_inliers=min_inliers, threshold=threshold,
+                                                 confidence=confidence, max_iterations=max_iterations, rng=rng)
+        return Points2D.from_array(points), labels
+
     def calculate_A(self, verbose: bool = False) -> np.ndarray:
         """
-        Sum of outer products of each line vector with itself.
+        Sum of (weighted) outer products of each line vector with itself.
+        This is maintained incrementally, so it is O(1).
 
         Returns:
             The 3x3 matrix
         """
-        A: np.ndarray = np.zeros((3, 3))
-        for l in self._lines:
-            A += np.outer(l.vector, l.vector.T)
+        A: np.ndarray = self._A.copy()
         if verbose:
             print(f"A: {A}\n")
         return A
 
-    def append(self, new_line: Line2D) -> None:
+    def recalculate_A(self) -> None:
+        """
+        Rebuild A from all lines. Removing lines subtracts from
+        the running sum, so this can be called once in a while to
+        clear accumulated floating point error.
+        """
+        self._A = self._sum_outer_products()
+
+    def _sum_outer_products(self) -> np.ndarray:
+        """
+        Sum the weighted outer products of all lines as a single
+        matrix product L^T W L of the (N, 3) coefficient array.
+
+        Returns:
+            The 3x3 matrix
+        """
+        L = self.array_form
+        if L is None:
+            return np.zeros((3, 3))
+        w = np.asarray(self._weights[:len(self)], dtype=float) * self._weight_scale
+        return L.T @ (w[:, None] * L)
+
+    @staticmethod
+    def _outer(line: Union[Line2D, np.ndarray]) -> np.ndarray:
         """
-        Append line to line list
+        Outer product of the line vector with itself.
+
+        Args:
+            line: The line or its (3,) coefficients
+
+        Returns:
+            The 3x3 matrix
+        """
+        if isinstance(line, Line2D):
+            line = np.array([line.a, line.b, line.c], dtype=float)
+        return np.outer(line, line)
+
+    def decay(self, factor: float) -> None:
+        """
+        Multiply the weights of all current lines by factor
+        (exponential forgetting). This is O(1).
+
+        Args:
+            factor: Factor in (0, 1]
+        """
+        assert 0.0 < factor <= 1.0, f"Decay factor must be in (0, 1], not {factor}."
+        self._A *= factor
+        self._weight_scale *= factor
+        if self._weight_scale < 1e-100:
+            # Fold the scale into the stored weights before it underflows.
+            if self._buffer is not None:
+                self._weights *= self._weight_scale
+            else:
+                self._weights = self.weights
+            self._weight_scale = 1.0
+
+    def append(self, new_line: Line2D, weight: float = 1.0) -> None:
+        """
+        Append line to line list and add it to A.
 
         Args:
             new_line: The new line to append
+            weight: Weight of the new line
         """
         assert isinstance(new_line, Line2D)
-        self._lines.append(new_line)
+        if self._forgetting != 1.0:
+            self.decay(self._forgetting)
+        if self._buffer is not None:
+            if self._size == self._buffer.shape[0]:
+                # Grow geometrically so appending is amortized O(1).
+                capacity = max(2 * self._size, 8)
+                new_buffer = np.empty((capacity, 3))
+                new_buffer[:self._size] = self._buffer[:self._size]
+                new_weights = np.empty(capacity)
+                new_weights[:self._size] = self._weights[:self._size]
+                self._buffer, self._weights = new_buffer, new_weights
+            self._buffer[self._size] = (new_line.a, new_line.b, new_line.c)
+            self._weights[self._size] = weight / self._weight_scale
+            self._size += 1
+        else:
+            self._lines.append(new_line)
+            self._weights.append(weight / self._weight_scale)
+        self._A += weight * self._outer(new_line)
 
-    def __getitem__(self, idx: int) -> Line2D:
+    def remove(self, idx: int = -1) -> Line2D:
         """
-        Get the line from lines
+        Remove the line at index and subtract it from A.
 
         Args:
             idx: The index
 
         Returns:
-            The line at index
+            The removed line
+        """
+        if self._buffer is not None:
+            idx = range(self._size)[idx]  # Handles negative index and raises IndexError.
+            a, b, c = self._buffer[idx].tolist()
+            line = Line2D._new(a, b, c)
+            weight = self._weights[idx].item() * self._weight_scale
+            self._buffer[idx:self._size - 1] = self._buffer[idx + 1:self._size]
+            self._weights[idx:self._size - 1] = self._weights[idx + 1:self._size]
+            self._size -= 1
+        else:
+            line = self._lines.pop(idx)
+            weight = self._weights.pop(idx) * self._weight_scale
+        self._A -= weight * self._outer(line)
+        return line
+
+    def apply_transform(self, M: np.ndarray, inplace: bool = False,
+                        T_inv_M: Optional[np.ndarray] = None) -> "Lines2D":
+        """
+        Apply the transform that maps points with M to the lines. Lines are
+        co-vectors, so they are mapped by the transposed inverse (M^-1)^T
+        (page 34). All lines are transformed with a single (N, 3) @ (3, 3)
+        product, and A is mapped to (M^-1)^T A M^-1 without summing again.
+
+        Args:
+            M: The transform matrix for points.
+            inplace: If True, change lines of this instance, else return new Lines2D instance.
+            T_inv_M: Optional transposed inverse of M, e.g. from get_T_inv_M of
+                     the transform which caches it. Computed from M if None.
+
+        Returns:
+            Either self or a new Lines2D instance.
+        """
+        if T_inv_M is None:
+            T_inv_M = np.linalg.inv(M).T
+        L = self.array_form
+        if L is None:
+            return self if inplace else Lines2D(forgetting=self._forgetting)
+        transformed = L @ T_inv_M.T
+        if not inplace:
+            return Lines2D.from_array(transformed, weights=np.asarray(self.weights), forgetting=self._forgetting,
+                                      copy=False)
+        if self._buffer is not None:
+            self._buffer[:self._size] = transformed
+        else:
+            self._lines[:] = [Line2D._new(a, b, c) for a, b, c in transformed.tolist()]
+        self._A = T_inv_M @ self._A @ T_inv_M.T
+        return self
+
+    def intersection_matrix(self) -> np.ndarray:
+        """
+        Intersections of every pair of lines as a (N, N, 3) tensor of
+        homogenous points, where [i, j] is the cross product of line i
+        and line j (as in Line2D.intersection_with).
+
+        Returns:
+            The (N, N, 3) array
+        """
+        L = self.array_form
+        if L is None:
+            return np.zeros((0, 0, 3))
+        return np.cross(L[:, None, :], L[None, :, :])
+
+    def pairwise_intersections(self) -> Tuple[np.ndarray, np.ndarray, Points2D]:
+        """
+        Intersections of every unordered pair of lines (i < j), which
+        is the upper triangle of intersection_matrix without the N^2 memory.
+
+        Returns:
+            (index of first line, index of second line, array backed intersection points)
         """
+        L = self.array_form
+        if L is None:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int), Points2D()
+        i, j = np.triu_indices(L.shape[0], k=1)
+        intersections = np.cross(L[i], L[j])
+        return i, j, Points2D.from_array(intersections)
+
+    def __setitem__(self, idx: int, new_line: Line2D) -> None:
+        """
+        Replace the line at index, keeping its weight, and update A.
+
+        Args:
+            idx: The index
+            new_line: The new line
+        """
+        assert isinstance(new_line, Line2D)
+        old_line = self[idx]
+        if self._buffer is not None:
+            weight = self._weights[:self._size][idx].item() * self._weight_scale
+        else:
+            weight = self._weights[idx] * self._weight_scale
+        self._A += weight * (self._outer(new_line) - self._outer(old_line))
+        if self._buffer is not None:
+            self._buffer[:self._size][idx] = (new_line.a, new_line.b, new_line.c)
+        else:
+            self._lines[idx] = new_line
+
+    def __delitem__(self, idx: int) -> None:
+        """
+        Remove the line at index.
+
+        Args:
+            idx: The index
+        """
+        self.remove(idx)
+
+    def __len__(self) -> int:
+        """
+        Get number of lines.
+
+        Returns:
+            Number of lines.
+        """
+        if self._buffer is not None:
+            return self._size
+        return len(self._lines)
+
+    def __getitem__(self, idx: Union[int, slice]) -> Union[Line2D, "Lines2D"]:
+        """
+        Get the line from lines. Can handle slices when array backed.
+
+        Args:
+            idx: The index or slice.
+
+        Returns:
+            The line at index, or Lines2D with the lines at slice.
+        """
+        if self._buffer is not None:
+            if isinstance(idx, slice):
+                return Lines2D.from_array(self._buffer[:self._size][idx],
+                                          weights=np.asarray(self.weights)[idx], forgetting=self._forgetting)
+            a, b, c = self._buffer[:self._size][idx].tolist()
+            return Line2D._new(a, b, c)
         return self._lines[idx]
 
+    def __iter__(self) -> Iterator[Line2D]:
+        """
+        Iterator to iterate the lines.
+
+        Returns:
+            Iterator for Line2D objects.
+        """
+        if self._buffer is not None:
+            return iter(self.lines)
+        return iter(self._lines)
+
 
 if __name__ == "__main__":
     pass
-    
\ No newline at end of file
@@ -1,13 +1,24 @@
-from typing import Optional, List, Union, Iterator
+from typing import Optional, List, Tuple, Type, Union, Iterator
 import numpy as np
-from src.primitives.point import Point2D
+from src.primitives.point import Point2D, Point2DView
 from src.primitives.line import Line2D
+from src.transforms.transform_base import TransformBase2D
+from src.transforms.projective import ProjectiveTransform2D
+from src.estimation.correspondences import CHUNK_SIZE, estimate_transform
+from src.estimation.irls import irls_line, irls_transform
+from src.estimation.line_fit import line_from_scatter
+from src.estimation.ransac import ransac_lines, ransac_transform
+from src.estimation.refine import refine_homography
 
 
 class Points2D:
     """
     A class that holds multiple Point2D objects and
-    performs calculations on those points.
+    performs calculations on those points. Points are either
+    stored as a list of Point2D objects, or (when created with
+    from_array) as a single contiguous (N, 3) array. In the array
+    storage mode, Point2DView objects are only created when indexing
+    or iterating, so large point clouds avoid per-point overhead.
     """
 
     def __init__(self, points: Optional[List[Point2D]] = None) -> None:
@@ -15,26 +26,76 @@ class Points2D:
             self._points: List[Point2D] = points
         else:
             self._points: List[Point2D] = []
-    
+        # Array storage. The buffer may have spare rows at the end
+        # so that appending is amortized O(1).
+        self._buffer: Optional[np.ndarray] = None
+        self._size: int = 0
+
+    @classmethod
+    def from_array(cls, arr: np.ndarray, copy: bool = False) -> "Points2D":
+        """
+        Construct an array backed Points2D object. An (N, 3) floating
+        point array that is C-contiguous is used as the storage without
+        copying, so changes to the points are reflected in arr.
+
+        Args:
+            arr: (N, 3) homogenous or (N, 2) cartesian points, one per row.
+            copy: If True, always copy arr instead of sharing its memory.
+
+        Returns:
+            A Points2D instance.
+        """
+        arr = np.asarray(arr)
+        if arr.ndim != 2 or arr.shape[1] not in (2, 3):
+            raise ValueError(f"Need (N, 2) or (N, 3) array, not {arr.shape}.")
+        dtype = arr.dtype if np.issubdtype(arr.dtype, np.floating) else np.dtype(float)
+        if arr.shape[1] == 2:
+            buffer = np.empty((arr.shape[0], 3), dtype=dtype)
+            buffer[:, :2] = arr
+            buffer[:, 2] = 1.0
+        else:
+            buffer = np.ascontiguousarray(arr, dtype=dtype)
+            if copy and np.may_share_memory(buffer, arr):
+                buffer = buffer.copy()
+        points = cls()
+        points._buffer = buffer
+        points._size = buffer.shape[0]
+        return points
+
+    @property
+    def is_array_backed(self) -> bool:
+        """
+        Whether the points are stored in a single (N, 3) array.
+
+        Returns:
+            True if created with from_array.
+        """
+        return self._buffer is not None
+
     @property
     def points(self) -> List[Point2D]:
         """
-        All points belonging to instance.
+        All points belonging to instance. When array backed, the
+        points are views into the array.
         
         Returns:
             The list of points
         """
+        if self._buffer is not None:
+            return [Point2DView(row) for row in self._buffer[:self._size]]
         return self._points
     
     @points.setter
     def points(self, new_points: List[Point2D]) -> None:
         """
-        Set new points.
+        Set new points. This switches to list storage.
 
         Args:
             new_points: The new points
         """
         self._points = new_points
+        self._buffer = None
+        self._size = 0
 
     def __repr__(self) -> str:
         """
@@ -43,7 +104,7 @@ class Points2D:
         Returns:
             The points
         """
-        return f"Points2D({self._points})"
+        return f"Points2D({self.points})"
     
     @property
     def num_points(self) -> int:
@@ -53,21 +114,25 @@ class Points2D:
         Returns:
             Number of points
         """
+        if self._buffer is not None:
+            return self._size
         return len(self._points)
     
     @property
     def array_form(self) -> Optional[np.ndarray]:
         """
         Make an array with each row being a point. This
-        makes calculations easier with numpy.
+        makes calculations easier with numpy. When array
+        backed, this is a view of the storage (not a copy).
         
         Returns:
             nx3 array because (x, y, w) for each point.
         """
-        if self.num_points > 0:
-            return np.vstack([p.vector.T for p in self._points])
-        else:
+        if self.num_points == 0:
             return None
+        if self._buffer is not None:
+            return self._buffer[:self._size]
+        return np.array([(p.x, p.y, p.w) for p in self._points], dtype=float)
     
     @property
     def cartesian_array_form(self) -> Optional[np.ndarray]:
@@ -78,10 +143,10 @@ class Points2D:
         Returns:
             nx2 array because (x, y) for each point.
         """
-        if self.num_points > 0:
-            return np.vstack([p.cartesian_vector.T for p in self._points])
-        else:
+        arr = self.array_form
+        if arr is None:
             return None
+        return arr[:, :2] / arr[:, 2:]
     
     @property
     def centroid(self) -> Optional[np.ndarray]:
@@ -92,10 +157,10 @@ class Points2D:
         Returns:
             Centroid
         """
-        if self.num_points > 0:
-            return np.mean(self.array_form, axis=0)
-        else:
+        arr = self.array_form
+        if arr is None:
             return None
+        return np.mean(arr, axis=0)
     
     def append(self, new_point: Point2D) -> None:
         """
@@ -105,11 +170,22 @@ class Points2D:
             new_point: The new point to append
         """
         assert isinstance(new_point, Point2D)
-        self._points.append(new_point)
+        if self._buffer is None:
+            self._points.append(new_point)
+            return
+        if self._size == self._buffer.shape[0]:
+            # Grow geometrically so appending is amortized O(1).
+            new_buffer = np.empty((max(2 * self._size, 8), 3), dtype=self._buffer.dtype)
+            new_buffer[:self._size] = self._buffer[:self._size]
+            self._buffer = new_buffer
+        self._buffer[self._size] = (new_point.x, new_point.y, new_point.w)
+        self._size += 1
 
     def calculate_fit_line(self, verbose: bool = False) -> Line2D:
         """
         Calculate the line that minimizes the distance to all points.
+        The principal direction of the 2x2 scatter matrix has a closed
+        form (see src.estimation.line_fit.line_from_scatter).
 
         Args:
             verbose: Whether to print values.
@@ -117,29 +193,62 @@ class Points2D:
         Returns:
             The best line
         """
-        cov_mat: np.ndarray = self.calculate_covariance_matrix(verbose=verbose)
-        # Get all eigenvalues and eigenvectors
-        eigvals, eigvecs = np.linalg.eig(cov_mat)
-        # Get largest eigenvector
-        max_eigval_idx = np.argmax(eigvals)
-        principal_direction = eigvecs[:, max_eigval_idx]
-        dx, dy, _ = principal_direction
-        # Get the orthogonal vector
-        normal_vector = np.array([-dy, dx])
-        # Get point on line (centroid)
-        a, b = normal_vector
-        c = -a * self.centroid[0] - b * self.centroid[1]
-        fit_line = Line2D(coeffs=(float(a), float(b), float(c)))
+        arr = self.array_form
+        centroid = np.mean(arr, axis=0)
+        cov_mat: np.ndarray = self._covariance_matrix(arr, centroid, verbose=verbose)
+        coeffs = line_from_scatter(cov_mat[0, 0], cov_mat[0, 1], cov_mat[1, 1], centroid[0], centroid[1])
+        a, b, c = coeffs.tolist()
+        fit_line = Line2D(coeffs=(a, b, c))
         if verbose:
-            print(f"eigvals: {eigvals}\n")
-            print(f"eigvecs: {eigvecs}\n")
-            print(f"max_eigval_idx: {max_eigval_idx}\n")
-            print(f"principal_direction: {principal_direction}\n")
-            print(f"dx, dy: {dx}, {dy}\n")
-            print(f"normal_vector: {normal_vector}\n")
+            print(f"normal_vector: {coeffs[:2]}\n")
             print(f"fit_line: {fit_line}\n")
         return fit_line
     
+    def calculate_robust_fit_line(self, loss: str = "huber", scale: Optional[float] = None,
+                                  max_iterations: int = 20) -> Tuple[Line2D, np.ndarray]:
+        """
+        Calculate the line that minimizes a robust loss of the distances to the
+        points, so a few bad points do not ruin the fit (see src.estimation.irls.irls_line).
+
+        Args:
+            loss: "huber", "tukey" or "cauchy".
+            scale: Standard deviation of the inlier distances (estimated from the median if None).
+            max_iterations: Maximum number of reweighting steps.
+
+        Returns:
+            (the best line, (N,) final weight of each point)
+        """
+        coeffs, weights = irls_line(self.cartesian_array_form, loss=loss, scale=scale,
+                                    max_iterations=max_iterations)
+        a, b, c = coeffs.tolist()
+        return Line2D(coeffs=(a, b, c)), weights
+
+    def detect_lines_ransac(self, max_lines: int = 10, min_inliers: int = 10, threshold: float = 3.0,
+                            confidence: float = 0.99, max_iterations: int = 10_000,
+                            rng: Optional[np.random.Generator] = None) -> Tuple["Lines2D", np.ndarray]:
+        """
+        Detect the lines among the points when they lie on several lines
+        plus clutter (see src.estimation.ransac.ransac_lines).
+
+        Args:
+            max_lines: Maximum number of lines.
+            min_inliers: Minimum number of points on a line.
+            threshold: Maximum distance between a point and a line for the point to belong to it.
+            confidence: Probability that an all-inlier sample was drawn before stopping.
+            max_iterations: Maximum number of samples per line.
+            rng: Random generator.
+
+        Returns:
+            (array backed Lines2D with the lines, (N,) index of the line of each point, -1 for clutter)
+        """
+        from src.primitives_lists.lines import Lines2D
+        if self.num_points == 0:
+            return Lines2D(), np.empty(0, dtype=np.intp)
+        coeffs, labels = ransac_lines(self.cartesian_array_form, max_lines=max_lines, min_inliers=min_inliers,
+                                      threshold=threshold, confidence=confidence,
+                                      max_iterations=max_iterations, rng=rng)
+        return Lines2D.from_array(coeffs, copy=False), labels
+
     def calculate_covariance_matrix(self, verbose: bool = False) -> np.ndarray:
         """
         Calculate the covariance matrix of all points.
@@ -150,38 +259,191 @@ class Points2D:
         Returns:
             A 3x3 matrix
         """
-        centered_points: np.ndarray = self.array_form - self.centroid
-        cov_mat = np.cov(centered_points.T, bias=True)
+        arr = self.array_form
+        return self._covariance_matrix(arr, np.mean(arr, axis=0), verbose=verbose)
+
+    @staticmethod
+    def _covariance_matrix(arr: np.ndarray, centroid: np.ndarray, verbose: bool = False) -> np.ndarray:
+        """
+        Covariance matrix of points about their already computed centroid,
+        so the points array is only built once.
+
+        Args:
+            arr: nx3 array of the points.
+            centroid: The centroid of the points.
+            verbose: Whether to print the values.
+
+        Returns:
+            A 3x3 matrix
+        """
+        centered_points: np.ndarray = arr - centroid
+        cov_mat = centered_points.T @ centered_points / centered_points.shape[0]
         if verbose:
-            print(f"centroid: {self.centroid}\n")
+            print(f"centroid: {centroid}\n")
             print(f"centered_points: {centered_points}\n")
             print(f"cov_mat: {cov_mat}\n")
         return cov_mat
     
-    def apply_transform(self, M: np.ndarray, inplace: bool = False) -> "Points2D":
+    def apply_transform(self, M: np.ndarray, inplace: bool = False, out: Optional[np.ndarray] = None,
+                        dtype: Optional[np.dtype] = None) -> "Points2D":
         """
         Apply the transform to the points. Use the M property
-        which contains the numpy array matrix.
+        which contains the numpy array matrix. All points are
+        transformed at once with a single (N, 3) @ (3, 3) product.
 
         Args:
             M: The transform matrix.
             inplace: If True, change points of this instance, else return new Points2D instance.
                      * Be careful when True because it can lead to a compounding effect when
                      multiple transformations are applied to the same points inadvertently. *
+            out: Optional (N, 3) array to write the transformed points into. Passing
+                 the array_form of an array backed instance updates it in-place without
+                 allocating. When not inplace, the returned Points2D uses out as storage.
+                 Otherwise, the returned Points2D has the same storage mode as this one.
+            dtype: Optional dtype to compute in, e.g. np.float32 to halve memory traffic.
 
         Returns:
             Either self or a new Points2D instance.
         """
-        transformed_points: List[Point2D] = []
-        for p in self._points:
-            transformed_point = p.apply_transform(M, inplace=inplace)
-            transformed_points.append(transformed_point)
-        if inplace:
-            self._points = transformed_points
-            return self
+        arr = self.array_form
+        if arr is None:
+            return self if inplace else Points2D()
+        if dtype is not None:
+            arr = arr.astype(dtype, copy=False)
+        M_T = np.asarray(M, dtype=arr.dtype).T
+        if out is None and inplace and self._buffer is not None and arr.dtype == self._buffer.dtype:
+            # Same dtype as the storage, so write straight back into it.
+            out = arr
+        if out is not None:
+            if out.shape != arr.shape:
+                raise ValueError(f"out must have shape {arr.shape}, not {out.shape}.")
+            transformed = np.matmul(arr, M_T, out=out)
+        else:
+            transformed = arr @ M_T
+        if not inplace:
+            if self._buffer is None and out is None:
+                # Keep the storage mode, so the list of points of the result can be changed.
+                return Points2D([Point2D._new(x, y, w) for x, y, w in transformed.tolist()])
+            return Points2D.from_array(transformed)
+        if self._buffer is not None:
+            if transformed.dtype == self._buffer.dtype:
+                if not np.may_share_memory(transformed, self._buffer):
+                    self._buffer[:self._size] = transformed
+            else:
+                # Computed in a different dtype, so keep that as the storage.
+                self._buffer = np.ascontiguousarray(transformed)
+                self._size = transformed.shape[0]
         else:
-            return Points2D(transformed_points)
+            for p, (x, y, w) in zip(self._points, transformed.tolist()):
+                p.x, p.y, p.w = x, y, w
+        return self
     
+    def estimate_transform(self, other: "Points2D", model: Union[Type[TransformBase2D], TransformBase2D],
+                           chunk_size: int = CHUNK_SIZE) -> TransformBase2D:
+        """
+        Estimate the transform that maps these points to the corresponding
+        points of other (same index) in the least squares sense. Works for
+        any number of correspondences: the projective model uses the Hartley
+        normalized DLT and the linear models accumulate their normal equations
+        chunk by chunk (see src.estimation.correspondences).
+
+        Args:
+            other: The corresponding points.
+            model: The type of transform (a subclass of TransformBase2D or an instance of one).
+            chunk_size: Number of points accumulated at a time.
+
+        Returns:
+            The transform with from_origin set to True.
+        """
+        if self.num_points != other.num_points:
+            raise ValueError(f"Need the same number of points, not {self.num_points} and {other.num_points}.")
+        if self.num_points == 0:
+            raise ValueError("Need at least one correspondence.")
+        return estimate_transform(self.cartesian_array_form, other.cartesian_array_form, model, chunk_size=chunk_size)
+
+    def estimate_transform_ransac(self, other: "Points2D", model: Union[Type[TransformBase2D], TransformBase2D],
+                                  threshold: float = 3.0, confidence: float = 0.99, max_iterations: int = 10_000,
+                                  rng: Optional[np.random.Generator] = None) -> Tuple[TransformBase2D, np.ndarray]:
+        """
+        Estimate the transform that maps these points to the corresponding
+        points of other (same index) when some correspondences are outliers
+        (see src.estimation.ransac.ransac_transform).
+
+        Args:
+            other: The corresponding points.
+            model: The type of transform (a subclass of TransformBase2D or an instance of one).
+            threshold: Maximum distance between a transformed point and its
+                       corresponding point for the pair to be an inlier.
+            confidence: Probability that an all-inlier sample was drawn before stopping.
+            max_iterations: Maximum number of samples.
+            rng: Random generator.
+
+        Returns:
+            (transform with from_origin set to True, (N,) boolean inlier mask)
+        """
+        if self.num_points != other.num_points:
+            raise ValueError(f"Need the same number of points, not {self.num_points} and {other.num_points}.")
+        if self.num_points == 0:
+            raise ValueError("Need at least one correspondence.")
+        return ransac_transform(self.cartesian_array_form, other.cartesian_array_form, model, threshold=threshold,
+                                confidence=confidence, max_iterations=max_iterations, rng=rng)
+
+    def estimate_transform_robust(self, other: "Points2D", model: Union[Type[TransformBase2D], TransformBase2D],
+                                  loss: str = "huber", scale: Optional[float] = None,
+                                  max_iterations: int = 20) -> Tuple[TransformBase2D, np.ndarray]:
+        """
+        Estimate the transform that maps these points to the corresponding
+        points of other (same index) with iteratively reweighted least squares,
+        for mild outliers where RANSAC is not needed (see src.estimation.irls.irls_transform).
+
+        Args:
+            other: The corresponding points.
+            model: The type of transform (a subclass of TransformBase2D or an instance of one).
+            loss: "huber", "tukey" or "cauchy".
+            scale: Standard deviation of each coordinate of the inlier residuals
+                   (estimated from the median distance if None).
+            max_iterations: Maximum number of reweighting steps.
+
+        Returns:
+            (transform with from_origin set to True, (N,) final weight of each correspondence)
+        """
+        if self.num_points != other.num_points:
+            raise ValueError(f"Need the same number of points, not {self.num_points} and {other.num_points}.")
+        if self.num_points == 0:
+            raise ValueError("Need at least one correspondence.")
+        M, weights = irls_transform(self.cartesian_array_form, other.cartesian_array_form, model, loss=loss,
+                                    scale=scale, max_iterations=max_iterations)
+        if isinstance(model, TransformBase2D):
+            model = type(model)
+        t = model.from_M(M)
+        t.from_origin = True
+        return t, weights
+
+    def refine_homography(self, other: "Points2D", transform: TransformBase2D,
+                          iterations: int = 20) -> ProjectiveTransform2D:
+        """
+        Refine a homography so it minimizes the reprojection error between
+        these points and the corresponding points of other (see
+        src.estimation.refine.refine_homography).
+
+        Args:
+            other: The corresponding points (at least 4).
+            transform: Initial transform, e.g. from estimate_transform or the previous frame.
+            iterations: Maximum number of Levenberg-Marquardt iterations.
+
+        Returns:
+            The refined projective transform with from_origin set to True.
+        """
+        if self.num_points != other.num_points:
+            raise ValueError(f"Need the same number of points, not {self.num_points} and {other.num_points}.")
+        if self.num_points == 0:
+            raise ValueError("Need at least one correspondence.")
+        H, _ = refine_homography(transform.M, self.cartesian_array_form, other.cartesian_array_form,
+                                 iterations=iterations)
+        t = ProjectiveTransform2D.from_M(H)
+        t.from_origin = True
+        return t
+
     def __eq__(self, other: "Points2D") -> bool:
         """
         Check whether list of points are equal.
@@ -196,8 +458,8 @@ class Points2D:
         Returns:
             True if all points are equal, else False.
         """
-        self_points = [p.normalized() for p in self._points]
-        other_points = [p.normalized() for p in other.points]
+        self_points = [p.normalized() for p in self]
+        other_points = [p.normalized() for p in other]
         return set(self_points) == set(other_points)
     
     def __sub__(self, other: Point2D) -> Optional["Points2D"]:
@@ -212,6 +474,8 @@ class Points2D:
             A new object with other subtracted
         """
         if isinstance(other, Point2D):
+            if self._buffer is not None:
+                return Points2D.from_array(self._subtracted_array(other))
             p_diffs = []
             for p in self._points:
                 p_diff = p - other
@@ -233,15 +497,38 @@ class Points2D:
             The same object with other subtracted
         """
         if isinstance(other, Point2D):
+            if self._buffer is not None:
+                self._buffer[:self._size] = self._subtracted_array(other)
+                return self
             for p in self._points:
                 p -= other
             return self
         else:
             raise TypeError(f"Cannot subtract {other.__class__} object from Point2D object.")
+
+    def _subtracted_array(self, other: Point2D) -> np.ndarray:
+        """
+        Vectorized version of Point2D.__sub__ for array storage. For
+        point - point both w must be 1.0, in which case subtracting
+        w also gives the expected w of 0.0 for the vector.
+
+        Args:
+            other: The point to subtract from every row.
+
+        Returns:
+            New (N, 3) array of differences.
+        """
+        arr = self.array_form
+        if other.w != 0.0:
+            finite = arr[:, 2] != 0.0
+            assert not finite.any() or (other.w == 1.0 and np.all(arr[finite, 2] == 1.0)), "Not implemented yet."
+        return arr - np.array([other.x, other.y, other.w], dtype=arr.dtype)
     
     def __getitem__(self, idx: Union[int, slice]) -> Union[Point2D, "Points2D"]:
         """
-        Get the point from points. Can handle slices.
+        Get the point from points. Can handle slices. When array backed,
+        a point is a view into the array, but a slice is always a copy
+        (for any step), like a slice of the list of points.
 
         Args:
             idx: The index or slice.
@@ -249,12 +536,16 @@ class Points2D:
         Returns:
             The Point2D or Points2D with Point2D objects at index.
         """
-        if isinstance(idx, int):
+        if self._buffer is not None:
+            if isinstance(idx, (int, np.integer)):
+                return Point2DView(self._buffer[:self._size][idx])
+            elif isinstance(idx, slice):
+                return Points2D.from_array(self._buffer[:self._size][idx], copy=True)
+        elif isinstance(idx, int):
             return self._points[idx]
         elif isinstance(idx, slice):
             return Points2D(self._points[idx])
-        else:
-            raise TypeError(f"Need int or slice, not {type(idx)}.")
+        raise TypeError(f"Need int or slice, not {type(idx)}.")
     
     def __iter__(self) -> Iterator[Point2D]:
         """
@@ -264,6 +555,8 @@ class Points2D:
         Returns:
             Iterator for Point2D objects.
         """
+        if self._buffer is not None:
+            return (Point2DView(row) for row in self._buffer[:self._size])
         return iter(self._points)
 
 
@@ -1,8 +1,11 @@
-from typing import Optional, List, Union
+from typing import Optional, List, Tuple, Union
 import numpy as np
 from src.primitives.point import Point2D
 from src.primitives.rectangle import Rectangle2D
 from src.transforms import *
+from src.estimation.homography import quad_to_quad
+from src.estimation.least_squares import affine_least_squares, perspective_least_squares, shear_least_squares
+from src.estimation.procrustes import procrustes_rigid, procrustes_rotation, umeyama_similarity
 
 
 class Rectangles2D:
@@ -59,6 +62,67 @@ class Rectangles2D:
             new_rect: The rectangle to append
         """
         self._rectangles.append(new_rect)
+
+    @property
+    def corners_array(self) -> np.ndarray:
+        """
+        The corners of all rectangles (left top, right top,
+        right bottom, left bottom) as homogenous points.
+
+        Returns:
+            (R, 4, 3) array
+        """
+        coords = [(p.x, p.y, p.w) for rect in self._rectangles for p in rect.corners]
+        return np.array(coords, dtype=float).reshape(len(self._rectangles), 4, 3)
+
+    @property
+    def cartesian_corners_array(self) -> np.ndarray:
+        """
+        The corners of all rectangles normalized to cartesian coords.
+
+        Returns:
+            (R, 4, 2) array
+        """
+        corners = self.corners_array
+        return corners[:, :, :2] / corners[:, :, 2:]
+
+    def apply_transform(self, transform: TransformBase2D, inplace: bool = False) -> "Rectangles2D":
+        """
+        Apply the transform to all rectangles at once, like Rectangle2D.apply_transform
+        for each rectangle. If the transform is not from_origin, each rectangle is
+        transformed around its own center: the corners are translated by the center,
+        transformed by M, and translated back, all as array operations.
+
+        Args:
+            transform: The transform object (usually a subclass of TransformBase2D).
+            inplace: If True change the rectangles, else return new Rectangles2D instance.
+
+        Returns:
+            Either self or new Rectangles2D instance.
+        """
+        if len(self._rectangles) == 0:
+            return self if inplace else Rectangles2D()
+        corners = self.corners_array
+        M_T = transform.M.T
+        if transform.from_origin:
+            transformed = corners @ M_T
+        else:
+            # Center of each rectangle (normalized corner average, as in Rectangle2D.center).
+            centers = (corners[:, :, :2] / corners[:, :, 2:]).mean(axis=1, keepdims=True)
+            w = corners[:, :, 2:]
+            to_origin = corners.copy()
+            to_origin[:, :, :2] -= centers * w
+            transformed = to_origin @ M_T
+            transformed[:, :, :2] += centers * transformed[:, :, 2:]
+        if inplace:
+            for rect, rect_corners in zip(self._rectangles, transformed.tolist()):
+                for idx, (x, y, w) in enumerate(rect_corners):
+                    p = rect[idx]
+                    p.x, p.y, p.w = x, y, w
+            return self
+        rects = [Rectangle2D(*[Point2D._new(x, y, w) for x, y, w in rect_corners])
+                 for rect_corners in transformed.tolist()]
+        return Rectangles2D(rects)
     
     def calculate_transforms(self, transform: TransformBase2D) -> Union[TransformBase2D, List[TransformBase2D]]:
         """
@@ -81,6 +145,28 @@ class Rectangles2D:
         if len(transforms) == 1:
             return transforms[0]
         return transforms
+
+    def calculate_transform_batch(self, transform: TransformBase2D) -> TransformBatch2D:
+        """
+        Calculate the transform matrices between the reference rectangle and
+        the other rectangles as a single (R - 1, 3, 3) stack. If there is a
+        batched estimator for the type of transform (calculate_<name>_batch),
+        all transforms are solved at once, else they are calculated one by one
+        and stacked. The from_origin property of the batch is True.
+
+        Args:
+            transform: The type of transform (a subclass of TransformBase2D).
+
+        Returns:
+            The batch of transforms.
+        """
+        assert len(self._rectangles) > 1, "Need the reference and at least one other rectangle."
+        transform_name = transform.__class__.__name__.lower()
+        method_attr = getattr(self, f"calculate_{transform_name}_batch", None)
+        if method_attr is not None:
+            return method_attr()
+        transforms = [self.reference.calculate_transform(rect, transform) for rect in self._rectangles[1:]]
+        return TransformBatch2D.from_transforms(transforms)
     
     def calculate_translationtransform2d(self, ref: Rectangle2D, query: Rectangle2D) -> TranslationTransform2D:
         """
@@ -109,7 +195,21 @@ class Rectangles2D:
         Returns:
             The rotation transform.
         """
-        raise NotImplementedError
+        rotation = ref.calculate_rotationtransform2d(query)
+        return rotation
+
+    def calculate_rotationtransform2d_batch(self) -> TransformBatch2D:
+        """
+        Calculate the rotations between the reference rectangle and all
+        other rectangles at once (see procrustes_rotation).
+
+        Returns:
+            Batch of R - 1 rotation transforms.
+        """
+        quads = self.cartesian_corners_array
+        batch = RotationTransform2D.from_params(procrustes_rotation(quads[:1], quads[1:]))
+        batch.from_origin = True
+        return batch
     
     def calculate_scaletransform2d(self, ref: Rectangle2D, query: Rectangle2D) -> ScaleTransform2D:
         """
@@ -128,29 +228,117 @@ class Rectangles2D:
     
     def calculate_perspectivetransform2d(self, ref: Rectangle2D, query: Rectangle2D) -> PerspectiveTransform2D:
         """
+        Calculate the pure perspective transform between two rectangles.
+
+        Args:
+            ref: The reference rectangle.
+            query: The query rectangle.
+
+        Returns:
+            The perspective transform.
+        """
+        perspective = ref.calculate_perspectivetransform2d(query)
+        return perspective
+
+    def calculate_perspectivetransform2d_batch(self) -> TransformBatch2D:
         """
-        raise NotImplementedError
+        Calculate the pure perspective transforms between the reference rectangle
+        and all other rectangles at once (see perspective_least_squares).
+
+        Returns:
+            Batch of R - 1 perspective transforms.
+        """
+        quads = self.cartesian_corners_array
+        batch = PerspectiveTransform2D.from_params(*perspective_least_squares(quads[:1], quads[1:]))
+        batch.from_origin = True
+        return batch
     
     def calculate_sheartransform2d(self, ref: Rectangle2D, query: Rectangle2D) -> ShearTransform2D:
         """
+        Calculate the shear transform between two rectangles.
+
+        Args:
+            ref: The reference rectangle.
+            query: The query rectangle.
+
+        Returns:
+            The shear transform.
         """
-        raise NotImplementedError
+        shear = ref.calculate_sheartransform2d(query)
+        return shear
+
+    def calculate_sheartransform2d_batch(self) -> TransformBatch2D:
+        """
+        Calculate the shears between the reference rectangle and all
+        other rectangles at once (see shear_least_squares).
+
+        Returns:
+            Batch of R - 1 shear transforms.
+        """
+        quads = self.cartesian_corners_array
+        batch = ShearTransform2D.from_params(shear_least_squares(quads[:1], quads[1:]))
+        batch.from_origin = True
+        return batch
     
     def calculate_rigidtransform2d(self, ref: Rectangle2D, query: Rectangle2D) -> RigidTransform2D:
         """
+        Calculate the rigid transform between two rectangles.
+
+        Args:
+            ref: The reference rectangle.
+            query: The query rectangle.
+
+        Returns:
+            The rigid transform.
+        """
+        rigid = ref.calculate_rigidtransform2d(query)
+        return rigid
+
+    def calculate_rigidtransform2d_batch(self) -> TransformBatch2D:
         """
-        raise NotImplementedError
+        Calculate the rigid transforms between the reference rectangle and
+        all other rectangles at once (see procrustes_rigid).
+
+        Returns:
+            Batch of R - 1 rigid transforms.
+        """
+        quads = self.cartesian_corners_array
+        batch = RigidTransform2D.from_params(*procrustes_rigid(quads[:1], quads[1:]))
+        batch.from_origin = True
+        return batch
     
     def calculate_similaritytransform2d(self, ref: Rectangle2D, query: Rectangle2D) -> SimilarityTransform2D:
         """
+        Calculate the similarity transform between two rectangles.
+
+        Args:
+            ref: The reference rectangle.
+            query: The query rectangle.
+
+        Returns:
+            The similarity transform.
         """
-        raise NotImplementedError
+        similarity = ref.calculate_similaritytransform2d(query)
+        return similarity
+
+    def calculate_similaritytransform2d_batch(self) -> TransformBatch2D:
+        """
+        Calculate the similarity transforms between the reference rectangle
+        and all other rectangles at once (see umeyama_similarity).
+
+        Returns:
+            Batch of R - 1 similarity transforms.
+        """
+        quads = self.cartesian_corners_array
+        scale, theta, tx, ty = umeyama_similarity(quads[:1], quads[1:])
+        batch = SimilarityTransform2D.from_params(scale, scale, theta, tx, ty)
+        batch.from_origin = True
+        return batch
     
     def calculate_affinetransform2d(self, ref: Rectangle2D, query: Rectangle2D) -> AffineTransform2D:
         """
-        Calculate the affine transform between two rectangles. Only use three
-        corresponding points to exactly solve for 6 unknowns. Using all corners
-        will cause system to be overdetermined and will need to fit least squares.
+        Calculate the affine transform between two rectangles as the
+        least squares fit over all four corners.
 
         Args:
             ref: The reference rectangle.
@@ -161,6 +349,28 @@ class Rectangles2D:
         """
         affine = ref.calculate_affinetransform2d(query)
         return affine
+
+    def calculate_affinetransform2d_batch(self, return_residuals: bool = False
+                                          ) -> Union[TransformBatch2D, Tuple[TransformBatch2D, np.ndarray]]:
+        """
+        Calculate the affine transforms between the reference rectangle and all
+        other rectangles at once. The reference corners are factored with a single
+        QR and every rectangle is solved against it (see affine_least_squares).
+
+        Args:
+            return_residuals: If True also return the distance between each mapped
+                              reference corner and the rectangle corner, so the fit
+                              can be checked without applying the transforms.
+
+        Returns:
+            Batch of R - 1 affine transforms, and (R - 1, 4) residuals if requested.
+        """
+        quads = self.cartesian_corners_array
+        Ms, residuals = affine_least_squares(quads[:1], quads[1:])
+        batch = TransformBatch2D(Ms, model=AffineTransform2D, from_origin=True)
+        if return_residuals:
+            return batch, residuals
+        return batch
     
     def calculate_projectivetransform2d(self, ref: Rectangle2D, query: Rectangle2D) -> ProjectiveTransform2D:
         """
@@ -177,6 +387,20 @@ class Rectangles2D:
         """
         projective = ref.calculate_projectivetransform2d(query)
         return projective
+
+    def calculate_projectivetransform2d_batch(self) -> TransformBatch2D:
+        """
+        Calculate the projective transforms between the reference rectangle and
+        all other rectangles at once. Each homography is the closed form for four
+        corresponding points, vectorized over the rectangles, and near-degenerate
+        rectangles are solved with one batched SVD (see quad_to_quad).
+
+        Returns:
+            Batch of R - 1 projective transforms normalized by bottom right value.
+        """
+        quads = self.cartesian_corners_array
+        Ms = quad_to_quad(quads[:1], quads[1:])
+        return TransformBatch2D(Ms, model=ProjectiveTransform2D, from_origin=True)
     
     def __getitem__(self, idx: int) -> Rectangle2D:
         """
@@ -1,4 +1,6 @@
 from .affine import AffineTransform2D
+from .batch import TransformBatch2D
+from .chain import TransformChain
 from .perspective import PerspectiveTransform2D
 from .projective import ProjectiveTransform2D
 from .rigid import RigidTransform2D
@@ -21,5 +23,7 @@ __all__ = [
     "ShearTransform2D",
     "SimilarityTransform2D",
     "TransformBase2D",
+    "TransformBatch2D",
+    "TransformChain",
     "TranslationTransform2D",
 ]
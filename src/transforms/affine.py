@@ -5,6 +5,7 @@ from src.transforms.transform_base import TransformBase2D
 from src.transforms.rigid import RigidTransform2D
 from src.transforms.scale import ScaleTransform2D
 from src.transforms.shear import ShearTransform2D
+from src.transforms.batch import TransformBatch2D
 
 
 class AffineTransform2D(TransformBase2D):
@@ -14,6 +15,10 @@ class AffineTransform2D(TransformBase2D):
     Preserves: parallelism, straight lines.
     """
 
+    # Constructor parameters in order, used by get_decomposed_params_from_Ms.
+    params_dtype = np.dtype([("sx", float), ("sy", float), ("shear_theta", float),
+                             ("theta", float), ("tx", float), ("ty", float)])
+
     def __init__(self, sx: float = 1., sy: float = 1., shear_theta: float = 0.,
                  theta: float = 0., tx: int = 0, ty: int = 0) -> None:
         """
@@ -192,8 +197,11 @@ class AffineTransform2D(TransformBase2D):
 
     def update_M(self) -> None:
         """
-        Update M with instance variables.
+        Update M with instance variables, or only mark M
+        as out of date if updates are deferred.
         """
+        if self.defer_update():
+            return
         super().reset()
         self._M = self._rigid.M @ self._scale.M @ self._shear.M
     
@@ -205,7 +213,7 @@ class AffineTransform2D(TransformBase2D):
         Returns:
             (shear transform, scale transform, rigid transform)
         """
-        return self.get_decomposed_from_M(self._M)
+        return self.get_decomposed_from_M(self.M)
     
     @staticmethod
     def get_decomposed_from_M(M: np.ndarray) -> Tuple[ShearTransform2D, ScaleTransform2D, RigidTransform2D]:
@@ -245,11 +253,60 @@ class AffineTransform2D(TransformBase2D):
         rigid = RigidTransform2D(theta, tx, ty)
         return shear, scale, rigid
     
+    @staticmethod
+    def get_decomposed_params_from_Ms(Ms: np.ndarray) -> np.ndarray:
+        """
+        Decompose N affine matrices at once, giving the same parameters as
+        get_decomposed_from_M. The Cholesky factor U of the 2x2 matrix
+        A.T @ A is written out in closed form, U = [[sqrt(G00), G01 / U00],
+        [0, sqrt(G11 - U01^2)]], and the rotation R = A @ inv(U) has the sign
+        of det(A), so the reflection is moved into sx where det(A) < 0.
+
+        Args:
+            Ms: (N, 3, 3) affine transform matrices.
+
+        Returns:
+            (N,) structured array with the fields of AffineTransform2D.params_dtype.
+        """
+        Ms = np.asarray(Ms, dtype=float).reshape(-1, 3, 3)
+        a, b = Ms[:, 0, 0], Ms[:, 0, 1]
+        c, d = Ms[:, 1, 0], Ms[:, 1, 1]
+        u00 = np.hypot(a, c)
+        u01 = (a * b + c * d) / u00
+        # Clip tiny negative values from round off for nearly singular matrices.
+        u11 = np.sqrt(np.maximum(b * b + d * d - u01 * u01, 0.0))
+        # Account for reflection
+        sx = np.where(a * d - b * c < 0, -u00, u00)
+        params = np.empty(Ms.shape[0], dtype=AffineTransform2D.params_dtype)
+        params["sx"] = sx
+        params["sy"] = u11
+        params["shear_theta"] = np.arctan(u01 / u00)
+        params["theta"] = np.arctan2(c / sx, a / sx)
+        params["tx"] = Ms[:, 0, 2]
+        params["ty"] = Ms[:, 1, 2]
+        return params
+
+    def calculate_inv_M(self) -> np.ndarray:
+        """
+        The inverse of [A | t] is [A^-1 | -A^-1 t], with
+        the 2x2 inverse A^-1 = [[d, -b], [-c, a]] / det(A).
+
+        Returns:
+            The inverse (M^-1).
+        """
+        M = self.M
+        (a, b), (c, d) = M[0, :2], M[1, :2]
+        inv_M = np.identity(3, dtype=float)
+        inv_M[:2, :2] = np.array([[d, -b], [-c, a]]) / (a * d - b * c)
+        inv_M[:2, 2] = -inv_M[:2, :2] @ M[:2, 2]
+        return inv_M
+
     @classmethod
     def from_M(cls, M: np.ndarray) -> "AffineTransform2D":
         """
-        Construct an AffineTransform2D object
-        from a 3x3 affine matrix by decomposing it.
+        Construct an AffineTransform2D object from a 3x3 affine
+        matrix. The shear, scale and rigid components are only
+        built by decomposing M when they are first accessed.
 
         Args:
             M: A 3x3 matrix.
@@ -258,8 +315,47 @@ class AffineTransform2D(TransformBase2D):
             An AffineTransform2D instance.
         """
         assert M.shape == (3, 3)
-        sh, sc, rig = cls.get_decomposed_from_M(M)
-        return cls(sc.sx, sc.sy, sh.theta, rig.theta, rig.tx, rig.ty)
+        M = np.array(M, dtype=float)
+        M[2] = (0., 0., 1.)
+        return cls._new_from_M(M)
+
+    def build_components(self) -> None:
+        """
+        Build the shear, scale and rigid transforms by decomposing M.
+        """
+        self._shear, self._scale, self._rigid = self.get_decomposed_from_M(self._M)
+        self._DoF = self._shear.DoF + self._scale.DoF + self._rigid.DoF
+
+    @classmethod
+    def from_params(cls, sx: np.ndarray, sy: np.ndarray, shear_theta: np.ndarray,
+                    theta: np.ndarray, tx: np.ndarray, ty: np.ndarray) -> TransformBatch2D:
+        """
+        Vectorized constructor for N affine transforms without creating
+        N transform objects. Fills rigid @ scale @ shear directly, which is
+        [[cos * sx, cos * sx * tan - sin * sy, tx], [sin * sx, sin * sx * tan + cos * sy, ty]].
+
+        Args:
+            sx: Scales in x direction (scalar or (N,) array)
+            sy: Scales in y direction (scalar or (N,) array)
+            shear_theta: Shear angles in radians (scalar or (N,) array)
+            theta: Rotation angles in radians (scalar or (N,) array)
+            tx: Translation x distances (scalar or (N,) array)
+            ty: Translation y distances (scalar or (N,) array)
+
+        Returns:
+            TransformBatch2D with (N, 3, 3) matrices.
+        """
+        sx, sy, shear_theta, theta, tx, ty = cls.broadcast_params(sx, sy, shear_theta, theta, tx, ty)
+        cos, sin = np.cos(theta), np.sin(theta)
+        sheared_sx = sx * np.tan(shear_theta)
+        Ms = cls.identity_stack(sx.shape[0])
+        Ms[:, 0, 0] = cos * sx
+        Ms[:, 0, 1] = cos * sheared_sx - sin * sy
+        Ms[:, 1, 0] = sin * sx
+        Ms[:, 1, 1] = sin * sheared_sx + cos * sy
+        Ms[:, 0, 2] = tx
+        Ms[:, 1, 2] = ty
+        return TransformBatch2D(Ms, model=cls)
         
         
 if __name__ == "__main__":
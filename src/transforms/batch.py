@@ -0,0 +1,291 @@
+from typing import List, Union, Type, Any
+import numpy as np
+from src.transforms.transform_base import TransformBase2D
+
+
+class TransformBatch2D:
+    """
+    A stack of N transform matrices held in a single (N, 3, 3) array
+    along with the model (the TransformBase2D subclass) that all of the
+    matrices belong to. Operations on the batch are vectorized over N
+    instead of creating and looping over N transform objects.
+    """
+
+    def __init__(self, Ms: np.ndarray, model: Type[TransformBase2D] = TransformBase2D,
+                 from_origin: bool = False) -> None:
+        """
+        Args:
+            Ms: (N, 3, 3) array of transform matrices (a single 3x3 is treated as N = 1).
+            model: The transform class that the matrices belong to.
+            from_origin: Whether to apply the transforms from the canvas origin
+                         or the object center (see TransformBase2D.from_origin).
+        """
+        Ms = np.asarray(Ms, dtype=float)
+        if Ms.ndim == 2:
+            Ms = Ms[None]
+        if Ms.ndim != 3 or Ms.shape[1:] != (3, 3):
+            raise ValueError(f"Need (N, 3, 3) array, not {Ms.shape}.")
+        assert issubclass(model, TransformBase2D), f"Can't have model {model}."
+        self._Ms: np.ndarray = Ms
+        self._model: Type[TransformBase2D] = model
+        self._from_origin: bool = from_origin
+
+    def __repr__(self) -> str:
+        """
+        Use the model and the number of matrices to represent the batch.
+
+        Returns:
+            The string
+        """
+        return f"TransformBatch2D({self._model.__name__}, N={len(self)})"
+
+    @classmethod
+    def from_transforms(cls, transforms: List[TransformBase2D]) -> "TransformBatch2D":
+        """
+        Stack the matrices of a list of transform objects. If the
+        transforms are not all of the same class, the model is
+        the most general class needed to represent all of them.
+
+        Args:
+            transforms: The transforms.
+
+        Returns:
+            A TransformBatch2D instance.
+        """
+        assert len(transforms) > 0, "Need at least one transform."
+        model = type(transforms[0])
+        for t in transforms[1:]:
+            model = cls.composed_model(model, type(t))
+        Ms = np.stack([t.M for t in transforms])
+        return cls(Ms, model=model, from_origin=transforms[0].from_origin)
+
+    def to_transforms(self) -> List[TransformBase2D]:
+        """
+        Convert to a list of transform objects of the model class.
+
+        Returns:
+            The transforms.
+        """
+        transforms = []
+        for M in self._Ms:
+            t = self._model.from_M(M)
+            t.from_origin = self._from_origin
+            transforms.append(t)
+        return transforms
+
+    @property
+    def Ms(self) -> np.ndarray:
+        """
+        The stacked transformation matrices.
+
+        Returns:
+            (N, 3, 3) numpy array
+        """
+        return self._Ms
+
+    @property
+    def model(self) -> Type[TransformBase2D]:
+        """
+        The class that all transforms in the batch belong to.
+
+        Returns:
+            A subclass of TransformBase2D
+        """
+        return self._model
+
+    @property
+    def from_origin(self) -> bool:
+        """
+        Whether to apply the transforms from origin
+        or from the object center.
+
+        Returns:
+            True if from the canvas origin.
+        """
+        return self._from_origin
+
+    @from_origin.setter
+    def from_origin(self, new_from_origin: bool) -> None:
+        """
+        Set new value.
+
+        Args:
+            new_from_origin: Whether to transform from canvas origin or object center.
+        """
+        self._from_origin = new_from_origin
+
+    @staticmethod
+    def composed_model(first: Type[TransformBase2D], second: Type[TransformBase2D]) -> Type[TransformBase2D]:
+        """
+        The most specific model that can represent the composition of
+        transforms of the two models. Each model is closed under
+        composition, otherwise the more general of rigid, similarity,
+        affine and projective is used.
+
+        Args:
+            first: A transform class.
+            second: Another transform class.
+
+        Returns:
+            The transform class of the composition.
+        """
+        if first is second:
+            return first
+        # Import here so that the transform modules can use this module.
+        from src.transforms.translation import TranslationTransform2D
+        from src.transforms.rotation import RotationTransform2D
+        from src.transforms.scale import ScaleTransform2D
+        from src.transforms.shear import ShearTransform2D
+        from src.transforms.perspective import PerspectiveTransform2D
+        from src.transforms.rigid import RigidTransform2D
+        from src.transforms.similarity import SimilarityTransform2D
+        from src.transforms.affine import AffineTransform2D
+        from src.transforms.projective import ProjectiveTransform2D
+        hierarchy = [RigidTransform2D, SimilarityTransform2D, AffineTransform2D, ProjectiveTransform2D]
+        containing = {
+            TranslationTransform2D: RigidTransform2D,
+            RotationTransform2D: RigidTransform2D,
+            ScaleTransform2D: AffineTransform2D,
+            ShearTransform2D: AffineTransform2D,
+            PerspectiveTransform2D: ProjectiveTransform2D,
+        }
+        levels = []
+        for model in (first, second):
+            model = containing.get(model, model)
+            if model not in hierarchy:
+                return TransformBase2D
+            levels.append(hierarchy.index(model))
+        return hierarchy[max(levels)]
+
+    def compose(self, other: Union["TransformBatch2D", TransformBase2D, np.ndarray]) -> "TransformBatch2D":
+        """
+        Compose with other as self @ other, so other is applied first. Broadcasts,
+        so other can be a single transform or a batch of the same length.
+
+        Args:
+            other: A batch, a transform object, or a (3, 3) / (N, 3, 3) array.
+
+        Returns:
+            New TransformBatch2D instance.
+        """
+        if isinstance(other, TransformBatch2D):
+            other_Ms, other_model = other.Ms, other.model
+        elif isinstance(other, TransformBase2D):
+            other_Ms, other_model = other.M, type(other)
+        else:
+            other_Ms, other_model = np.asarray(other, dtype=float), TransformBase2D
+        model = self.composed_model(self._model, other_model)
+        return TransformBatch2D(self._Ms @ other_Ms, model=model, from_origin=self._from_origin)
+
+    def __matmul__(self, other: Union["TransformBatch2D", TransformBase2D, np.ndarray]) -> "TransformBatch2D":
+        """
+        Same as compose.
+
+        Args:
+            other: A batch, a transform object, or a (3, 3) / (N, 3, 3) array.
+
+        Returns:
+            New TransformBatch2D instance.
+        """
+        return self.compose(other)
+
+    def get_inv_M(self) -> np.ndarray:
+        """
+        Get the inverse of every matrix.
+
+        Returns:
+            (N, 3, 3) inverses.
+        """
+        return np.linalg.inv(self._Ms)
+
+    def get_T_inv_M(self) -> np.ndarray:
+        """
+        Get the transposed inverse of every matrix, which
+        transforms co-vectors such as 2D lines (page 34).
+
+        Returns:
+            (N, 3, 3) transposed inverses.
+        """
+        return np.swapaxes(self.get_inv_M(), 1, 2)
+
+    def inverse(self) -> "TransformBatch2D":
+        """
+        Every model is closed under inversion, so the
+        inverses have the same model.
+
+        Returns:
+            New TransformBatch2D instance.
+        """
+        return TransformBatch2D(self.get_inv_M(), model=self._model, from_origin=self._from_origin)
+
+    @property
+    def normalized_M(self) -> np.ndarray:
+        """
+        Normalize every matrix by its bottom right value.
+
+        Returns:
+            (N, 3, 3) normalized matrices.
+        """
+        return self._Ms / self._Ms[:, 2:, 2:]
+
+    def normalize_M(self) -> None:
+        """
+        Normalize every matrix by its bottom right value inplace.
+        """
+        self._Ms /= self._Ms[:, 2:, 2:]
+
+    def get_decomposed_params(self) -> np.ndarray:
+        """
+        Decompose every matrix into the parameters of the model
+        in one vectorized pass (rigid, similarity, affine and projective).
+
+        Returns:
+            (N,) structured array with the fields of model.params_dtype.
+        """
+        return self._model.get_decomposed_params_from_Ms(self._Ms)
+
+    def apply_to_points(self, points: Any) -> np.ndarray:
+        """
+        Apply every transform to homogenous points (rows).
+
+        Args:
+            points: (K, 3) array or Points2D to transform by every matrix, or
+                    (N, K, 3) array to transform points[i] by matrix i.
+
+        Returns:
+            (N, K, 3) transformed points (K is 0 for an empty Points2D).
+        """
+        arr = getattr(points, "array_form", points)
+        if arr is None:
+            return np.empty((len(self), 0, 3))
+        arr = np.asarray(arr, dtype=float)
+        return arr @ np.swapaxes(self._Ms, 1, 2)
+
+    def __len__(self) -> int:
+        """
+        Get number of transforms.
+
+        Returns:
+            Number of transforms.
+        """
+        return self._Ms.shape[0]
+
+    def __getitem__(self, idx: Union[int, slice, np.ndarray]) -> Union[TransformBase2D, "TransformBatch2D"]:
+        """
+        Get a transform object at index, or a batch for a slice or index array.
+
+        Args:
+            idx: The index, slice or index array.
+
+        Returns:
+            A transform of the model class, or a TransformBatch2D.
+        """
+        if isinstance(idx, (int, np.integer)):
+            t = self._model.from_M(self._Ms[idx])
+            t.from_origin = self._from_origin
+            return t
+        return TransformBatch2D(self._Ms[idx], model=self._model, from_origin=self._from_origin)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,253 @@
+from typing import Optional, List, Union, Iterator, Any
+import numpy as np
+from src.transforms.transform_base import TransformBase2D
+
+
+class TransformChain(TransformBase2D):
+    """
+    An ordered sequence of transforms that is applied as one fused 3x3
+    matrix. The first transform in the chain is applied first, so the fused
+    matrix is M_n @ ... @ M_1 @ M_0. The prefix products M_k @ ... @ M_0 are
+    cached along with the bytes of every member matrix, so the fused matrix
+    is only recomputed when a member changes (including changes to a member
+    inplace or through its parameter setters), and then only from the first
+    changed member onwards.
+    """
+
+    def __init__(self, transforms: Optional[List[Union[TransformBase2D, np.ndarray]]] = None,
+                 partial: bool = True) -> None:
+        """
+        Args:
+            transforms: The transforms (or 3x3 matrices) in the order they are applied.
+            partial: If True, only re-fuse the suffix of the chain starting at the
+                     first changed member. If False, re-fuse the whole chain.
+        """
+        super().__init__()
+        if transforms:
+            self._transforms: List[Union[TransformBase2D, np.ndarray]] = list(transforms)
+        else:
+            self._transforms: List[Union[TransformBase2D, np.ndarray]] = []
+        self._partial: bool = partial
+        # Bytes of each member matrix and the prefix products when last fused.
+        self._keys: List[bytes] = []
+        self._prefix: List[np.ndarray] = []
+
+    @property
+    def transforms(self) -> List[Union[TransformBase2D, np.ndarray]]:
+        """
+        The members of the chain. Changes to this list
+        are picked up the next time M is read.
+
+        Returns:
+            The transforms in the order they are applied.
+        """
+        return self._transforms
+
+    @property
+    def partial(self) -> bool:
+        """
+        Whether only the changed suffix of the chain is re-fused.
+
+        Returns:
+            True for partial re-fusion.
+        """
+        return self._partial
+
+    @partial.setter
+    def partial(self, new_partial: bool) -> None:
+        """
+        Set new value.
+
+        Args:
+            new_partial: Whether to only re-fuse the changed suffix.
+        """
+        self._partial = new_partial
+
+    @property
+    def M(self) -> np.ndarray:
+        """
+        The fused transformation matrix of the chain.
+
+        Returns:
+            3x3 numpy array
+        """
+        self.fuse()
+        return self._M
+
+    @M.setter
+    def M(self, new_M: np.ndarray) -> None:
+        """
+        The fused matrix can't be set, change the members instead.
+
+        Args:
+            new_M: The new matrix to set.
+        """
+        raise AttributeError("Can't set M of a TransformChain, change its transforms instead.")
+
+    @classmethod
+    def from_M(cls, M: np.ndarray) -> "TransformChain":
+        """
+        A chain can't be built from its fused matrix, because
+        the M setter is disabled.
+
+        Args:
+            M: A 3x3 matrix.
+
+        Raises:
+            TypeError: Always.
+        """
+        raise TypeError("Can't build a TransformChain from M, use TransformChain([M]) instead.")
+
+    @staticmethod
+    def _member_M(member: Union[TransformBase2D, np.ndarray]) -> np.ndarray:
+        """
+        Get the matrix of a member.
+
+        Args:
+            member: A transform or a 3x3 matrix.
+
+        Returns:
+            3x3 numpy array
+        """
+        if isinstance(member, TransformBase2D):
+            return member.M
+        return np.asarray(member, dtype=float)
+
+    def fuse(self) -> int:
+        """
+        Update the fused matrix if any member changed since it was
+        last fused. The member matrices are compared by their bytes.
+
+        Returns:
+            The number of matrix products that were computed.
+        """
+        Ms = [self._member_M(t) for t in self._transforms]
+        keys = [M.tobytes() for M in Ms]
+        if keys == self._keys:
+            return 0
+        start = 0
+        if self._partial:
+            for key, old_key in zip(keys, self._keys):
+                if key != old_key:
+                    break
+                start += 1
+        del self._prefix[start:]
+        product = self._prefix[-1] if self._prefix else np.identity(3, dtype=float)
+        for M in Ms[start:]:
+            product = M @ product
+            self._prefix.append(product)
+        self._keys = keys
+        self._M = product.copy()
+        return len(Ms) - start
+
+    def update_M(self) -> None:
+        """
+        Re-fuse the whole chain.
+        """
+        self._keys = []
+        self._prefix = []
+        self.fuse()
+
+    def append(self, transform: Union[TransformBase2D, np.ndarray]) -> None:
+        """
+        Append a transform that is applied after the current chain.
+
+        Args:
+            transform: A transform or a 3x3 matrix.
+        """
+        self._transforms.append(transform)
+
+    def __len__(self) -> int:
+        """
+        Get number of transforms.
+
+        Returns:
+            Number of transforms in the chain.
+        """
+        return len(self._transforms)
+
+    def __getitem__(self, idx: int) -> Union[TransformBase2D, np.ndarray]:
+        """
+        Get the transform at index.
+
+        Args:
+            idx: The index.
+
+        Returns:
+            The transform.
+        """
+        return self._transforms[idx]
+
+    def __setitem__(self, idx: int, transform: Union[TransformBase2D, np.ndarray]) -> None:
+        """
+        Replace the transform at index.
+
+        Args:
+            idx: The index.
+            transform: A transform or a 3x3 matrix.
+        """
+        self._transforms[idx] = transform
+
+    def __delitem__(self, idx: int) -> None:
+        """
+        Remove the transform at index.
+
+        Args:
+            idx: The index.
+        """
+        del self._transforms[idx]
+
+    def __iter__(self) -> Iterator[Union[TransformBase2D, np.ndarray]]:
+        """
+        Iterate over the transforms.
+
+        Returns:
+            Iterator over the transforms.
+        """
+        return iter(self._transforms)
+
+    def apply_to_points(self, points: Any, inplace: bool = False) -> Any:
+        """
+        Apply the fused matrix to all points with a single product.
+
+        Args:
+            points: A Points2D instance.
+            inplace: If True change points, else return new Points2D instance.
+
+        Returns:
+            The transformed points.
+        """
+        return points.apply_transform(self.M, inplace=inplace)
+
+    def apply_to_lines(self, lines: Any, inplace: bool = False) -> Any:
+        """
+        Apply the chain to all lines with a single product by
+        the (cached) transposed inverse of the fused matrix.
+
+        Args:
+            lines: A Lines2D instance.
+            inplace: If True change lines, else return new Lines2D instance.
+
+        Returns:
+            The transformed lines.
+        """
+        return lines.apply_transform(self.M, inplace=inplace, T_inv_M=self.get_T_inv_M())
+
+    def apply_to_rectangles(self, rects: Any, inplace: bool = False) -> Any:
+        """
+        Apply the fused matrix to the corners of all rectangles at once.
+        Like the other transforms, the from_origin property decides whether
+        each rectangle is transformed around the canvas origin or its center.
+
+        Args:
+            rects: A Rectangles2D instance.
+            inplace: If True change rects, else return new Rectangles2D instance.
+
+        Returns:
+            The transformed rectangles.
+        """
+        return rects.apply_transform(self, inplace=inplace)
+
+
+if __name__ == "__main__":
+    pass
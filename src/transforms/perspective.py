@@ -1,4 +1,6 @@
+import numpy as np
 from src.transforms.transform_base import TransformBase2D
+from src.transforms.batch import TransformBatch2D
 
 
 class PerspectiveTransform2D(TransformBase2D):
@@ -67,12 +69,74 @@ class PerspectiveTransform2D(TransformBase2D):
 
     def update_M(self) -> None:
         """
-        Reset M with instance variables.
+        Update M with instance variables, or only mark M
+        as out of date if updates are deferred.
         """
+        if self.defer_update():
+            return
         super().reset()
         self._M[2][0] = self._per_x
         self._M[2][1] = self._per_y
 
+    def calculate_inv_M(self) -> np.ndarray:
+        """
+        The inverse of the pure perspective matrix negates
+        the perspective values in the last row.
+
+        Returns:
+            The inverse (M^-1).
+        """
+        M = self.M
+        inv_M = np.identity(3, dtype=float)
+        inv_M[2, :2] = -M[2, :2] / M[2, 2]
+        inv_M[2, 2] = 1. / M[2, 2]
+        return inv_M
+
+    def inverse(self) -> "PerspectiveTransform2D":
+        """
+        Get the inverse transform.
+
+        Returns:
+            New PerspectiveTransform2D with negated perspective values.
+        """
+        transform = PerspectiveTransform2D(-self._per_x, -self._per_y)
+        transform.from_origin = self._from_origin
+        return transform
+
+    @classmethod
+    def from_M(cls, M: np.ndarray) -> "PerspectiveTransform2D":
+        """
+        Construct a PerspectiveTransform2D object from the
+        last row of a 3x3 matrix (normalized by bottom right value).
+
+        Args:
+            M: A 3x3 matrix.
+
+        Returns:
+            A PerspectiveTransform2D instance.
+        """
+        assert M.shape == (3, 3)
+        return cls((M[2][0] / M[2][2]).item(), (M[2][1] / M[2][2]).item())
+
+    @classmethod
+    def from_params(cls, per_x: np.ndarray, per_y: np.ndarray) -> TransformBatch2D:
+        """
+        Vectorized constructor for N pure perspective
+        transforms without creating N transform objects.
+
+        Args:
+            per_x: Perspective x values (scalar or (N,) array)
+            per_y: Perspective y values (scalar or (N,) array)
+
+        Returns:
+            TransformBatch2D with (N, 3, 3) matrices.
+        """
+        per_x, per_y = cls.broadcast_params(per_x, per_y)
+        Ms = cls.identity_stack(per_x.shape[0])
+        Ms[:, 2, 0] = per_x
+        Ms[:, 2, 1] = per_y
+        return TransformBatch2D(Ms, model=cls)
+
 
 if __name__ == "__main__":
     pass
@@ -1,9 +1,9 @@
 from typing import Tuple
 import numpy as np
-from scipy.optimize import minimize
 from src.transforms.transform_base import TransformBase2D
 from src.transforms.affine import AffineTransform2D
 from src.transforms.perspective import PerspectiveTransform2D
+from src.transforms.batch import TransformBatch2D
 
 
 class ProjectiveTransform2D(TransformBase2D):
@@ -12,6 +12,9 @@ class ProjectiveTransform2D(TransformBase2D):
     transform + an affine transform. Preserves: straight lines.
     """
 
+    # Constructor parameters in order, used by get_decomposed_params_from_Ms.
+    params_dtype = np.dtype([("per_x", float), ("per_y", float)] + AffineTransform2D.params_dtype.descr)
+
     def __init__(self, per_x: float = 0., per_y: float = 0., sx: float = 1., sy: float = 1.,
                  shear_theta: float = 0., theta: float = 0., tx: int = 0, ty: int = 0) -> None:
         """
@@ -145,7 +148,7 @@ class ProjectiveTransform2D(TransformBase2D):
         Returns:
             The shear theta
         """
-        return self._affine.theta
+        return self._affine.shear_theta
 
     @shear_theta.setter
     def shear_theta(self, new_shear_theta: float) -> None:
@@ -155,7 +158,7 @@ class ProjectiveTransform2D(TransformBase2D):
         Args:
             new_shear_theta: New shear theta
         """
-        self._affine.theta = new_shear_theta
+        self._affine.shear_theta = new_shear_theta
         self.update_M()
 
     @property
@@ -223,8 +226,11 @@ class ProjectiveTransform2D(TransformBase2D):
 
     def update_M(self) -> None:
         """
-        Reset M with instance variables.
+        Update M with instance variables, or only mark M
+        as out of date if updates are deferred.
         """
+        if self.defer_update():
+            return
         super().reset()
         self._M = self._perspective.M @ self._affine.M
     
@@ -236,20 +242,44 @@ class ProjectiveTransform2D(TransformBase2D):
         Returns:
             (affine transform, perspective transform)
         """
-        return self.get_decomposed_from_M(self._M)
+        return self.get_decomposed_from_M(self.M)
     
     @staticmethod
-    def get_decomposed_from_M(M: np.ndarray) -> Tuple[AffineTransform2D, PerspectiveTransform2D]:
+    def get_decomposed_from_M(M: np.ndarray, method: str = "closed_form") -> Tuple[AffineTransform2D, PerspectiveTransform2D]:
         """
         Decompose the matrix M into it's component affine and perspective matrices.
         Do this as if component matrices are unknown. Do not change M.
 
+        M = P @ A where the last row of A is (0, 0, 1), so the last row of M is
+        per_x * A[0] + per_y * A[1] + (0, 0, 1), and the first two rows of M are
+        the first two rows of A. Solving the 2x2 system for the first two columns
+        gives per_x and per_y exactly. M is only defined up to scale (e.g. when it
+        is normalized by the bottom right value), so A is divided by the scale
+        s = M[2, 2] - per_x * M[0, 2] - per_y * M[1, 2], which is 1 when M was
+        composed from components.
+
         Args:
             M: The projective transform matrix.
+            method: "closed_form", or "optimize" to search for per_x, per_y
+                    with scipy.optimize.minimize instead (much slower).
+
+        Raises:
+            LinAlgError: If the affine part of M is singular.
+            ValueError: If the method is unknown or M can't be decomposed.
 
         Returns:
             (affine transform, perspective transform)
         """
+        if method == "closed_form":
+            per_x, per_y, s = ProjectiveTransform2D.get_perspective_from_M(M)
+            perspective = PerspectiveTransform2D(per_x, per_y)
+            affine_M = np.vstack([M[:2] / s, [0., 0., 1.]])
+            affine = AffineTransform2D.from_M(affine_M)
+            return affine, perspective
+        elif method != "optimize":
+            raise ValueError(f"Unknown method {method}.")
+        # Only import scipy when the optimizer is requested.
+        from scipy.optimize import minimize
         
         def error(params: Tuple[float, float]) -> float:
             """
@@ -280,21 +310,126 @@ class ProjectiveTransform2D(TransformBase2D):
         affine = AffineTransform2D.from_M(affine_M)
         return affine, perspective
     
+    @staticmethod
+    def get_decomposed_params_from_Ms(Ms: np.ndarray) -> np.ndarray:
+        """
+        Decompose N projective matrices at once with the closed form of
+        get_decomposed_from_M. The 2x2 systems for per_x and per_y are solved
+        with Cramer's rule, then the affine parts are decomposed together.
+
+        Args:
+            Ms: (N, 3, 3) projective transform matrices.
+
+        Raises:
+            LinAlgError: If the affine part of any matrix is singular.
+            ValueError: If any matrix maps the origin to infinity.
+
+        Returns:
+            (N,) structured array with the fields of ProjectiveTransform2D.params_dtype.
+        """
+        Ms = np.asarray(Ms, dtype=float).reshape(-1, 3, 3)
+        a, b = Ms[:, 0, 0], Ms[:, 0, 1]
+        c, d = Ms[:, 1, 0], Ms[:, 1, 1]
+        det = a * d - b * c
+        if np.any(det == 0.0):
+            raise np.linalg.LinAlgError("Singular matrix")
+        per_x = (Ms[:, 2, 0] * d - Ms[:, 2, 1] * c) / det
+        per_y = (Ms[:, 2, 1] * a - Ms[:, 2, 0] * b) / det
+        s = Ms[:, 2, 2] - per_x * Ms[:, 0, 2] - per_y * Ms[:, 1, 2]
+        if np.any(s == 0.0):
+            raise ValueError("M maps the origin to infinity, so it has no affine then perspective decomposition.")
+        affine_Ms = Ms / s[:, None, None]
+        affine_params = AffineTransform2D.get_decomposed_params_from_Ms(affine_Ms)
+        params = np.empty(Ms.shape[0], dtype=ProjectiveTransform2D.params_dtype)
+        params["per_x"] = per_x
+        params["per_y"] = per_y
+        for name in AffineTransform2D.params_dtype.names:
+            params[name] = affine_params[name]
+        return params
+
+    @staticmethod
+    def get_perspective_from_M(M: np.ndarray) -> Tuple[float, float, float]:
+        """
+        Solve for the perspective values and the scale of M in
+        closed form (see get_decomposed_from_M). The 2x2 system is
+        solved with Cramer's rule on python floats.
+
+        Args:
+            M: The projective transform matrix.
+
+        Raises:
+            LinAlgError: If the affine part of M is singular.
+            ValueError: If M can't be decomposed.
+
+        Returns:
+            (per_x, per_y, scale s)
+        """
+        (a, b, tx), (c, d, ty), (g, h, i) = M.tolist()
+        det = a * d - b * c
+        if det == 0.0:
+            raise np.linalg.LinAlgError("Singular matrix")
+        per_x = (g * d - h * c) / det
+        per_y = (h * a - g * b) / det
+        s = i - per_x * tx - per_y * ty
+        if s == 0.0:
+            raise ValueError("M maps the origin to infinity, so it has no affine then perspective decomposition.")
+        return per_x, per_y, s
+
     @classmethod
-    def from_M(cls, M: np.ndarray) -> "ProjectiveTransform2D":
+    def from_M(cls, M: np.ndarray, method: str = "closed_form") -> "ProjectiveTransform2D":
         """
-        Construct a ProjectiveTransform2D object
-        from a 3x3 affine matrix by decomposing it.
+        Construct a ProjectiveTransform2D object from a 3x3 projective
+        matrix. With the closed form, M is only divided by its scale and
+        the affine and perspective components are built by decomposing
+        M when they are first accessed.
 
         Args:
             M: A 3x3 matrix.
+            method: Decomposition method (see get_decomposed_from_M).
 
         Returns:
             A ProjectiveTransform2D instance.
         """
         assert M.shape == (3, 3)
-        a, p = cls.get_decomposed_from_M(M)
+        if method == "closed_form":
+            _, _, s = cls.get_perspective_from_M(M)
+            return cls._new_from_M(np.divide(M, s, dtype=float))
+        a, p = cls.get_decomposed_from_M(M, method=method)
         return cls(p.per_x, p.per_y, a.sx, a.sy, a.shear_theta, a.theta, a.tx, a.ty)
+
+    def build_components(self) -> None:
+        """
+        Build the affine and perspective transforms by decomposing M.
+        """
+        self._affine, self._perspective = self.get_decomposed_from_M(self._M)
+        self._DoF = self._affine.DoF + self._perspective.DoF
+
+    @classmethod
+    def from_params(cls, per_x: np.ndarray, per_y: np.ndarray, sx: np.ndarray, sy: np.ndarray,
+                    shear_theta: np.ndarray, theta: np.ndarray, tx: np.ndarray, ty: np.ndarray) -> TransformBatch2D:
+        """
+        Vectorized constructor for N projective transforms without creating
+        N transform objects. Multiplying the affine matrices A by the pure
+        perspective matrix only changes the last row to per_x * A[0] + per_y * A[1] + (0, 0, 1).
+
+        Args:
+            per_x: Perspective x values (scalar or (N,) array)
+            per_y: Perspective y values (scalar or (N,) array)
+            sx: Scales in x direction (scalar or (N,) array)
+            sy: Scales in y direction (scalar or (N,) array)
+            shear_theta: Shear angles in radians (scalar or (N,) array)
+            theta: Rotation angles in radians (scalar or (N,) array)
+            tx: Translation x distances (scalar or (N,) array)
+            ty: Translation y distances (scalar or (N,) array)
+
+        Returns:
+            TransformBatch2D with (N, 3, 3) matrices.
+        """
+        per_x, per_y, sx, sy, shear_theta, theta, tx, ty = cls.broadcast_params(
+            per_x, per_y, sx, sy, shear_theta, theta, tx, ty)
+        Ms = AffineTransform2D.from_params(sx, sy, shear_theta, theta, tx, ty).Ms
+        Ms[:, 2, :] += per_x[:, None] * Ms[:, 0, :] + per_y[:, None] * Ms[:, 1, :]
+        return TransformBatch2D(Ms, model=cls)
         
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@ import numpy as np
 from src.transforms.transform_base import TransformBase2D
 from src.transforms.rotation import RotationTransform2D
 from src.transforms.translation import TranslationTransform2D
+from src.transforms.batch import TransformBatch2D
 
 
 class RigidTransform2D(TransformBase2D):
@@ -12,6 +13,9 @@ class RigidTransform2D(TransformBase2D):
     Preserves: lengths, angles, parallelism, straight lines.
     """
 
+    # Constructor parameters in order, used by get_decomposed_params_from_Ms.
+    params_dtype = np.dtype([("theta", float), ("tx", float), ("ty", float)])
+
     def __init__(self, theta: float = 0., tx: int = 0, ty: int = 0) -> None:
         """
         Default is no change.
@@ -115,8 +119,11 @@ class RigidTransform2D(TransformBase2D):
 
     def update_M(self) -> None:
         """
-        Update M with instance variables.
+        Update M with instance variables, or only mark M
+        as out of date if updates are deferred.
         """
+        if self.defer_update():
+            return
         super().reset()
         self._M = self._translation.M @ self._rotation.M
 
@@ -128,12 +135,95 @@ class RigidTransform2D(TransformBase2D):
         Returns:
             (rotation transform, translation transform)
         """
-        theta = math.atan2(self._M[1][0], self._M[0][0])
+        M = self.M
+        theta = math.atan2(M[1][0], M[0][0])
         rotation = RotationTransform2D(theta)
-        tx, ty = self._M[0][2], self._M[1][2]
+        tx, ty = M[0][2], M[1][2]
         translation = TranslationTransform2D(tx, ty)
         return rotation, translation
 
+    @staticmethod
+    def get_decomposed_params_from_Ms(Ms: np.ndarray) -> np.ndarray:
+        """
+        Decompose N rigid matrices at once into their parameters.
+
+        Args:
+            Ms: (N, 3, 3) rigid transform matrices.
+
+        Returns:
+            (N,) structured array with the fields of RigidTransform2D.params_dtype.
+        """
+        Ms = np.asarray(Ms, dtype=float).reshape(-1, 3, 3)
+        params = np.empty(Ms.shape[0], dtype=RigidTransform2D.params_dtype)
+        params["theta"] = np.arctan2(Ms[:, 1, 0], Ms[:, 0, 0])
+        params["tx"] = Ms[:, 0, 2]
+        params["ty"] = Ms[:, 1, 2]
+        return params
+
+    def calculate_inv_M(self) -> np.ndarray:
+        """
+        The inverse of [R | t] is [R^T | -R^T t].
+
+        Returns:
+            The inverse (M^-1).
+        """
+        M = self.M
+        inv_M = np.identity(3, dtype=float)
+        inv_M[:2, :2] = M[:2, :2].T
+        inv_M[:2, 2] = -inv_M[:2, :2] @ M[:2, 2]
+        return inv_M
+
+    @classmethod
+    def from_M(cls, M: np.ndarray) -> "RigidTransform2D":
+        """
+        Construct a RigidTransform2D object from a 3x3 matrix. M is
+        projected onto the model by rebuilding it from its angle and
+        translation, so any scale or shear is dropped. The rotation and
+        translation components are only built from M when they are first accessed.
+
+        Args:
+            M: A 3x3 matrix.
+
+        Returns:
+            A RigidTransform2D instance.
+        """
+        assert M.shape == (3, 3)
+        theta = math.atan2(M[1][0], M[0][0])
+        cos, sin = math.cos(theta), math.sin(theta)
+        return cls._new_from_M(np.array([[cos, -sin, M[0][2]], [sin, cos, M[1][2]], [0., 0., 1.]], dtype=float))
+
+    def build_components(self) -> None:
+        """
+        Build the rotation and translation transforms by decomposing M.
+        """
+        self._rotation, self._translation = self.get_decomposed()
+        self._DoF = self._rotation.DoF + self._translation.DoF
+
+    @classmethod
+    def from_params(cls, theta: np.ndarray, tx: np.ndarray, ty: np.ndarray) -> TransformBatch2D:
+        """
+        Vectorized constructor for N rigid transforms without creating
+        N transform objects. Fills translation @ rotation directly.
+
+        Args:
+            theta: Rotation angles in radians (scalar or (N,) array)
+            tx: Translation x distances (scalar or (N,) array)
+            ty: Translation y distances (scalar or (N,) array)
+
+        Returns:
+            TransformBatch2D with (N, 3, 3) matrices.
+        """
+        theta, tx, ty = cls.broadcast_params(theta, tx, ty)
+        cos, sin = np.cos(theta), np.sin(theta)
+        Ms = cls.identity_stack(theta.shape[0])
+        Ms[:, 0, 0] = cos
+        Ms[:, 0, 1] = -sin
+        Ms[:, 1, 0] = sin
+        Ms[:, 1, 1] = cos
+        Ms[:, 0, 2] = tx
+        Ms[:, 1, 2] = ty
+        return TransformBatch2D(Ms, model=cls)
+
 
 if __name__ == "__main__":
     pass
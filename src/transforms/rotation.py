@@ -2,6 +2,7 @@ from typing import Optional
 import math
 import numpy as np
 from src.transforms.transform_base import TransformBase2D
+from src.transforms.batch import TransformBatch2D
 
 
 class RotationTransform2D(TransformBase2D):
@@ -48,8 +49,11 @@ class RotationTransform2D(TransformBase2D):
 
     def update_M(self) -> None:
         """
-        Update M with instance variables.
+        Update M with instance variables, or only mark M
+        as out of date if updates are deferred.
         """
+        if self.defer_update():
+            return
         super().reset()
         self._M[0][0] = math.cos(self._theta)
         self._M[0][1] = -math.sin(self._theta)
@@ -72,6 +76,61 @@ class RotationTransform2D(TransformBase2D):
             return math.atan2(self._M[1][0], self._M[0][0])
         else:
             return math.atan2(m[1][0], m[0][0])
+
+    def calculate_inv_M(self) -> np.ndarray:
+        """
+        The inverse of a rotation matrix is its transpose.
+
+        Returns:
+            The inverse (M^-1).
+        """
+        return self.M.T.copy()
+
+    def inverse(self) -> "RotationTransform2D":
+        """
+        Get the inverse transform.
+
+        Returns:
+            New RotationTransform2D with negated theta.
+        """
+        transform = RotationTransform2D(-self._theta)
+        transform.from_origin = self._from_origin
+        return transform
+
+    @classmethod
+    def from_M(cls, M: np.ndarray) -> "RotationTransform2D":
+        """
+        Construct a RotationTransform2D object from a 3x3 matrix.
+
+        Args:
+            M: A 3x3 matrix.
+
+        Returns:
+            A RotationTransform2D instance.
+        """
+        assert M.shape == (3, 3)
+        return cls(math.atan2(M[1][0], M[0][0]))
+
+    @classmethod
+    def from_params(cls, theta: np.ndarray) -> TransformBatch2D:
+        """
+        Vectorized constructor for N rotations
+        without creating N transform objects.
+
+        Args:
+            theta: Rotation angles in radians (scalar or (N,) array)
+
+        Returns:
+            TransformBatch2D with (N, 3, 3) matrices.
+        """
+        theta, = cls.broadcast_params(theta)
+        cos, sin = np.cos(theta), np.sin(theta)
+        Ms = cls.identity_stack(theta.shape[0])
+        Ms[:, 0, 0] = cos
+        Ms[:, 0, 1] = -sin
+        Ms[:, 1, 0] = sin
+        Ms[:, 1, 1] = cos
+        return TransformBatch2D(Ms, model=cls)
         
         
 if __name__ == "__main__":
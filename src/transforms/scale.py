@@ -1,4 +1,6 @@
+import numpy as np
 from src.transforms.transform_base import TransformBase2D
+from src.transforms.batch import TransformBatch2D
 
 
 class ScaleTransform2D(TransformBase2D):
@@ -70,12 +72,70 @@ class ScaleTransform2D(TransformBase2D):
 
     def update_M(self) -> None:
         """
-        Reset M with instance variables.
+        Update M with instance variables, or only mark M
+        as out of date if updates are deferred.
         """
+        if self.defer_update():
+            return
         super().reset()
         self._M[0][0] = self._sx
         self._M[1][1] = self._sy
 
+    def calculate_inv_M(self) -> np.ndarray:
+        """
+        The inverse scales by the reciprocals.
+
+        Returns:
+            The inverse (M^-1).
+        """
+        M = self.M
+        return np.diag([1. / M[0, 0], 1. / M[1, 1], 1.])
+
+    def inverse(self) -> "ScaleTransform2D":
+        """
+        Get the inverse transform.
+
+        Returns:
+            New ScaleTransform2D with reciprocal scales.
+        """
+        transform = ScaleTransform2D(1. / self._sx, 1. / self._sy)
+        transform.from_origin = self._from_origin
+        return transform
+
+    @classmethod
+    def from_M(cls, M: np.ndarray) -> "ScaleTransform2D":
+        """
+        Construct a ScaleTransform2D object from
+        the diagonal of a 3x3 matrix.
+
+        Args:
+            M: A 3x3 matrix.
+
+        Returns:
+            A ScaleTransform2D instance.
+        """
+        assert M.shape == (3, 3)
+        return cls(M[0][0].item(), M[1][1].item())
+
+    @classmethod
+    def from_params(cls, sx: np.ndarray, sy: np.ndarray) -> TransformBatch2D:
+        """
+        Vectorized constructor for N scalings
+        without creating N transform objects.
+
+        Args:
+            sx: Scales in x direction (scalar or (N,) array)
+            sy: Scales in y direction (scalar or (N,) array)
+
+        Returns:
+            TransformBatch2D with (N, 3, 3) matrices.
+        """
+        sx, sy = cls.broadcast_params(sx, sy)
+        Ms = cls.identity_stack(sx.shape[0])
+        Ms[:, 0, 0] = sx
+        Ms[:, 1, 1] = sy
+        return TransformBatch2D(Ms, model=cls)
+
 
 if __name__ == "__main__":
     pass
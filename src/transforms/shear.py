@@ -2,6 +2,7 @@ from typing import Optional
 import math
 import numpy as np
 from src.transforms.transform_base import TransformBase2D
+from src.transforms.batch import TransformBatch2D
 
 
 class ShearTransform2D(TransformBase2D):
@@ -45,8 +46,11 @@ class ShearTransform2D(TransformBase2D):
 
     def update_M(self) -> None:
         """
-        Update M with instance variables.
+        Update M with instance variables, or only mark M
+        as out of date if updates are deferred.
         """
+        if self.defer_update():
+            return
         super().reset()
         self._M[0][1] = np.tan(self._theta)
 
@@ -66,6 +70,59 @@ class ShearTransform2D(TransformBase2D):
         else:
             return math.atan(m[0][1])
 
+    def calculate_inv_M(self) -> np.ndarray:
+        """
+        The inverse shears by the negated tangent.
+
+        Returns:
+            The inverse (M^-1).
+        """
+        inv_M = np.identity(3, dtype=float)
+        inv_M[0, 1] = -self.M[0, 1]
+        return inv_M
+
+    def inverse(self) -> "ShearTransform2D":
+        """
+        Get the inverse transform.
+
+        Returns:
+            New ShearTransform2D with negated theta.
+        """
+        transform = ShearTransform2D(-self._theta)
+        transform.from_origin = self._from_origin
+        return transform
+
+    @classmethod
+    def from_M(cls, M: np.ndarray) -> "ShearTransform2D":
+        """
+        Construct a ShearTransform2D object from a 3x3 matrix.
+
+        Args:
+            M: A 3x3 matrix.
+
+        Returns:
+            A ShearTransform2D instance.
+        """
+        assert M.shape == (3, 3)
+        return cls(math.atan(M[0][1]))
+
+    @classmethod
+    def from_params(cls, theta: np.ndarray) -> TransformBatch2D:
+        """
+        Vectorized constructor for N shears
+        without creating N transform objects.
+
+        Args:
+            theta: Shear angles in radians (scalar or (N,) array)
+
+        Returns:
+            TransformBatch2D with (N, 3, 3) matrices.
+        """
+        theta, = cls.broadcast_params(theta)
+        Ms = cls.identity_stack(theta.shape[0])
+        Ms[:, 0, 1] = np.tan(theta)
+        return TransformBatch2D(Ms, model=cls)
+
 
 if __name__ == "__main__":
     pass
@@ -4,6 +4,7 @@ import numpy as np
 from src.transforms.transform_base import TransformBase2D
 from src.transforms.rigid import RigidTransform2D
 from src.transforms.scale import ScaleTransform2D
+from src.transforms.batch import TransformBatch2D
 
 
 class SimilarityTransform2D(TransformBase2D):
@@ -12,6 +13,9 @@ class SimilarityTransform2D(TransformBase2D):
     Preserves: angles, parallelism, straight lines.
     """
 
+    # Constructor parameters in order, used by get_decomposed_params_from_Ms.
+    params_dtype = np.dtype([("sx", float), ("sy", float), ("theta", float), ("tx", float), ("ty", float)])
+
     def __init__(self, sx: float = 1., sy: float = 1., theta: float = 0., tx: int = 0, ty: int = 0) -> None:
         """
         Default is no change.
@@ -121,7 +125,7 @@ class SimilarityTransform2D(TransformBase2D):
         Returns:
             Translation distance
         """
-        return self._tx
+        return self._rigid.tx
 
     @tx.setter
     def tx(self, new_tx: int) -> None:
@@ -131,7 +135,7 @@ class SimilarityTransform2D(TransformBase2D):
         Args:
             new_tx: New translation distance
         """
-        self._tx = new_tx
+        self._rigid.tx = new_tx
         self.update_M()
 
     @property
@@ -142,7 +146,7 @@ class SimilarityTransform2D(TransformBase2D):
         Returns:
             Translation distance
         """
-        return self._ty
+        return self._rigid.ty
 
     @ty.setter
     def ty(self, new_ty: int) -> None:
@@ -152,13 +156,16 @@ class SimilarityTransform2D(TransformBase2D):
         Args:
             new_ty: New translation distance
         """
-        self._ty = new_ty
+        self._rigid.ty = new_ty
         self.update_M()
 
     def update_M(self) -> None:
         """
-        Update M with instance variables.
+        Update M with instance variables, or only mark M
+        as out of date if updates are deferred.
         """
+        if self.defer_update():
+            return
         super().reset()
         self._M = self._rigid.M @ self._scale.M
 
@@ -170,14 +177,103 @@ class SimilarityTransform2D(TransformBase2D):
         Returns:
             (scale transform, rigid transform)
         """
-        s = math.sqrt(self._M[0][0]**2 + self._M[1][0]**2)
+        M = self.M
+        s = math.sqrt(M[0][0]**2 + M[1][0]**2)
         scale = ScaleTransform2D(s, s)
-        rotation_m = self._M[:2, :2] / s
+        rotation_m = M[:2, :2] / s
         theta = math.atan2(rotation_m[1][0], rotation_m[0][0])
-        tx, ty = self._M[0][2], self._M[1][2]
+        tx, ty = M[0][2], M[1][2]
         rigid = RigidTransform2D(theta, tx, ty)
         return scale, rigid
 
+    @staticmethod
+    def get_decomposed_params_from_Ms(Ms: np.ndarray) -> np.ndarray:
+        """
+        Decompose N similarity matrices at once into their parameters.
+
+        Args:
+            Ms: (N, 3, 3) similarity transform matrices.
+
+        Returns:
+            (N,) structured array with the fields of SimilarityTransform2D.params_dtype.
+        """
+        Ms = np.asarray(Ms, dtype=float).reshape(-1, 3, 3)
+        params = np.empty(Ms.shape[0], dtype=SimilarityTransform2D.params_dtype)
+        params["sx"] = params["sy"] = np.hypot(Ms[:, 0, 0], Ms[:, 1, 0])
+        params["theta"] = np.arctan2(Ms[:, 1, 0], Ms[:, 0, 0])
+        params["tx"] = Ms[:, 0, 2]
+        params["ty"] = Ms[:, 1, 2]
+        return params
+
+    def calculate_inv_M(self) -> np.ndarray:
+        """
+        The inverse of [s R | t] is [R^T / s | -R^T t / s],
+        and R^T / s = (s R)^T / s^2.
+
+        Returns:
+            The inverse (M^-1).
+        """
+        M = self.M
+        inv_M = np.identity(3, dtype=float)
+        inv_M[:2, :2] = M[:2, :2].T / (M[0, 0]**2 + M[1, 0]**2)
+        inv_M[:2, 2] = -inv_M[:2, :2] @ M[:2, 2]
+        return inv_M
+
+    @classmethod
+    def from_M(cls, M: np.ndarray) -> "SimilarityTransform2D":
+        """
+        Construct a SimilarityTransform2D object from a 3x3 matrix. M is
+        projected onto the model by rebuilding it from the first column
+        (s cos(theta), s sin(theta)) and the translation, so any non-uniform
+        scale or shear is dropped. The scale and rigid components are only
+        built from M when they are first accessed.
+
+        Args:
+            M: A 3x3 matrix.
+
+        Returns:
+            A SimilarityTransform2D instance.
+        """
+        assert M.shape == (3, 3)
+        a, b = float(M[0][0]), float(M[1][0])
+        return cls._new_from_M(np.array([[a, -b, M[0][2]], [b, a, M[1][2]], [0., 0., 1.]], dtype=float))
+
+    def build_components(self) -> None:
+        """
+        Build the scale and rigid transforms by decomposing M.
+        """
+        self._scale, self._rigid = self.get_decomposed()
+        self._DoF = self._scale.DoF + self._rigid.DoF
+
+    @classmethod
+    def from_params(cls, sx: np.ndarray, sy: np.ndarray, theta: np.ndarray,
+                    tx: np.ndarray, ty: np.ndarray) -> TransformBatch2D:
+        """
+        Vectorized constructor for N similarity transforms without
+        creating N transform objects. Fills rigid @ scale directly.
+
+        Args:
+            sx: Scales in x direction (scalar or (N,) array)
+            sy: Scales in y direction, must equal sx (scalar or (N,) array)
+            theta: Rotation angles in radians (scalar or (N,) array)
+            tx: Translation x distances (scalar or (N,) array)
+            ty: Translation y distances (scalar or (N,) array)
+
+        Returns:
+            TransformBatch2D with (N, 3, 3) matrices.
+        """
+        sx, sy, theta, tx, ty = cls.broadcast_params(sx, sy, theta, tx, ty)
+        assert np.array_equal(sx, sy)  # uniform scaling
+        cos, sin = sx * np.cos(theta), sx * np.sin(theta)
+        Ms = cls.identity_stack(sx.shape[0])
+        Ms[:, 0, 0] = cos
+        Ms[:, 0, 1] = -sin
+        Ms[:, 1, 0] = sin
+        Ms[:, 1, 1] = cos
+        Ms[:, 0, 2] = tx
+        Ms[:, 1, 2] = ty
+        return TransformBatch2D(Ms, model=cls)
+
 
 if __name__ == "__main__":
     pass
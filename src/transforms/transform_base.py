@@ -1,8 +1,16 @@
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Iterator, Dict, FrozenSet
+from contextlib import contextmanager
+import inspect
 import numpy as np
 import math
 
 
+# Constructor parameter names of each transform class, used by set_params.
+_param_names: Dict[type, FrozenSet[str]] = {}
+# Copied for the initial M, which is cheaper than building a new identity.
+_IDENTITY = np.identity(3)
+
+
 class TransformBase2D:
     """
     Base class for all other transforms. Currently implemented
@@ -12,6 +20,7 @@ class TransformBase2D:
     
     all_components = ["_translation", "_rotation", "_scale", "_shear",
                       "_perspective", "_rigid", "_similarity", "_affine"]
+    _component_names = frozenset(all_components)
 
     def __init__(self) -> None:
         """
@@ -19,12 +28,20 @@ class TransformBase2D:
         freedom to -1. By default, objects will be transformed
         from their center (not from the canvas origin).
         """
-        self._M: np.ndarray = np.array([
-            [1., 0., 0.],
-            [0., 1., 0.],
-            [0., 0., 1.]], dtype=float)
+        self._M: np.ndarray = _IDENTITY.copy()
         self._DoF: int = -1
         self._from_origin: bool = False
+        # Inverse of M and the bytes of the M it was calculated from.
+        self._inv_M: Optional[np.ndarray] = None
+        self._inv_key: Optional[bytes] = None
+        # Deferred updates (see lazy and deferred_updates).
+        self._lazy: bool = False
+        self._dirty: bool = False
+        self._defer_depth: int = 0
+        self._deferred_components: List["TransformBase2D"] = []
+        self._rebuilding: bool = False
+        # Components are built from M on first access (see from_M of composites).
+        self._components_from_M: bool = False
     
     def __repr__(self) -> str:
         """
@@ -35,7 +52,7 @@ class TransformBase2D:
             the transforms that compose the transform.
         """
         formatter = {'float_kind': lambda x: "%.4f" % x}
-        matrix_str = np.array2string(self._M, formatter=formatter, prefix='    ', separator='  ')
+        matrix_str = np.array2string(self.M, formatter=formatter, prefix='    ', separator='  ')
         rep = f"{self.__class__.__name__}:\n    {matrix_str}"
         components = self.get_components()
         if components:
@@ -49,11 +66,14 @@ class TransformBase2D:
     @property
     def M(self) -> np.ndarray:
         """
-        The transformation matrix.
+        The transformation matrix. If updates were
+        deferred, M is rebuilt here first.
 
         Returns:
             3x3 numpy array
         """
+        if self._dirty:
+            self._rebuild_M()
         return self._M
 
     @M.setter
@@ -65,6 +85,8 @@ class TransformBase2D:
             new_M: The new matrix to set.
         """
         self._M = new_M
+        self._inv_key = None
+        self._dirty = False
 
     @property
     def DoF(self) -> int:
@@ -75,6 +97,8 @@ class TransformBase2D:
         Returns:
             Degrees of freedom
         """
+        if self._components_from_M:
+            self._materialize_components()
         return self._DoF
 
     @DoF.setter
@@ -110,12 +134,131 @@ class TransformBase2D:
         """
         self._from_origin = new_from_origin
 
+    @property
+    def lazy(self) -> bool:
+        """
+        Whether updates of M are deferred until M is read. Parameter
+        setters then only mark M as out of date, so setting several
+        parameters of a composite transform rebuilds M once.
+
+        Returns:
+            True if M is rebuilt lazily.
+        """
+        return self._lazy
+
+    @lazy.setter
+    def lazy(self, new_lazy: bool) -> None:
+        """
+        Set new value for this transform and its components.
+        M is rebuilt when lazy is turned off.
+
+        Args:
+            new_lazy: Whether to rebuild M lazily.
+        """
+        for component in self.get_components():
+            component.lazy = new_lazy
+        self._lazy = new_lazy
+        if not new_lazy and self._dirty:
+            self._rebuild_M()
+
+    def defer_update(self) -> bool:
+        """
+        Called first by update_M of the subclasses. If
+        updates are deferred, mark M as out of date instead.
+
+        Returns:
+            True if update_M should return without rebuilding M.
+        """
+        if (self._lazy or self._defer_depth) and not self._rebuilding:
+            self._dirty = True
+            return True
+        return False
+
+    def _rebuild_M(self) -> None:
+        """
+        Rebuild an out of date M with update_M.
+        """
+        self._dirty = False
+        self._rebuilding = True
+        try:
+            self.update_M()
+        finally:
+            self._rebuilding = False
+
+    def update_M(self) -> None:
+        """
+        Update M with instance variables. Implemented by subclasses.
+        """
+        pass
+
+    def _begin_deferred(self) -> None:
+        """
+        Start deferring updates of this transform and its components.
+        """
+        self._defer_depth += 1
+        self._deferred_components = self.get_components()
+        for component in self._deferred_components:
+            component._begin_deferred()
+
+    def _end_deferred(self) -> None:
+        """
+        Stop deferring updates. Components finish first, then M is
+        rebuilt once if it is out of date (unless the transform is lazy).
+        """
+        for component in self._deferred_components:
+            component._end_deferred()
+        self._defer_depth -= 1
+        if self._dirty and not self._defer_depth and not self._lazy:
+            self._rebuild_M()
+
+    @contextmanager
+    def deferred_updates(self) -> Iterator["TransformBase2D"]:
+        """
+        Context manager to set several parameters and rebuild M
+        once at the end, instead of once per parameter. Components
+        also defer their updates until the end.
+
+        Yields:
+            This transform.
+        """
+        self._begin_deferred()
+        try:
+            yield self
+        finally:
+            self._end_deferred()
+
+    def set_params(self, **params: Any) -> None:
+        """
+        Set several constructor parameters at once, for example
+        set_params(sx=2.0, theta=0.5), and rebuild M once.
+
+        Args:
+            params: Constructor parameter names and new values.
+
+        Raises:
+            TypeError: If a name is not a constructor parameter.
+        """
+        cls = type(self)
+        names = _param_names.get(cls)
+        if names is None:
+            names = _param_names[cls] = frozenset(inspect.signature(cls.__init__).parameters) - {"self"}
+        for name in params:
+            if name not in names:
+                raise TypeError(f"{cls.__name__} has no parameter {name}.")
+        self._begin_deferred()
+        try:
+            for name, value in params.items():
+                setattr(self, name, value)
+        finally:
+            self._end_deferred()
+
     def reset(self) -> None:
         """
         Reset M to the same 3x3 identity matrix that
         the instance was initialized with.
         """
         self._M = np.identity(3, dtype=float)
+        self._inv_key = None
     
     def get_components(self) -> List["TransformBase2D"]:
         """
@@ -127,8 +270,10 @@ class TransformBase2D:
         Returns:
             The transform component transforms.
         """
+        if self._components_from_M:
+            self._materialize_components()
         instance_vars = vars(self)
-        components = [value for key, value in instance_vars.items() if key in self.all_components]
+        components = [value for key, value in instance_vars.items() if key in self._component_names]
         return components
 
     def to_degrees(self, radians: float) -> float:
@@ -164,19 +309,151 @@ class TransformBase2D:
         as a 2D line or 3D normal (page 34).
 
         Returns:
-            The transposed inverse (M^-1)^T.
+            The transposed inverse (M^-1)^T (read only).
         """
-        return np.linalg.inv(self._M).T
+        return self.get_inv_M().T
 
     def get_inv_M(self) -> np.ndarray:
         """
         Get the inverse of M, which can be used to
-        reverse the transformation applied with M.
+        reverse the transformation applied with M. The inverse
+        is cached until M changes, including changes made to M
+        inplace, so it is returned read only.
+
+        Returns:
+            The inverse (M^-1) (read only).
+        """
+        key = self.M.tobytes()
+        if self._inv_key != key:
+            inv_M = self.calculate_inv_M()
+            inv_M.flags.writeable = False
+            self._inv_M, self._inv_key = inv_M, key
+        return self._inv_M
+
+    def calculate_inv_M(self) -> np.ndarray:
+        """
+        Calculate the inverse of M without the cache. Subclasses
+        override this with exact closed forms where the structure
+        of M allows.
 
         Returns:
             The inverse (M^-1).
         """
-        return np.linalg.inv(self._M)
+        return np.linalg.inv(self.M)
+
+    def inverse(self) -> "TransformBase2D":
+        """
+        Get the inverse transform as a new transform of the
+        same type, built from the inverse of M with from_M. For
+        projective transforms the new M equals M^-1 up to scale.
+
+        Returns:
+            The inverse transform.
+        """
+        transform = type(self).from_M(self.get_inv_M())
+        transform.from_origin = self._from_origin
+        return transform
+
+    @classmethod
+    def from_M(cls, M: np.ndarray) -> "TransformBase2D":
+        """
+        Construct a transform object from a 3x3 matrix. Subclasses
+        override this to decompose M into their parameters.
+
+        Args:
+            M: A 3x3 matrix.
+
+        Returns:
+            A transform instance with a copy of M.
+        """
+        assert M.shape == (3, 3)
+        transform = cls()
+        transform.M = np.array(M, dtype=float)
+        return transform
+
+    @classmethod
+    def _new_from_M(cls, M: np.ndarray) -> "TransformBase2D":
+        """
+        Construct a composite transform that only holds M. The
+        components are built from M when they are first accessed,
+        so callers that only read M don't allocate them.
+
+        Args:
+            M: A 3x3 matrix, which is not copied.
+
+        Returns:
+            A transform instance of cls.
+        """
+        transform = cls.__new__(cls)
+        TransformBase2D.__init__(transform)
+        transform._M = M
+        transform._components_from_M = True
+        return transform
+
+    def _materialize_components(self) -> None:
+        """
+        Build the components from M if they were not built yet.
+        """
+        if self._components_from_M:
+            self._components_from_M = False
+            self.build_components()
+
+    def build_components(self) -> None:
+        """
+        Build the component transforms and DoF by decomposing M.
+        Implemented for rigid, similarity, affine, and projective
+        transformation subclasses.
+        """
+        raise NotImplementedError
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Only called when an attribute is not found. Build the
+        components of a transform constructed with _new_from_M
+        when one of them is accessed.
+
+        Args:
+            name: The attribute name.
+
+        Returns:
+            The component.
+        """
+        if name in TransformBase2D._component_names and self.__dict__.get("_components_from_M"):
+            self._materialize_components()
+            return self.__dict__[name]
+        raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{name}'")
+
+    @staticmethod
+    def broadcast_params(*params: Any) -> List[np.ndarray]:
+        """
+        Broadcast scalar or array parameters to 1D float arrays of
+        the same length. Used by the vectorized from_params constructors.
+
+        Args:
+            params: Scalars or array-likes.
+
+        Returns:
+            One (N,) array per parameter.
+        """
+        arrays = np.broadcast_arrays(*[np.asarray(p, dtype=float) for p in params])
+        if arrays[0].ndim > 1:
+            raise ValueError(f"Parameters must be scalars or 1D arrays, not shape {arrays[0].shape}.")
+        return [np.atleast_1d(a) for a in arrays]
+
+    @staticmethod
+    def identity_stack(n: int) -> np.ndarray:
+        """
+        Make N 3x3 identity matrices.
+
+        Args:
+            n: Number of matrices.
+
+        Returns:
+            (N, 3, 3) array
+        """
+        Ms = np.zeros((n, 3, 3))
+        Ms[:, 0, 0] = Ms[:, 1, 1] = Ms[:, 2, 2] = 1.0
+        return Ms
 
     def get_decomposed(self) -> Any:
         """
@@ -185,6 +462,14 @@ class TransformBase2D:
         """
         raise NotImplementedError
 
+    @staticmethod
+    def get_decomposed_params_from_Ms(Ms: np.ndarray) -> np.ndarray:
+        """
+        Batched version of get_decomposed_from_M. Implemented for rigid,
+        similarity, affine, and projective transformation subclasses.
+        """
+        raise NotImplementedError
+
     def __eq__(self, other: "TransformBase2D") -> bool:
         """
         Determine whether two transform matrices are equal.
@@ -195,7 +480,7 @@ class TransformBase2D:
         Returns:
             True if equal, False if not equal.
         """
-        return np.allclose(self._M, other.M)
+        return np.allclose(self.M, other.M)
 
     def normalize_M(self) -> None:
         """
@@ -214,7 +499,8 @@ class TransformBase2D:
         Returns:
             The transform matrix with bottom right value equal to 1.
         """
-        return self._M / self._M[2, 2]
+        M = self.M
+        return M / M[2, 2]
         
         
 if __name__ == "__main__":
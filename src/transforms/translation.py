@@ -1,5 +1,6 @@
 import numpy as np
 from src.transforms.transform_base import TransformBase2D
+from src.transforms.batch import TransformBatch2D
 
 
 class TranslationTransform2D(TransformBase2D):
@@ -73,6 +74,62 @@ class TranslationTransform2D(TransformBase2D):
         self._M[0][2] = self._tx
         self._M[1][2] = self._ty
 
+    def calculate_inv_M(self) -> np.ndarray:
+        """
+        The inverse translates by the negated distances.
+
+        Returns:
+            The inverse (M^-1).
+        """
+        inv_M = np.identity(3, dtype=float)
+        inv_M[:2, 2] = -self.M[:2, 2]
+        return inv_M
+
+    def inverse(self) -> "TranslationTransform2D":
+        """
+        Get the inverse transform.
+
+        Returns:
+            New TranslationTransform2D with negated distances.
+        """
+        transform = TranslationTransform2D(-self._tx, -self._ty)
+        transform.from_origin = self._from_origin
+        return transform
+
+    @classmethod
+    def from_M(cls, M: np.ndarray) -> "TranslationTransform2D":
+        """
+        Construct a TranslationTransform2D object from
+        the last column of a 3x3 matrix.
+
+        Args:
+            M: A 3x3 matrix.
+
+        Returns:
+            A TranslationTransform2D instance.
+        """
+        assert M.shape == (3, 3)
+        return cls(M[0][2].item(), M[1][2].item())
+
+    @classmethod
+    def from_params(cls, tx: np.ndarray, ty: np.ndarray) -> TransformBatch2D:
+        """
+        Vectorized constructor for N translations
+        without creating N transform objects.
+
+        Args:
+            tx: Translation x distances (scalar or (N,) array)
+            ty: Translation y distances (scalar or (N,) array)
+
+        Returns:
+            TransformBatch2D with (N, 3, 3) matrices.
+        """
+        tx, ty = cls.broadcast_params(tx, ty)
+        Ms = cls.identity_stack(tx.shape[0])
+        Ms[:, 0, 2] = tx
+        Ms[:, 1, 2] = ty
+        return TransformBatch2D(Ms, model=cls)
+
 
 if __name__ == "__main__":
     pass
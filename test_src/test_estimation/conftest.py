@@ -0,0 +1,16 @@
+from typing import Callable
+import pytest
+import numpy as np
+
+
+def _project(M: np.ndarray, points: np.ndarray) -> np.ndarray:
+    homogenous = np.concatenate([points, np.ones(points.shape[:-1] + (1,))], axis=-1) @ np.swapaxes(M, -1, -2)
+    return homogenous[..., :2] / homogenous[..., 2:]
+
+
+@pytest.fixture
+def project() -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+    """
+    Map (..., N, 2) cartesian points by (..., 3, 3) matrices.
+    """
+    return _project
@@ -0,0 +1,62 @@
+from typing import Callable
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+from src.transforms import *
+from src.estimation.correspondences import hartley_matrix, estimate_transform
+
+
+@pytest.fixture
+def src_fix() -> np.ndarray:
+    return np.random.default_rng(0).uniform(0., 640., (1000, 2))
+
+
+def test_hartley_matrix(src_fix: np.ndarray, project: Callable) -> None:
+    """
+    Centroid at the origin and RMS distance sqrt(2).
+    """
+    normalized = project(hartley_matrix(src_fix), src_fix)
+    assert_allclose(normalized.mean(axis=0), 0.0, atol=1e-12)
+    assert_allclose(np.sqrt((normalized ** 2).sum(axis=1).mean()), np.sqrt(2.0))
+
+
+@pytest.mark.parametrize("transform", (TranslationTransform2D(12.0, -7.0), RigidTransform2D(0.6, 30, -4),
+                                       SimilarityTransform2D(1.7, 1.7, -2.2, 5, 80),
+                                       AffineTransform2D(1.3, 0.8, 0.2, 0.4, -20, 15),
+                                       ProjectiveTransform2D(1e-4, -3e-4, 1.2, 0.9, 0.1, 0.3, 40, -10)))
+@pytest.mark.parametrize("chunk_size", (64, 8192))
+def test_estimate_transform(transform: TransformBase2D, src_fix: np.ndarray, chunk_size: int,
+                            project: Callable) -> None:
+    """
+    Exact correspondences recover the transform, whatever the chunk size.
+    """
+    dst = project(transform.M, src_fix)
+    t = estimate_transform(src_fix, dst, type(transform), chunk_size=chunk_size)
+    assert type(t) is type(transform)
+    assert t.from_origin
+    assert_allclose(t.normalized_M, transform.normalized_M, rtol=1e-7, atol=1e-9)
+
+
+def test_estimate_transform_noisy(src_fix: np.ndarray, project: Callable) -> None:
+    """
+    Same least squares solution as solving the full system at once.
+    """
+    rng = np.random.default_rng(1)
+    dst = project(AffineTransform2D(1.3, 0.8, 0.2, 0.4, -20, 15).M, src_fix) + rng.normal(0., 2., src_fix.shape)
+    t = estimate_transform(src_fix, dst, AffineTransform2D(), chunk_size=100)
+    A = np.concatenate([src_fix, np.ones((src_fix.shape[0], 1))], axis=1)
+    X, *_ = np.linalg.lstsq(A, dst, rcond=None)
+    assert_allclose(t.M[:2], X.T, atol=1e-9)
+
+
+def test_estimate_transform_errors(src_fix: np.ndarray) -> None:
+    """
+    """
+    with pytest.raises(ValueError):
+        estimate_transform(src_fix[:3], src_fix[:3], ProjectiveTransform2D)
+    with pytest.raises(ValueError):
+        estimate_transform(src_fix, src_fix[:10], AffineTransform2D)
+
+
+if __name__ == "__main__":
+    pass
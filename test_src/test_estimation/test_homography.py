@@ -0,0 +1,86 @@
+from typing import Callable
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+from src.estimation.homography import (square_to_quad, adjugate, quad_min_sin, dlt_homography,
+                                       quad_to_quad, quad_to_quad_single)
+
+
+@pytest.fixture
+def src_fix() -> np.ndarray:
+    return np.array([[10., 10.], [20., 10.], [20., 20.], [10., 20.]])
+
+
+@pytest.fixture
+def H_fix() -> np.ndarray:
+    return np.array([[1.2, 0.3, 5.0], [-0.2, 0.9, 12.0], [0.001, -0.002, 1.0]])
+
+
+def test_square_to_quad(src_fix: np.ndarray, project: Callable) -> None:
+    """
+    The unit square corners map to the quad corners.
+    """
+    quad = src_fix + np.array([[0., 0.], [3., 1.], [-2., 4.], [1., -1.]])
+    square = np.array([[0., 0.], [1., 0.], [1., 1.], [0., 1.]])
+    assert_allclose(project(square_to_quad(quad), square), quad, atol=1e-12)
+
+
+def test_adjugate(H_fix: np.ndarray) -> None:
+    """
+    """
+    assert_allclose(adjugate(H_fix), np.linalg.inv(H_fix) * np.linalg.det(H_fix), atol=1e-12)
+
+
+def test_quad_min_sin(src_fix: np.ndarray) -> None:
+    """
+    """
+    assert quad_min_sin(src_fix) == pytest.approx(1.0)
+    collinear = src_fix.copy()
+    collinear[1] = [15., 15.]
+    assert quad_min_sin(collinear) == pytest.approx(0.0)
+
+
+def test_dlt_homography(src_fix: np.ndarray, H_fix: np.ndarray, project: Callable) -> None:
+    """
+    """
+    dst = project(H_fix, src_fix)
+    assert_allclose(dlt_homography(src_fix, dst), H_fix, atol=1e-9)
+
+
+def test_quad_to_quad(src_fix: np.ndarray, H_fix: np.ndarray, project: Callable) -> None:
+    """
+    Single quads use the python float path, stacks are vectorized,
+    and both agree with the DLT.
+    """
+    dst = project(H_fix, src_fix)
+    assert_allclose(quad_to_quad(src_fix, dst), H_fix, atol=1e-9)
+    assert_allclose(np.array(quad_to_quad_single(src_fix.tolist(), dst.tolist())).reshape(3, 3), H_fix, atol=1e-9)
+    rng = np.random.default_rng(0)
+    srcs = src_fix + rng.uniform(-2, 2, (5, 4, 2))
+    dsts = project(H_fix, srcs)
+    assert_allclose(quad_to_quad(srcs, dsts), np.broadcast_to(H_fix, (5, 3, 3)), atol=1e-8)
+    with pytest.raises(ValueError):
+        quad_to_quad(src_fix[:3], dst[:3])
+
+
+def test_quad_to_quad_degenerate(src_fix: np.ndarray) -> None:
+    """
+    Near-degenerate quads fall back to the SVD.
+    """
+    collinear = src_fix.copy()
+    collinear[1] = [15., 15.]
+    assert quad_to_quad_single(collinear.tolist(), src_fix.tolist()) is None
+    H = quad_to_quad(collinear, src_fix)
+    assert_allclose(H, dlt_homography(collinear, src_fix))
+    Hs = quad_to_quad(np.stack([collinear, src_fix]), np.stack([src_fix, src_fix]))
+    assert_allclose(Hs[0], H)
+    assert_allclose(Hs[1], np.identity(3), atol=1e-12)
+    quads = np.random.default_rng(0).uniform(0., 10., (200, 4, 2))
+    tol = 0.3
+    expected = quad_min_sin(quads) < tol
+    assert 0 < expected.sum() < 200
+    assert_array_equal([quad_to_quad_single(q.tolist(), src_fix.tolist(), tol=tol) is None for q in quads], expected)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,92 @@
+from typing import Callable
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+from src.transforms import *
+from src.estimation.irls import robust_weights, weighted_transform, irls_transform, irls_line
+
+
+TRANSFORMS = (TranslationTransform2D(12.0, -7.0), RotationTransform2D(0.4), ScaleTransform2D(1.3, 0.7),
+              ShearTransform2D(0.25), PerspectiveTransform2D(1e-4, -2e-4), RigidTransform2D(0.6, 30, -4),
+              SimilarityTransform2D(1.7, 1.7, -2.2, 5, 80), AffineTransform2D(1.3, 0.8, 0.2, 0.4, -20, 15),
+              ProjectiveTransform2D(1e-4, -3e-4, 1.2, 0.9, 0.1, 0.3, 40, -10))
+
+
+@pytest.mark.parametrize("loss", ("huber", "tukey", "cauchy"))
+def test_robust_weights(loss: str) -> None:
+    """
+    Small residuals keep full weight, large residuals are down weighted.
+    """
+    weights = robust_weights(np.array([0.0, 0.5, 100.0, np.nan]), loss=loss, scale=1.0)
+    assert weights[0] == 1.0
+    assert 0.9 < weights[1] <= 1.0
+    assert weights[2] < 0.05
+    assert weights[3] == 0.0
+    with pytest.raises(ValueError):
+        robust_weights(np.zeros(3), loss="l1")
+
+
+def test_robust_weights_scale() -> None:
+    """
+    The estimated scale is the standard deviation of normal errors, for
+    1D residuals and for the Euclidean lengths of 2D errors.
+    """
+    rng = np.random.default_rng(0)
+    errors = rng.normal(0., 2., (100_000, 2))
+    for residuals, planar in ((np.abs(errors[:, 0]), False), (np.linalg.norm(errors, axis=1), True)):
+        estimated = robust_weights(residuals, loss="tukey", planar=planar)
+        assert_allclose(estimated, robust_weights(residuals, loss="tukey", scale=2.0), atol=0.02)
+
+
+@pytest.mark.parametrize("transform", TRANSFORMS)
+def test_weighted_transform(transform: TransformBase2D, project: Callable) -> None:
+    """
+    Exact correspondences give the transform for any weights. Models without
+    translation are fit about the centroids.
+    """
+    rng = np.random.default_rng(0)
+    src = rng.uniform(0., 640., (50, 2))
+    dst = project(transform.M, src)
+    M = weighted_transform(src, dst, rng.uniform(0.5, 1.0, 50), type(transform))
+    if isinstance(transform, (RotationTransform2D, ScaleTransform2D, ShearTransform2D)):
+        assert_allclose(M[:2, :2], transform.M[:2, :2], atol=1e-9)
+    else:
+        assert_allclose(M, transform.normalized_M, rtol=1e-7, atol=1e-9)
+
+
+@pytest.mark.parametrize("loss", ("huber", "tukey", "cauchy"))
+@pytest.mark.parametrize("transform", TRANSFORMS[5:])
+def test_irls_transform(transform: TransformBase2D, loss: str, project: Callable) -> None:
+    """
+    Batched robust fits stay close to the true transform with 10% gross outliers,
+    which are down weighted, and match solving each problem alone.
+    """
+    rng = np.random.default_rng(0)
+    src = rng.uniform(0., 640., (3, 100, 2))
+    dst = project(transform.M, src)
+    noisy = dst + rng.normal(0., 0.5, dst.shape)
+    outliers = rng.random((3, 100)) < 0.1
+    noisy[outliers] += rng.normal(0., 100., (outliers.sum(), 2))
+    Ms, weights = irls_transform(src, noisy, type(transform), loss=loss)
+    assert Ms.shape == (3, 3, 3) and weights.shape == (3, 100)
+    assert np.linalg.norm(project(Ms, src) - dst, axis=-1).mean() < 0.3
+    # With the scale of 2D errors, about 40% of the inlier distances pass the Huber cutoff.
+    assert weights[outliers].mean() < 0.1 < 0.75 < weights[~outliers].mean()
+    M_single, _ = irls_transform(src[1], noisy[1], type(transform), loss=loss)
+    assert_allclose(M_single, Ms[1])
+
+
+def test_irls_line() -> None:
+    """
+    A single bad point does not move the robust line.
+    """
+    x = np.linspace(0., 10., 20)
+    points = np.stack([x, 2.0 * x + 3.0], axis=-1)
+    points[5] = (4.0, 60.0)
+    coeffs, weights = irls_line(points, loss="tukey")
+    assert_allclose(-coeffs[[0, 2]] / coeffs[1], (2.0, 3.0), atol=1e-6)
+    assert weights[5] == 0.0
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,49 @@
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+from src.estimation.least_squares import affine_least_squares, shear_least_squares, perspective_least_squares
+
+
+@pytest.fixture
+def src_fix() -> np.ndarray:
+    return np.array([[10., 10.], [20., 10.], [20., 20.], [10., 20.]])
+
+
+def test_affine_least_squares(src_fix: np.ndarray) -> None:
+    """
+    Exact for affine data, and the residuals measure the misfit of noisy corners.
+    """
+    M = np.array([[1.5, 0.4, 7.0], [-0.3, 0.8, -2.0], [0.0, 0.0, 1.0]])
+    dst = src_fix @ M[:2, :2].T + M[:2, 2]
+    noisy = dst + np.array([[0.5, 0.0], [0.0, 0.0], [0.0, 0.0], [0.0, 0.0]])
+    Ms, residuals = affine_least_squares(src_fix[None], np.stack([dst, noisy]))
+    assert Ms.shape == (2, 3, 3) and residuals.shape == (2, 4)
+    assert_allclose(Ms[0], M, atol=1e-9)
+    assert_allclose(residuals[0], 0.0, atol=1e-9)
+    mapped = src_fix @ Ms[1, :2, :2].T + Ms[1, :2, 2]
+    assert_allclose(residuals[1], np.linalg.norm(mapped - noisy, axis=-1))
+    # One corner off by 0.5 is spread over all four by least squares.
+    assert_allclose(residuals[1], 0.125)
+
+
+def test_shear_least_squares(src_fix: np.ndarray) -> None:
+    """
+    Translation between the point sets is ignored.
+    """
+    dst = src_fix @ np.array([[1., np.tan(0.3)], [0., 1.]]).T + np.array([4., -2.])
+    assert_allclose(shear_least_squares(src_fix, dst), 0.3)
+
+
+def test_perspective_least_squares(src_fix: np.ndarray) -> None:
+    """
+    Broadcasts one source over a stack of destinations.
+    """
+    pers = np.array([[0.01, -0.02], [0.0, 0.0], [-0.005, 0.003]])
+    w = src_fix @ pers.T + 1.0
+    dst = src_fix[None] / w.T[:, :, None]
+    per_x, per_y = perspective_least_squares(src_fix[None], dst)
+    assert_allclose(np.stack([per_x, per_y], axis=-1), pers, atol=1e-12)
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,57 @@
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+from src.estimation.line_fit import fit_line_groups, fit_lines, line_residuals
+
+
+@pytest.fixture
+def points_fix() -> np.ndarray:
+    x = np.linspace(0., 10., 11)
+    return np.stack([x, 2.0 * x + 3.0], axis=-1)
+
+
+def test_fit_lines(points_fix: np.ndarray) -> None:
+    """
+    Points on y = 2x + 3 have zero distance to the fit line.
+    """
+    coeffs = fit_lines(points_fix)
+    assert_allclose(np.hypot(coeffs[0], coeffs[1]), 1.0)
+    assert_allclose(line_residuals(coeffs, points_fix), 0.0, atol=1e-12)
+
+
+def test_fit_lines_batched(points_fix: np.ndarray) -> None:
+    """
+    Same as fitting one set at a time, and a zero weight removes a point.
+    """
+    rng = np.random.default_rng(0)
+    points = points_fix + rng.normal(0., 0.1, (4,) + points_fix.shape)
+    coeffs = fit_lines(points)
+    for i in range(4):
+        assert_allclose(coeffs[i], fit_lines(points[i]))
+    moved = points_fix.copy()
+    moved[0] = (50., -50.)
+    weights = np.ones(len(moved))
+    weights[0] = 0.
+    assert_allclose(line_residuals(fit_lines(moved, weights), points_fix), 0.0, atol=1e-12)
+
+
+def test_fit_line_groups(points_fix: np.ndarray) -> None:
+    """
+    Same as fitting each group on its own, also far from the origin.
+    """
+    rng = np.random.default_rng(1)
+    points = points_fix + rng.normal(0., 0.1, points_fix.shape) + 1e5
+    offsets = np.array([0, 2, 7, 11])
+    weights = rng.uniform(0.5, 1.0, len(points))
+    coeffs = fit_line_groups(points, offsets, weights)
+    assert coeffs.shape == (3, 3)
+    for g in range(3):
+        s = slice(offsets[g], offsets[g + 1])
+        expected = fit_lines(points[s], weights[s])
+        assert_allclose(coeffs[g] * np.sign(coeffs[g] @ expected), expected, rtol=1e-6, atol=1e-6)
+    with pytest.raises(ValueError):
+        fit_line_groups(points, [0, 5, 5, 11])
+
+
+if __name__ == "__main__":
+    pass
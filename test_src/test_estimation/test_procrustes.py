@@ -0,0 +1,50 @@
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+from src.estimation.procrustes import procrustes_rotation, procrustes_rigid, umeyama_similarity
+
+
+@pytest.fixture
+def src_fix() -> np.ndarray:
+    return np.array([[10., 10.], [20., 10.], [20., 20.], [10., 20.]])
+
+
+def similarity(points: np.ndarray, scale: float, theta: float, tx: float, ty: float) -> np.ndarray:
+    R = scale * np.array([[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]])
+    return points @ R.T + np.array([tx, ty])
+
+
+def test_procrustes_rotation(src_fix: np.ndarray) -> None:
+    """
+    Translation between the point sets is ignored.
+    """
+    dst = similarity(src_fix, 1.0, 0.4, 30.0, -5.0)
+    assert_allclose(procrustes_rotation(src_fix, dst), 0.4)
+
+
+def test_procrustes_rigid(src_fix: np.ndarray) -> None:
+    """
+    """
+    dst = similarity(src_fix, 1.0, -2.5, 30.0, -5.0)
+    assert_allclose(procrustes_rigid(src_fix, dst), (-2.5, 30.0, -5.0), atol=1e-9)
+
+
+def test_umeyama_similarity_batched(src_fix: np.ndarray) -> None:
+    """
+    Broadcasts one source over a stack of destinations.
+    """
+    params = np.array([[2.0, 0.3, 5.0, 1.0], [0.5, -1.2, -4.0, 9.0], [1.0, 3.0, 0.0, 0.0]])
+    dst = np.stack([similarity(src_fix, *p) for p in params])
+    scale, theta, tx, ty = umeyama_similarity(src_fix[None], dst)
+    assert_allclose(np.stack([scale, theta, tx, ty], axis=-1), params, atol=1e-9)
+
+
+def test_shape_mismatch(src_fix: np.ndarray) -> None:
+    """
+    """
+    with pytest.raises(ValueError):
+        procrustes_rigid(src_fix, src_fix[:3])
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,165 @@
+from typing import Callable
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+from src.transforms import *
+from src.estimation.correspondences import estimate_transform
+from src.estimation.line_fit import fit_lines
+from src.estimation.ransac import (sample_indices, degenerate_samples, squared_residuals, inlier_matrix,
+                                   required_iterations, ransac_transform, line_hypotheses,
+                                   ransac_line, ransac_lines)
+
+
+def test_sample_indices() -> None:
+    """
+    Distinct indices, uniform over the points.
+    """
+    idx = sample_indices(np.random.default_rng(0), 6, 4, 60_000)
+    assert idx.shape == (60_000, 4)
+    assert (np.sort(idx, axis=1)[:, 1:] != np.sort(idx, axis=1)[:, :-1]).all()
+    assert_allclose(np.bincount(idx.ravel(), minlength=6) / idx.size, 1 / 6, atol=5e-3)
+
+
+def test_degenerate_samples() -> None:
+    """
+    """
+    pairs = np.array([[[0., 0.], [0., 0.]], [[0., 0.], [1., 0.]]])
+    assert_array_equal(degenerate_samples(pairs), [True, False])
+    triples = np.array([[[0., 0.], [1., 1.], [2., 2.]], [[0., 0.], [1., 0.], [0., 1.]]])
+    assert_array_equal(degenerate_samples(triples), [True, False])
+    quads = np.array([[[0., 0.], [1., 0.], [2., 0.], [0., 1.]], [[0., 0.], [1., 1.], [1., 0.], [0., 1.]]])
+    assert_array_equal(degenerate_samples(quads), [True, False])
+
+
+def test_squared_residuals(project: Callable) -> None:
+    """
+    """
+    src = np.array([[0., 0.], [10., 5.]])
+    Ms = np.stack([np.identity(3), ProjectiveTransform2D(per_x=0.01).M])
+    dst = project(Ms[1], src)
+    residuals = squared_residuals(Ms, src, dst)
+    assert residuals.shape == (2, 2)
+    assert_allclose(residuals[0], ((src - dst) ** 2).sum(axis=1))
+    assert_allclose(residuals[1], 0.0, atol=1e-20)
+
+
+def test_inlier_matrix(project: Callable) -> None:
+    """
+    Chunking the points does not change the residuals or the inliers.
+    """
+    rng = np.random.default_rng(0)
+    src = rng.uniform(0., 100., (50, 2))
+    Ms = np.stack([np.identity(3), AffineTransform2D(1.1, 0.9, 0.1, 0.0, 2., 1.).M,
+                   ProjectiveTransform2D(per_x=0.01).M])
+    dst = project(Ms[2], src) + rng.normal(0., 2., src.shape)
+    residuals = squared_residuals(Ms, src, dst)
+    for chunk_size in (1, 7, 50):
+        assert_allclose(squared_residuals(Ms, src, dst, chunk_size), residuals)
+        assert_array_equal(inlier_matrix(Ms, src, dst, 3.0, chunk_size), residuals < 9.0)
+    stacked = np.broadcast_to(src, (3, 50, 2))
+    assert_allclose(squared_residuals(Ms, stacked, dst, chunk_size=7), residuals)
+
+
+def test_required_iterations() -> None:
+    """
+    """
+    assert required_iterations(1.0, 4, 0.99) == 1.0
+    assert required_iterations(0.0, 4, 0.99) == np.inf
+    assert required_iterations(0.5, 4, 0.99) == pytest.approx(71.4, abs=0.1)
+
+
+@pytest.mark.parametrize("transform", (TranslationTransform2D(12.0, -7.0), RigidTransform2D(0.6, 30, -4),
+                                       SimilarityTransform2D(1.7, 1.7, -2.2, 5, 80),
+                                       AffineTransform2D(1.3, 0.8, 0.2, 0.4, -20, 15),
+                                       ProjectiveTransform2D(1e-4, -3e-4, 1.2, 0.9, 0.1, 0.3, 40, -10)))
+@pytest.mark.parametrize("lo_iterations", (0, 5))
+def test_ransac_transform(transform: TransformBase2D, lo_iterations: int, project: Callable) -> None:
+    """
+    Finds every inlier and no outlier with half of the correspondences replaced,
+    and returns the least squares fit of the inliers (also without local optimization).
+    """
+    rng = np.random.default_rng(0)
+    src = rng.uniform(0., 640., (500, 2))
+    dst = project(transform.M, src) + rng.normal(0., 0.3, src.shape)
+    outliers = rng.random(500) < 0.5
+    dst[outliers] = rng.uniform(0., 640., (outliers.sum(), 2))
+    t, mask = ransac_transform(src, dst, type(transform), threshold=2.0, lo_iterations=lo_iterations,
+                               rng=np.random.default_rng(1))
+    assert type(t) is type(transform)
+    assert t.from_origin
+    assert_array_equal(mask, ~outliers)
+    fit = estimate_transform(src[mask], dst[mask], type(transform))
+    assert_allclose(project(t.M, src), project(fit.M, src), atol=1e-6)
+    assert_allclose(project(t.M, src[mask]), project(transform.M, src[mask]), atol=0.25)
+
+
+def test_ransac_transform_errors() -> None:
+    """
+    """
+    points = np.zeros((5, 2))
+    with pytest.raises(ValueError):
+        ransac_transform(points, points, ShearTransform2D)
+    with pytest.raises(ValueError):
+        ransac_transform(points[:3], points[:3], ProjectiveTransform2D)
+    with pytest.raises(ValueError):
+        ransac_transform(points, points, AffineTransform2D, max_iterations=10)
+
+
+def test_line_hypotheses() -> None:
+    """
+    """
+    points = np.array([[0., 1.], [2., 1.], [3., 3.], [3., 3.]])
+    idx = np.array([[0, 1], [1, 2], [2, 3]])
+    lines = line_hypotheses(points, idx)
+    assert_allclose(np.hypot(lines[:2, 0], lines[:2, 1]), 1.0)
+    for line, pair in zip(lines[:2], idx):
+        assert_allclose(points[pair] @ line[:2] + line[2], 0.0, atol=1e-12)
+    assert np.isnan(lines[2]).all()
+
+
+def test_ransac_lines() -> None:
+    """
+    Finds the three lines among the clutter, and ransac_line finds one of them.
+    """
+    rng = np.random.default_rng(0)
+    t = np.linspace(0., 100., 200)
+    points = np.concatenate([np.stack([t, 0.5 * t + 10.], axis=-1), np.stack([30. + 0. * t, t], axis=-1),
+                             np.stack([t, 100. - t], axis=-1), rng.uniform(0., 100., (100, 2))])
+    points[:600] += rng.normal(0., 0.2, (600, 2))
+    expected = np.array([[-0.5, 1., -10.], [1., 0., -30.], [1., 1., -100.]])
+    expected /= np.hypot(expected[:, 0], expected[:, 1])[:, None]
+    lines, labels = ransac_lines(points, max_lines=5, min_inliers=50, threshold=1.0, rng=np.random.default_rng(1))
+    assert lines.shape == (3, 3)
+    assert labels.shape == (700,)
+    for g in range(3):
+        found = np.bincount(labels[200 * g:200 * (g + 1)] + 1).argmax() - 1
+        assert found >= 0
+        line = lines[found] * np.sign(lines[found] @ expected[g])
+        assert_allclose(line, expected[g], atol=0.2)
+        assert np.count_nonzero(labels[200 * g:200 * (g + 1)] == found) >= 180
+    line, mask = ransac_line(points, threshold=1.0, rng=np.random.default_rng(2))
+    assert_allclose(line, fit_lines(points[mask]), atol=1e-12)
+    assert mask.sum() >= 190
+    with pytest.raises(ValueError):
+        ransac_line(np.zeros((5, 2)), max_iterations=10)
+    assert ransac_lines(np.zeros((5, 2)), min_inliers=2)[0].shape == (0, 3)
+
+
+@pytest.mark.parametrize("lo_iterations", (0, 5))
+def test_ransac_line_accuracy(lo_iterations: int) -> None:
+    """
+    The line is the total least squares fit of its inliers, also without
+    local optimization, so noise averages out over the many inliers.
+    """
+    rng = np.random.default_rng(3)
+    x = rng.uniform(0., 100., 4000)
+    points = np.concatenate([np.stack([x, 0.5 * x + 3.], axis=-1) + rng.normal(0., 1., (4000, 2)),
+                             rng.uniform(0., 100., (1000, 2))])
+    line, mask = ransac_line(points, threshold=2.5, lo_iterations=lo_iterations, rng=np.random.default_rng(1))
+    assert_allclose(line, fit_lines(points[mask]), atol=1e-12)
+    assert -line[2] / line[1] == pytest.approx(3.0, abs=0.03)
+    assert -line[0] / line[1] == pytest.approx(0.5, abs=1e-3)
+
+
+if __name__ == "__main__":
+    pass
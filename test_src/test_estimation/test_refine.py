@@ -0,0 +1,68 @@
+from typing import Callable
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+from src.transforms.projective import ProjectiveTransform2D
+from src.estimation.correspondences import estimate_transform
+from src.estimation.ransac import squared_residuals
+from src.estimation.refine import _residuals_jacobian, refine_homography
+
+
+@pytest.fixture
+def H_fix() -> np.ndarray:
+    return ProjectiveTransform2D(1e-4, -3e-4, 1.2, 0.9, 0.1, 0.3, 40, -10).M
+
+
+def reprojection_error(M: np.ndarray, src: np.ndarray, dst: np.ndarray) -> float:
+    return float(squared_residuals(M[None], src, dst).sum())
+
+
+def test_residuals_jacobian(H_fix: np.ndarray) -> None:
+    """
+    The analytic Jacobian matches central differences.
+    """
+    rng = np.random.default_rng(0)
+    src, dst = rng.normal(size=(1, 10, 2)), rng.normal(size=(1, 10, 2))
+    params = (H_fix / H_fix[2, 2]).ravel()[None, :8] * np.array([1, 1, 0.01, 1, 1, 0.01, 100, 100])
+    _, _, J = _residuals_jacobian(params, src, dst)
+    eps = 1e-6
+    numeric = np.stack([(_residuals_jacobian(params + eps * e, src, dst)[1]
+                         - _residuals_jacobian(params - eps * e, src, dst)[1]) / (2 * eps)
+                        for e in np.identity(8)], axis=-1)
+    assert_allclose(J, numeric, atol=1e-6)
+
+
+def test_refine_homography(H_fix: np.ndarray, project: Callable) -> None:
+    """
+    Lowers the reprojection error of the DLT, and the result is a stationary point
+    reached from a warm start as well.
+    """
+    rng = np.random.default_rng(0)
+    src = rng.uniform(0., 640., (200, 2))
+    dst = project(H_fix, src) + rng.normal(0., 2., src.shape)
+    H_dlt = estimate_transform(src, dst, ProjectiveTransform2D).M
+    H, cost = refine_homography(H_dlt, src, dst)
+    assert cost == pytest.approx(reprojection_error(H, src, dst))
+    assert cost < reprojection_error(H_dlt, src, dst)
+    H_warm, cost_warm = refine_homography(H_fix, src, dst)
+    assert_allclose(H_warm, H, rtol=1e-6, atol=1e-9)
+    assert cost_warm == pytest.approx(cost)
+
+
+def test_refine_homography_batched(H_fix: np.ndarray, project: Callable) -> None:
+    """
+    Same as refining one homography at a time.
+    """
+    rng = np.random.default_rng(1)
+    src = rng.uniform(0., 640., (5, 50, 2))
+    dst = project(H_fix, src) + rng.normal(0., 1., src.shape)
+    H, cost = refine_homography(H_fix, src, dst)
+    assert H.shape == (5, 3, 3) and cost.shape == (5,)
+    for i in range(5):
+        H_i, cost_i = refine_homography(H_fix, src[i], dst[i])
+        assert_allclose(H[i], H_i, rtol=1e-9)
+        assert cost[i] == pytest.approx(cost_i)
+
+
+if __name__ == "__main__":
+    pass
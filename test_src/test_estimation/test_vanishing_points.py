@@ -0,0 +1,66 @@
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose, assert_array_equal
+from src.estimation.vanishing_points import (line_conditioning, weighted_closest_points,
+                                             ransac_vanishing_points)
+
+
+def lines_through(rng: np.random.Generator, point: np.ndarray, n: int) -> np.ndarray:
+    """
+    Lines through random image points and a homogenous point.
+    """
+    p = np.concatenate([rng.uniform(0., 640., (n, 2)), np.ones((n, 1))], axis=1)
+    return np.cross(p, point)
+
+
+def test_line_conditioning() -> None:
+    """
+    The median of the points of the lines closest to the origin is
+    moved to the origin, and their median distance is scaled to 1.
+    """
+    lines = np.array([[1., 0., -100.], [0., 1., -300.], [1., 0., -500.], [1., 1., -600.]])
+    feet = np.array([[100., 0., 1.], [0., 300., 1.], [500., 0., 1.], [300., 300., 1.]])
+    T = line_conditioning(lines)
+    assert_allclose(T @ np.append(np.median(feet[:, :2], axis=0), 1.), [0., 0., 1.], atol=1e-12)
+    moved = feet @ T.T
+    assert_allclose(np.median(np.linalg.norm(moved[:, :2], axis=1)), 1.0)
+    assert_array_equal(line_conditioning(np.array([[0., 0., 1.]])), np.identity(3))
+
+
+def test_weighted_closest_points() -> None:
+    """
+    A zero weight removes a line.
+    """
+    lines = np.array([[1., 0., -1.], [0., 1., -2.], [1., -1., 1.], [1., 1., 0.]])
+    weights = np.array([[1., 1., 1., 0.], [1., 1., 0., 1.]])
+    points = weighted_closest_points(lines, weights)
+    assert_allclose(points[0] / points[0, 2], [1., 2., 1.])
+    assert_allclose(np.abs(lines[:3] @ points[0]), 0.0, atol=1e-12)
+
+
+def test_ransac_vanishing_points() -> None:
+    """
+    Finds a finite vanishing point and one at infinity among outlier lines.
+    """
+    rng = np.random.default_rng(0)
+    expected = np.array([[300., -800., 1.], [1., 0.2, 0.]])
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    lines = np.concatenate([lines_through(rng, expected[0], 200), lines_through(rng, expected[1], 150),
+                            np.cross(np.concatenate([rng.uniform(0., 640., (50, 2)), np.ones((50, 1))], axis=1),
+                                     np.concatenate([rng.uniform(0., 640., (50, 2)), np.ones((50, 1))], axis=1))])
+    points, labels = ransac_vanishing_points(lines, min_inliers=20, rng=np.random.default_rng(1))
+    assert points.shape == (2, 3)
+    assert (points[:, 2] >= 0.0).all()
+    assert_array_equal(labels[:200], 0)
+    assert_array_equal(labels[200:350], 1)
+    assert_allclose(points, expected, atol=1e-9)
+    assert (labels[350:] == -1).sum() >= 45
+    empty, empty_labels = ransac_vanishing_points(lines[350:360], min_inliers=5)
+    assert empty.shape == (0, 3)
+    assert_array_equal(empty_labels, -1)
+    with pytest.raises(ValueError):
+        ransac_vanishing_points(lines[:, :2])
+
+
+if __name__ == "__main__":
+    pass
@@ -18,6 +18,14 @@ class TestLine2D:
         assert line._b is not None
         assert line._c is not None
 
+    def test_new(self) -> None:
+        """
+        """
+        line = Line2D._new(1.0, 2.0, 3.0)
+        assert line == Line2D(coeffs=(1.0, 2.0, 3.0))
+        assert line.p1 is None and line.p2 is None
+        assert not hasattr(line, "__dict__")
+
     def test_polar_coords(self) -> None:
         """
         """
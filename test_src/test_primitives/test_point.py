@@ -6,6 +6,24 @@ from src.transforms.translation import TranslationTransform2D
 
 class TestPoint2D:
 
+    def test_slots(self) -> None:
+        """
+        """
+        p = Point2D(2.0, 2.0, 1.0)
+        assert not hasattr(p, "__dict__")
+        with pytest.raises(AttributeError):
+            p.z = 1.0
+
+    def test_new(self) -> None:
+        """
+        The trusted constructor skips validation.
+        """
+        p = Point2D._new(2, 3, 1)
+        assert isinstance(p, Point2D)
+        assert (p.x, p.y, p.w) == (2, 3, 1)
+        p3 = Point3D._new(1.0, 2.0, 3.0, 1.0)
+        assert p3.z == 3.0
+
     def test_vector(self) -> None:
         """
         """
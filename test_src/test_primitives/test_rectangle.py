@@ -7,6 +7,7 @@ from src.primitives.point import Point2D
 from src.primitives_lists.points import Points2D
 from src.primitives.rectangle import Rectangle2D
 from src.transforms.rotation import RotationTransform2D
+from src.transforms.projective import ProjectiveTransform2D
 
 
 @pytest.fixture
@@ -124,7 +125,22 @@ class TestRectangle2D:
         assert rect == new_rect
         rect.left_top = rect.left_top - Point2D(1.0, 1.0, 1.0)
         assert rect != new_rect
-        
+
+    def test_calculate_projectivetransform2d(self, points_fix: List[Point2D]) -> None:
+        """
+        The closed form fast path maps the corners like the SVD fallback.
+        """
+        rect = Rectangle2D(*points_fix)
+        other = Rectangle2D(Point2D(120.0, 110.0, 1.0), Point2D(350.0, 90.0, 1.0),
+                            Point2D(320.0, 340.0, 1.0), Point2D(90.0, 290.0, 1.0))
+        transform = rect.calculate_projectivetransform2d(other)
+        assert isinstance(transform, ProjectiveTransform2D)
+        mapped = rect.corners.apply_transform(transform.M)
+        assert_allclose(mapped.cartesian_array_form, other.corners.cartesian_array_form, atol=1e-9)
+        with patch("src.primitives.rectangle.quad_to_quad_single", return_value=None):
+            fallback = rect.calculate_projectivetransform2d(other)
+        assert_allclose(fallback.M, transform.M, atol=1e-9)
+
 
 if __name__ == "__main__":
     pass
@@ -0,0 +1,68 @@
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+from src.primitives.point import Point2D
+from src.primitives.line import Line2D
+from src.primitives_lists.points import Points2D
+from src.primitives_lists.line_fitter import LineFitter2D
+from src.estimation.line_fit import fit_lines
+
+
+@pytest.fixture
+def array_fix() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(200, 2)) * (10.0, 1.0) + (100.0, 50.0)
+
+
+def assert_same_line(line: Line2D, expected: np.ndarray) -> None:
+    coeffs = np.array([line.a, line.b, line.c])
+    assert_allclose(coeffs * np.sign(coeffs @ expected), expected, atol=1e-9)
+
+
+class TestLineFitter2D:
+
+    def test_calculate_fit_line(self) -> None:
+        """
+        Same line as Points2D.calculate_fit_line, from Point2Ds or a generator.
+        """
+        points = Points2D([Point2D(1.0, 1.0), Point2D(3.0, 1.0), Point2D(4.0, 2.0), Point2D(1.0, 3.0)])
+        fitter = LineFitter2D()
+        assert fitter.calculate_fit_line() is None
+        for p in points:
+            fitter.append(p)
+        assert fitter.num_points == 4
+        assert_allclose(fitter.centroid, points.centroid)
+        expected = points.calculate_fit_line()
+        assert_same_line(fitter.calculate_fit_line(), np.array([expected.a, expected.b, expected.c]))
+        streamed = LineFitter2D()
+        streamed.extend((p for p in points), chunk_size=3)
+        assert_same_line(streamed.calculate_fit_line(), np.array([expected.a, expected.b, expected.c]))
+
+    @pytest.mark.parametrize("window", [None, 7, 50])
+    @pytest.mark.parametrize("forgetting", [1.0, 0.95])
+    def test_window_and_forgetting(self, array_fix: np.ndarray, window: int, forgetting: float) -> None:
+        """
+        Appending, and extending in chunks, both give the fit of
+        the last window points with the decayed weights.
+        """
+        weights = np.linspace(0.5, 2.0, len(array_fix))
+        decayed = weights * forgetting ** np.arange(len(array_fix) - 1, -1, -1.0)
+        start = 0 if window is None else len(array_fix) - window
+        expected = fit_lines(array_fix[start:], decayed[start:])
+        appended = LineFitter2D(window=window, forgetting=forgetting)
+        for p, w in zip(array_fix, weights):
+            appended.append(p, w)
+        extended = LineFitter2D(window=window, forgetting=forgetting)
+        extended.extend(array_fix[:60], weights[:60], chunk_size=9)
+        extended.extend(array_fix[60:], weights[60:], chunk_size=32)
+        for fitter in (appended, extended):
+            assert fitter.num_points == len(array_fix) - start
+            assert_allclose(fitter.total_weight, decayed[start:].sum())
+            assert_same_line(fitter.calculate_fit_line(), expected)
+        moments = extended._moments
+        extended.recalculate()
+        assert_allclose(extended._moments, moments, atol=1e-9)
+
+
+if __name__ == "__main__":
+    pass
@@ -1,9 +1,10 @@
 import pytest
 import numpy as np
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_array_equal, assert_allclose
 from src.primitives.point import Point2D
 from src.primitives.line import Line2D
 from src.primitives_lists.lines import Lines2D
+from src.primitives_lists.points import Points2D
 
 
 @pytest.fixture
@@ -14,6 +15,13 @@ def lines_fix() -> Lines2D:
     return Lines2D([l1, l2, l3])
 
 
+@pytest.fixture
+def coeffs_fix() -> np.ndarray:
+    return np.array([[10.0, -4.0, 1.0],
+                     [-3.0, 10.0, 1.0],
+                     [4.0, 7.0, 1.0]])
+
+
 class TestLines2D:
 
     def test_calculate_closest_point(self, lines_fix: Lines2D) -> None:
@@ -22,6 +30,36 @@ class TestLines2D:
         point = lines_fix.calculate_closest_point()
         assert point == Point2D(-0.12, -0.11, 0.99)
 
+    def test_calculate_vanishing_points(self) -> None:
+        """
+        Two pencils of lines and two lines through neither point.
+        """
+        rng = np.random.default_rng(0)
+        points = np.concatenate([rng.uniform(0., 100., (30, 2)), np.ones((30, 1))], axis=1)
+        coeffs = np.concatenate([np.cross(points[:15], [50., -200., 1.]), np.cross(points[15:], [1., 0., 0.]),
+                                 [[1., 1., -20.], [1., -3., 40.]]])
+        lines = Lines2D.from_array(coeffs)
+        vps, labels = lines.calculate_vanishing_points(min_inliers=5, rng=np.random.default_rng(1))
+        assert isinstance(vps, Points2D)
+        assert vps.num_points == 2
+        assert_array_equal(labels, [labels[0]] * 15 + [labels[15]] * 15 + [-1, -1])
+        assert vps[labels[0]].normalized() == Point2D(50., -200., 1.)
+        assert_allclose(vps.array_form[labels[15]], [1., 0., 0.], atol=1e-9)
+        empty, empty_labels = Lines2D().calculate_vanishing_points()
+        assert empty.num_points == 0 and empty_labels.shape == (0,)
+
+    def test_no_aliasing(self) -> None:
+        """
+        Changing the caller's list or the returned list does not change the lines or A.
+        """
+        line_list = [Line2D(coeffs=(1.0, 0.0, -1.0)), Line2D(coeffs=(0.0, 1.0, -2.0))]
+        lines = Lines2D(line_list)
+        A = lines.calculate_A()
+        line_list.append(Line2D(coeffs=(1.0, 1.0, 0.0)))
+        lines.lines.append(Line2D(coeffs=(1.0, 1.0, 0.0)))
+        assert len(lines) == 2
+        assert_array_equal(lines.calculate_A(), A)
+
     def test_calculate_A(self, lines_fix: Lines2D) -> None:
         """
         """
@@ -39,6 +77,48 @@ class TestLines2D:
         lines_fix.append(Line2D(coeffs=(1.0, 4.0, 1.0)))
         new_len = len(lines_fix._lines)
         assert new_len == original_len + 1
+        expected = Lines2D(list(lines_fix.lines)).calculate_A()
+        assert_allclose(lines_fix.calculate_A(), expected)
+
+    def test_remove(self, lines_fix: Lines2D) -> None:
+        """
+        """
+        line = lines_fix.remove(0)
+        assert line == Line2D(coeffs=(10.0, -4.0, 1.0))
+        assert len(lines_fix) == 2
+        assert_allclose(lines_fix.calculate_A(), Lines2D(list(lines_fix.lines)).calculate_A())
+        del lines_fix[0]
+        assert_allclose(lines_fix.calculate_A(), Lines2D(list(lines_fix.lines)).calculate_A())
+
+    def test_set_item(self, lines_fix: Lines2D) -> None:
+        """
+        """
+        new_line = Line2D(coeffs=(1.0, 4.0, 1.0))
+        lines_fix[1] = new_line
+        assert lines_fix[1] is new_line
+        assert_allclose(lines_fix.calculate_A(), Lines2D(list(lines_fix.lines)).calculate_A())
+
+    def test_weights(self, lines_fix: Lines2D) -> None:
+        """
+        A weight of 2 is the same as adding the line twice.
+        """
+        weighted = Lines2D(list(lines_fix.lines), weights=[2.0, 1.0, 1.0])
+        lines_fix.append(lines_fix[0])
+        assert_allclose(weighted.calculate_A(), lines_fix.calculate_A())
+        assert weighted.calculate_closest_point() == lines_fix.calculate_closest_point()
+
+    def test_forgetting(self, lines_fix: Lines2D) -> None:
+        """
+        """
+        forgetful = Lines2D(forgetting=0.5)
+        for line in lines_fix.lines:
+            forgetful.append(line)
+        assert forgetful.weights == [0.25, 0.5, 1.0]
+        expected = Lines2D(list(lines_fix.lines), weights=[0.25, 0.5, 1.0])
+        assert_allclose(forgetful.calculate_A(), expected.calculate_A())
+        forgetful.remove(0)
+        forgetful.recalculate_A()
+        assert_allclose(forgetful.calculate_A(), Lines2D(list(lines_fix.lines[1:]), weights=[0.5, 1.0]).calculate_A())
     
     def test_get_item(self, lines_fix: Lines2D) -> None:
         """
@@ -46,6 +126,89 @@ class TestLines2D:
         for i in range(len(lines_fix._lines)):
             assert lines_fix[i] == lines_fix._lines[i]
             
+    def test_from_array(self, lines_fix: Lines2D, coeffs_fix: np.ndarray) -> None:
+        """
+        """
+        lines = Lines2D.from_array(coeffs_fix)
+        assert lines.is_array_backed
+        assert len(lines) == 3
+        # Copied by default, so changing the array does not get A out of sync.
+        assert not np.shares_memory(lines.array_form, coeffs_fix)
+        assert np.shares_memory(Lines2D.from_array(coeffs_fix, copy=False).array_form, coeffs_fix)
+        assert_array_equal(lines.array_form, lines_fix.array_form)
+        assert_array_equal(lines.calculate_A(), lines_fix.calculate_A())
+        assert lines.calculate_closest_point() == lines_fix.calculate_closest_point()
+        assert lines[1] == lines_fix[1]
+        assert lines.lines == lines_fix.lines
+        with pytest.raises(ValueError):
+            Lines2D.from_array(np.zeros((3, 2)))
+
+    def test_from_point_groups(self) -> None:
+        """
+        The two groups lie on y = 1 and x = 2, and the lines
+        meet at (2, 1).
+        """
+        arr = np.array([[0., 1.], [1., 1.], [5., 1.], [2., -3.], [2., 0.], [2., 4.], [2., 9.]])
+        lines = Lines2D.from_point_groups(Points2D.from_array(arr), np.array([0, 3, 7]))
+        assert lines.is_array_backed
+        assert len(lines) == 2
+        assert lines[0] == Line2D(coeffs=(0., 1., -1.))
+        assert_allclose(np.abs(lines.array_form[1]), [1., 0., 2.], atol=1e-12)
+        assert lines.calculate_closest_point() == Point2D(2., 1., 1.)
+
+    def test_array_backed_updates(self, coeffs_fix: np.ndarray) -> None:
+        """
+        """
+        lines = Lines2D.from_array(coeffs_fix, weights=np.array([1.0, 2.0, 1.0]), forgetting=0.5)
+        for i in range(10):
+            lines.append(Line2D(coeffs=(float(i), 1.0, 1.0)))
+        lines[-1] = Line2D(coeffs=(1.0, 4.0, 1.0))
+        removed = lines.remove(1)
+        assert removed == Line2D(coeffs=(-3.0, 10.0, 1.0))
+        assert len(lines) == 12
+        A = lines.calculate_A()
+        lines.recalculate_A()
+        assert_allclose(A, lines.calculate_A(), atol=1e-12)
+        assert_allclose(A, Lines2D(lines.lines, weights=lines.weights).calculate_A(), atol=1e-12)
+
+    def test_intersection_matrix(self, lines_fix: Lines2D) -> None:
+        """
+        """
+        intersections = lines_fix.intersection_matrix()
+        assert intersections.shape == (3, 3, 3)
+        for i in range(3):
+            for j in range(3):
+                expected = lines_fix[i].intersection_with(lines_fix[j])
+                assert_array_equal(intersections[i, j], expected.vector.ravel())
+
+    def test_pairwise_intersections(self, coeffs_fix: np.ndarray) -> None:
+        """
+        """
+        lines = Lines2D.from_array(coeffs_fix)
+        i, j, points = lines.pairwise_intersections()
+        assert_array_equal(i, [0, 0, 1])
+        assert_array_equal(j, [1, 2, 2])
+        assert points.num_points == 3
+        for k in range(3):
+            assert points[k] == lines[i[k]].intersection_with(lines[j[k]])
+
+    @pytest.mark.parametrize("array_backed", [False, True])
+    def test_apply_transform(self, lines_fix: Lines2D, coeffs_fix: np.ndarray, array_backed: bool) -> None:
+        """
+        Lines are mapped by the transposed inverse and A stays in sync.
+        """
+        if array_backed:
+            lines_fix = Lines2D.from_array(coeffs_fix)
+        M = np.array([[0.8, -0.6, 10.], [0.6, 0.8, -5.], [0., 0., 1.]])
+        transformed = lines_fix.apply_transform(M)
+        assert_allclose(transformed.array_form, coeffs_fix @ np.linalg.inv(M))
+        assert_allclose(lines_fix.array_form, coeffs_fix)
+        lines_fix.apply_transform(M, inplace=True, T_inv_M=np.linalg.inv(M).T)
+        assert_allclose(lines_fix.array_form, transformed.array_form)
+        A = lines_fix.calculate_A()
+        lines_fix.recalculate_A()
+        assert_allclose(A, lines_fix.calculate_A())
+
 
 if __name__ == "__main__":
     pass
@@ -1,9 +1,20 @@
 import pytest
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_array_equal, assert_allclose
 import numpy as np
 from src.primitives.point import Point2D
 from src.primitives.line import Line2D
 from src.primitives_lists.points import Points2D
+from src.primitives_lists.lines import Lines2D
+from src.transforms.rigid import RigidTransform2D
+from src.transforms.projective import ProjectiveTransform2D
+
+
+@pytest.fixture
+def array_fix() -> np.ndarray:
+    return np.array([[1., 1., 1.],
+                     [3., 1., 1.],
+                     [3., 3., 1.],
+                     [1., 3., 1.]])
 
 
 @pytest.fixture
@@ -84,6 +95,208 @@ class TestPoints2D:
         """
         for i in range(len(points_fix._points)):
             assert points_fix[i] == points_fix._points[i]
+
+    def test_from_array(self, array_fix: np.ndarray) -> None:
+        """
+        """
+        points = Points2D.from_array(array_fix)
+        assert points.is_array_backed
+        assert points.num_points == 4
+        # No copy is made, so array_form is the same memory.
+        assert np.shares_memory(points.array_form, array_fix)
+        copied = Points2D.from_array(array_fix, copy=True)
+        assert not np.shares_memory(copied.array_form, array_fix)
+        cartesian = Points2D.from_array(array_fix[:, :2])
+        assert_array_equal(cartesian.array_form, array_fix)
+        with pytest.raises(ValueError):
+            Points2D.from_array(np.zeros((4, 4)))
+
+    def test_array_backed_equivalent(self, points_fix: Points2D, array_fix: np.ndarray) -> None:
+        """
+        Array storage should behave the same as list storage.
+        """
+        points = Points2D.from_array(array_fix)
+        assert points == points_fix
+        assert_array_equal(points.centroid, points_fix.centroid)
+        assert_array_equal(points.cartesian_array_form, points_fix.cartesian_array_form)
+        assert points.calculate_fit_line() == points_fix.calculate_fit_line()
+        assert len(list(points)) == 4
+        assert points[1:3] == points_fix[1:3]
+
+    def test_array_backed_get_item(self, array_fix: np.ndarray) -> None:
+        """
+        """
+        points = Points2D.from_array(array_fix)
+        p = points[1]
+        assert p == Point2D(3.0, 1.0, 1.0)
+        assert isinstance(p.x, float)
+        # The point is a view, so changes are written to the array.
+        p.x = 5.0
+        assert array_fix[1, 0] == 5.0
+        p.normalize()
+        assert points[-1] == Point2D(1.0, 3.0, 1.0)
+        with pytest.raises(IndexError):
+            points[4]
+        # Slices are copies for any step.
+        for sliced in (points[1:3], points[::2]):
+            assert not np.shares_memory(sliced.array_form, array_fix)
+        first = points[0:2]
+        array_fix[0, 0] = 7.0
+        assert first[0].x != 7.0
+
+    def test_array_backed_append(self, array_fix: np.ndarray) -> None:
+        """
+        """
+        points = Points2D.from_array(array_fix)
+        for i in range(10):
+            points.append(Point2D(float(i), 0.0, 1.0))
+        assert points.num_points == 14
+        assert points.array_form.shape == (14, 3)
+        assert points[13] == Point2D(9.0, 0.0, 1.0)
+
+    def test_array_backed_subtract(self, array_fix: np.ndarray) -> None:
+        """
+        """
+        points = Points2D.from_array(array_fix)
+        point_diffs = points - Point2D(1.0, 1.0, 1.0)
+        assert point_diffs[2].x == 2.0 and point_diffs[2].w == 0.0
+        points -= Point2D(1.0, 1.0, 1.0)
+        assert_array_equal(points.array_form, point_diffs.array_form)
+        assert_array_equal(array_fix[:, 2], np.zeros(4))
+
+    @pytest.mark.parametrize("inplace", (True, False))
+    def test_apply_transform(self, points_fix: Points2D, inplace: bool) -> None:
+        """
+        """
+        M = RigidTransform2D(theta=0.79, tx=160, ty=20).M
+        expected = [p.apply_transform(M) for p in points_fix]
+        original_points = points_fix.points
+        new_points = points_fix.apply_transform(M, inplace=inplace)
+        if inplace:
+            assert new_points is points_fix
+            # The same point objects are updated.
+            assert new_points.points[0] is original_points[0]
+        else:
+            assert new_points is not points_fix
+            # The result is list backed like the input, so appending is kept.
+            assert not new_points.is_array_backed
+            new_points.points.append(Point2D(1.0, 1.0, 1.0))
+            assert new_points.num_points == points_fix.num_points + 1
+            new_points.points.pop()
+        assert new_points == Points2D(expected)
+
+    def test_apply_transform_out(self, array_fix: np.ndarray) -> None:
+        """
+        """
+        M = RigidTransform2D(theta=0.79, tx=160, ty=20).M
+        expected = array_fix @ M.T
+        points = Points2D.from_array(array_fix)
+        out = np.empty_like(array_fix)
+        new_points = points.apply_transform(M, out=out)
+        assert np.shares_memory(new_points.array_form, out)
+        assert_allclose(out, expected)
+        # True in-place update of the storage.
+        points.apply_transform(M, out=points.array_form, inplace=True)
+        assert_allclose(array_fix, expected)
+        with pytest.raises(ValueError):
+            points.apply_transform(M, out=np.empty((3, 3)))
+
+    def test_apply_transform_dtype(self, array_fix: np.ndarray) -> None:
+        """
+        """
+        M = RigidTransform2D(theta=0.79, tx=160, ty=20).M
+        points = Points2D.from_array(array_fix)
+        new_points = points.apply_transform(M, dtype=np.float32)
+        assert new_points.array_form.dtype == np.float32
+        assert_allclose(new_points.array_form, array_fix @ M.T, rtol=1e-5)
+
+    def test_estimate_transform(self, points_fix: Points2D) -> None:
+        """
+        List and array backed points give the same transform.
+        """
+        t = RigidTransform2D(theta=0.79, tx=160, ty=20)
+        other = points_fix.apply_transform(t.M)
+        estimated = points_fix.estimate_transform(other, RigidTransform2D)
+        assert isinstance(estimated, RigidTransform2D)
+        assert estimated.from_origin
+        assert_allclose(estimated.M, t.M, atol=1e-9)
+        array_estimated = Points2D.from_array(points_fix.array_form).estimate_transform(other, t)
+        assert_allclose(array_estimated.M, t.M, atol=1e-9)
+        with pytest.raises(ValueError):
+            points_fix.estimate_transform(other[:3], RigidTransform2D)
+
+    def test_estimate_transform_ransac(self, points_fix: Points2D) -> None:
+        """
+        The moved point is the only outlier.
+        """
+        t = RigidTransform2D(theta=0.79, tx=160, ty=20)
+        other = points_fix.apply_transform(t.M)
+        other.append(Point2D(0.0, 0.0, 1.0))
+        points_fix.append(Point2D(50.0, 50.0, 1.0))
+        estimated, mask = points_fix.estimate_transform_ransac(other, RigidTransform2D, threshold=0.1,
+                                                               rng=np.random.default_rng(0))
+        assert isinstance(estimated, RigidTransform2D)
+        assert_array_equal(mask, [True, True, True, True, False])
+        assert_allclose(estimated.M, t.M, atol=1e-9)
+
+    def test_estimate_transform_robust(self, points_fix: Points2D) -> None:
+        """
+        The moved point gets the smallest weight.
+        """
+        t = RigidTransform2D(theta=0.79, tx=160, ty=20)
+        other = points_fix.apply_transform(t.M)
+        other.append(Point2D(200.0, 200.0, 1.0))
+        points_fix.append(Point2D(2.0, 2.0, 1.0))
+        estimated, weights = points_fix.estimate_transform_robust(other, RigidTransform2D, loss="tukey")
+        assert isinstance(estimated, RigidTransform2D)
+        assert estimated.from_origin
+        assert np.argmin(weights) == 4
+        assert_allclose(estimated.M, t.M, atol=1e-6)
+
+    def test_calculate_robust_fit_line(self) -> None:
+        """
+        """
+        arr = np.stack([np.arange(10.), np.ones(10)], axis=-1)
+        arr[4, 1] = 4.0
+        line, weights = Points2D.from_array(arr).calculate_robust_fit_line(loss="tukey")
+        assert isinstance(line, Line2D)
+        # The line y = 1.
+        assert_allclose([line.a, line.c / line.b], [0., -1.], atol=1e-9)
+        assert weights[4] == 0.0
+
+    def test_detect_lines_ransac(self) -> None:
+        """
+        Two lines with clutter.
+        """
+        t = np.linspace(0., 50., 40)
+        arr = np.concatenate([np.stack([t, 0. * t + 5.], axis=-1), np.stack([t, t + 20.], axis=-1),
+                              np.array([[40., 0.], [10., 20.], [45., 20.]])])
+        lines, labels = Points2D.from_array(arr).detect_lines_ransac(min_inliers=5, threshold=0.5,
+                                                                     rng=np.random.default_rng(0))
+        assert isinstance(lines, Lines2D)
+        assert lines.is_array_backed
+        assert len(lines) == 2
+        assert_array_equal(labels[-3:], -1)
+        assert len(set(labels[:40].tolist())) == 1
+        assert lines[labels[0]] == Line2D(coeffs=(0., 1., -5.))
+        empty_lines, empty_labels = Points2D().detect_lines_ransac()
+        assert len(empty_lines) == 0 and empty_labels.shape == (0,)
+
+    def test_refine_homography(self, points_fix: Points2D) -> None:
+        """
+        Exact correspondences are reached from a nearby homography.
+        """
+        t = ProjectiveTransform2D(per_x=0.01, per_y=-0.02, sx=2.0, theta=0.3, tx=5)
+        other = points_fix.apply_transform(t.M)
+        start = ProjectiveTransform2D(per_x=0.012, per_y=-0.018, sx=1.9, theta=0.25, tx=4)
+        refined = points_fix.refine_homography(other, start)
+        assert isinstance(refined, ProjectiveTransform2D)
+        assert refined.from_origin
+        assert_allclose(refined.normalized_M, t.normalized_M, atol=1e-8)
+        with pytest.raises(ValueError):
+            Points2D().refine_homography(Points2D(), start)
+        with pytest.raises(ValueError):
+            points_fix[:3].refine_homography(other[:3], start)
         
 
 if __name__ == "__main__":
@@ -1,8 +1,15 @@
 import pytest
+import numpy as np
 from numpy.testing import assert_allclose
 from src.transforms.affine import AffineTransform2D
 from src.transforms.projective import ProjectiveTransform2D
+from src.transforms.rigid import RigidTransform2D
+from src.transforms.rotation import RotationTransform2D
+from src.transforms.shear import ShearTransform2D
+from src.transforms.similarity import SimilarityTransform2D
+from src.transforms.perspective import PerspectiveTransform2D
 from src.transforms.transform_base import TransformBase2D
+from src.transforms.batch import TransformBatch2D
 from src.primitives.rectangle import Rectangle2D
 from src.primitives_lists.rectangles import Rectangles2D
 from src.primitives.point import Point2D
@@ -65,8 +72,95 @@ class TestRectangles2D:
                 assert_allclose(aff_fix.M, point_calc_aff.M)
         # Rects are always equal as long as point_calc_aff.from_origin is True
         assert new_rect == test_rect
-        
-    
+
+    @pytest.mark.parametrize("from_origin", [True, False])
+    def test_apply_transform(self, proj_fix: ProjectiveTransform2D, rect_fix: Rectangle2D, from_origin: bool) -> None:
+        """
+        Same as applying the transform to each rectangle.
+        """
+        proj_fix.from_origin = from_origin
+        other = rect_fix.apply_transform(AffineTransform2D(sx=2.0, theta=0.3, tx=5))
+        rects2d = Rectangles2D([rect_fix, other])
+        assert rects2d.corners_array.shape == (2, 4, 3)
+        expected = [rect.apply_transform(proj_fix) for rect in rects2d]
+        transformed = rects2d.apply_transform(proj_fix)
+        for rect, expected_rect in zip(transformed, expected):
+            assert_allclose(rect.corners.array_form, expected_rect.corners.array_form)
+        assert rects2d.apply_transform(proj_fix, inplace=True) is rects2d
+        assert_allclose(rects2d.corners_array, transformed.corners_array)
+
+    @pytest.mark.parametrize("transform", ("aff_fix", "proj_fix"))
+    def test_calculate_transform_batch(self, transform: TransformBase2D, rect_fix: Rectangle2D, request) -> None:
+        """
+        Same transforms as calculate_transforms, stacked in a batch.
+        """
+        transform = request.getfixturevalue(transform)
+        transform.from_origin = True
+        others = [rect_fix.apply_transform(transform),
+                  rect_fix.apply_transform(AffineTransform2D(sx=0.5, theta=-0.3, tx=5)),
+                  rect_fix.apply_transform(ProjectiveTransform2D(per_x=-0.002, per_y=0.001, theta=0.1, ty=-3))]
+        rects2d = Rectangles2D([rect_fix] + others)
+        batch = rects2d.calculate_transform_batch(transform)
+        assert isinstance(batch, TransformBatch2D)
+        assert batch.model is type(transform)
+        assert batch.from_origin
+        assert len(batch) == 3
+        for M, t in zip(batch.normalized_M, rects2d.calculate_transforms(transform)):
+            assert_allclose(M, t.normalized_M, atol=1e-9)
+        assert_allclose(batch.normalized_M[0], transform.normalized_M, atol=1e-9)
+
+    @pytest.mark.parametrize("transform", (RotationTransform2D(0.4), ShearTransform2D(-0.2),
+                                           RigidTransform2D(0.7, 12, -3),
+                                           SimilarityTransform2D(1.5, 1.5, -0.4, 6, 9),
+                                           PerspectiveTransform2D(0.002, -0.003)))
+    def test_calculate_closed_form_batch(self, transform: TransformBase2D, rect_fix: Rectangle2D) -> None:
+        """
+        The closed form estimators recover the transform, one pair at
+        a time and for all rectangles at once.
+        """
+        transform.from_origin = True
+        other = rect_fix.apply_transform(transform)
+        rects2d = Rectangles2D([rect_fix, other, other.copy()])
+        single = rects2d.calculate_transforms(transform)[0]
+        assert type(single) is type(transform)
+        assert single.from_origin
+        batch = rects2d.calculate_transform_batch(transform)
+        assert batch.model is type(transform)
+        assert batch.from_origin
+        if isinstance(transform, (RotationTransform2D, ShearTransform2D)):
+            # Only the linear part is estimated, translation is ignored.
+            assert_allclose(single.M[:2, :2], transform.M[:2, :2], atol=1e-9)
+        else:
+            assert_allclose(single.M, transform.M, atol=1e-9)
+        for M in batch.Ms:
+            assert_allclose(M, single.M, atol=1e-9)
+
+    def test_calculate_affinetransform2d_batch_residuals(self, aff_fix: AffineTransform2D, rect_fix: Rectangle2D) -> None:
+        """
+        Affine rectangles fit exactly, a projective rectangle does not.
+        """
+        aff_fix.from_origin = True
+        others = [rect_fix.apply_transform(aff_fix),
+                  rect_fix.apply_transform(ProjectiveTransform2D(per_x=0.01, per_y=0.01))]
+        rects2d = Rectangles2D([rect_fix] + others)
+        batch, residuals = rects2d.calculate_affinetransform2d_batch(return_residuals=True)
+        assert residuals.shape == (2, 4)
+        assert_allclose(batch.Ms[0], aff_fix.M, atol=1e-9)
+        assert_allclose(residuals[0], 0.0, atol=1e-9)
+        assert (residuals[1] > 1e-3).all()
+
+    def test_calculate_projectivetransform2d_batch_degenerate(self, rect_fix: Rectangle2D) -> None:
+        """
+        A collapsed rectangle is solved with the SVD fallback.
+        """
+        collapsed = rect_fix.copy()
+        collapsed.right_top = Point2D(15., 15., 1.)
+        rects2d = Rectangles2D([rect_fix, collapsed, rect_fix.copy()])
+        batch = rects2d.calculate_projectivetransform2d_batch()
+        assert np.isfinite(batch.Ms).all()
+        assert_allclose(batch.Ms[1], np.identity(3), atol=1e-12)
+
+
 if __name__ == "__main__":
     pass
     
\ No newline at end of file
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from unittest.mock import patch
 from numpy.testing import assert_allclose
 from src.transforms.transform_base import TransformBase2D
@@ -75,8 +76,83 @@ class TestAffineTransform2D:
         assert_allclose(scale.M, aff_fix.scale.M)
         assert_allclose(rigid.M, aff_fix.rigid.M)
         assert_allclose(rigid.M @ scale.M @ shear.M, aff_fix.M)
-        
-        
+
+    @pytest.mark.parametrize("sx", [2.0, -2.0])
+    def test_get_decomposed_params_from_Ms(self, sx: float) -> None:
+        """
+        Same parameters as get_decomposed_from_M, also with a reflection.
+        """
+        aff = AffineTransform2D(sx=sx, sy=1.5, shear_theta=0.39, theta=0.79, tx=160, ty=20)
+        params = AffineTransform2D.get_decomposed_params_from_Ms(aff.M)
+        shear, scale, rigid = AffineTransform2D.get_decomposed_from_M(aff.M)
+        assert params.shape == (1,)
+        assert_allclose([params[0][name] for name in params.dtype.names],
+                        [scale.sx, scale.sy, shear.theta, rigid.theta, rigid.tx, rigid.ty])
+        assert_allclose(AffineTransform2D(*params[0]).M, aff.M)
+
+    def test_set_params(self, aff_fix: AffineTransform2D) -> None:
+        """
+        M is rebuilt once for all of the parameters.
+        """
+        with patch.object(AffineTransform2D, "_rebuild_M", autospec=True,
+                          side_effect=TransformBase2D._rebuild_M) as patch_rebuild:
+            aff_fix.set_params(sx=3.0, sy=0.5, theta=-1.0, tx=5)
+            patch_rebuild.assert_called_once()
+        assert aff_fix == AffineTransform2D(3.0, 0.5, 0.39, -1.0, 5, 20)
+        with pytest.raises(TypeError):
+            aff_fix.set_params(scale=2.0)
+
+    def test_deferred_updates(self, aff_fix: AffineTransform2D) -> None:
+        """
+        """
+        with aff_fix.deferred_updates():
+            aff_fix.sx = 3.0
+            aff_fix.shear_theta = 0.0
+            assert aff_fix.rigid._defer_depth == 1
+        assert aff_fix.rigid._defer_depth == 0
+        assert not aff_fix._dirty
+        assert_allclose(aff_fix.M, AffineTransform2D(3.0, 2.0, 0.0, 0.79, 160, 20).M)
+
+    def test_lazy(self, aff_fix: AffineTransform2D) -> None:
+        """
+        M is only rebuilt when it is read.
+        """
+        aff_fix.lazy = True
+        assert aff_fix.rigid.lazy
+        with patch.object(TransformBase2D, "reset") as patch_reset:
+            aff_fix.sx = 3.0
+            aff_fix.tx = 5
+            aff_fix.ty = 6
+            patch_reset.assert_not_called()
+        assert_allclose(aff_fix.M, AffineTransform2D(3.0, 2.0, 0.39, 0.79, 5, 6).M)
+        aff_fix.theta = 0.0
+        assert_allclose(aff_fix.get_inv_M() @ AffineTransform2D(3.0, 2.0, 0.39, 0.0, 5, 6).M, np.identity(3),
+                        atol=1e-12)
+        aff_fix.sy = 1.0
+        aff_fix.lazy = False
+        assert not aff_fix._dirty
+        assert_allclose(aff_fix._M, AffineTransform2D(3.0, 1.0, 0.39, 0.0, 5, 6).M)
+
+    def test_from_M(self, aff_fix: AffineTransform2D) -> None:
+        """
+        Components are only built when they are accessed.
+        """
+        aff = AffineTransform2D.from_M(aff_fix.M)
+        assert "_shear" not in vars(aff)
+        assert_allclose(aff.M, aff_fix.M)
+        assert aff == aff_fix
+        assert "_rigid" not in vars(aff)
+        assert aff.DoF == aff_fix.DoF
+        assert "_rigid" in vars(aff)
+        assert_allclose(aff.shear.M, aff_fix.shear.M)
+        aff = AffineTransform2D.from_M(aff_fix.M)
+        aff.tx = 0
+        assert aff == AffineTransform2D(2.0, 2.0, 0.39, 0.79, 0, 20)
+        assert len(AffineTransform2D.from_M(aff_fix.M).get_components()) == 3
+        with pytest.raises(AttributeError):
+            aff._affine
+
+
 if __name__ == "__main__":
     pass
     
\ No newline at end of file
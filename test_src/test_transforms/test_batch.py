@@ -0,0 +1,166 @@
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+from src.transforms import *
+from src.primitives_lists.points import Points2D
+
+
+@pytest.fixture
+def transforms_fix() -> list:
+    return [AffineTransform2D(sx=2.0, sy=1.5, shear_theta=0.39, theta=0.79, tx=160, ty=20),
+            AffineTransform2D(sx=0.5, sy=0.5, shear_theta=-0.2, theta=-1.3, tx=-10, ty=5),
+            AffineTransform2D(sx=1.0, sy=3.0, shear_theta=0.0, theta=2.5, tx=0, ty=-40)]
+
+
+@pytest.fixture
+def batch_fix(transforms_fix: list) -> TransformBatch2D:
+    return TransformBatch2D.from_transforms(transforms_fix)
+
+
+class TestTransformBatch2D:
+
+    def test_init(self) -> None:
+        """
+        """
+        batch = TransformBatch2D(np.eye(3))
+        assert batch.Ms.shape == (1, 3, 3)
+        assert batch.model is TransformBase2D
+        with pytest.raises(ValueError):
+            TransformBatch2D(np.zeros((2, 3, 2)))
+
+    def test_from_transforms(self, batch_fix: TransformBatch2D, transforms_fix: list) -> None:
+        """
+        """
+        assert len(batch_fix) == 3
+        assert batch_fix.model is AffineTransform2D
+        for M, t in zip(batch_fix.Ms, transforms_fix):
+            assert_allclose(M, t.M)
+        mixed = TransformBatch2D.from_transforms([RotationTransform2D(0.3), TranslationTransform2D(1, 2)])
+        assert mixed.model is RigidTransform2D
+
+    @pytest.mark.parametrize("transform", [TranslationTransform2D(3.0, -4.0), RotationTransform2D(0.4),
+                                           ScaleTransform2D(2.0, 0.5), ShearTransform2D(0.3),
+                                           PerspectiveTransform2D(0.01, -0.02), RigidTransform2D(0.4, 3.0, -4.0),
+                                           SimilarityTransform2D(2.0, 2.0, 0.4, 3.0, -4.0),
+                                           AffineTransform2D(2.0, 1.5, 0.39, 0.79, 160, 20),
+                                           ProjectiveTransform2D(0.01, 0.01, 2.0, 2.0, 0.39, 0.79, 160, 20)])
+    def test_to_transforms(self, transform: TransformBase2D) -> None:
+        """
+        Round trip through the batch gives equal transforms of the same class.
+        """
+        batch = TransformBatch2D.from_transforms([transform, transform])
+        for t in batch.to_transforms():
+            assert type(t) is type(transform)
+            assert t == transform
+        assert batch[1] == transform
+
+    def test_compose(self, batch_fix: TransformBatch2D, transforms_fix: list) -> None:
+        """
+        """
+        composed = batch_fix @ batch_fix
+        assert composed.model is AffineTransform2D
+        for M, t in zip(composed.Ms, transforms_fix):
+            assert_allclose(M, t.M @ t.M)
+        projective = ProjectiveTransform2D(0.01, 0.01)
+        composed = batch_fix.compose(projective)
+        assert composed.model is ProjectiveTransform2D
+        assert_allclose(composed.Ms[0], transforms_fix[0].M @ projective.M)
+
+    def test_inverse(self, batch_fix: TransformBatch2D, transforms_fix: list) -> None:
+        """
+        """
+        inverse = batch_fix.inverse()
+        assert inverse.model is AffineTransform2D
+        for M, t in zip(inverse.Ms, transforms_fix):
+            assert_allclose(M, t.get_inv_M())
+        for M, t in zip(batch_fix.get_T_inv_M(), transforms_fix):
+            assert_allclose(M, t.get_T_inv_M())
+
+    def test_normalized_M(self) -> None:
+        """
+        """
+        t = ProjectiveTransform2D(0.01, 0.01, 2.0, 2.0, 0.39, 0.79, 160, 20)
+        batch = TransformBatch2D.from_transforms([t])
+        assert_allclose(batch.normalized_M[0], t.normalized_M)
+        batch.normalize_M()
+        assert_allclose(batch.Ms[0], t.normalized_M)
+
+    @pytest.mark.parametrize("transforms", [[RigidTransform2D(0.4, 3.0, -4.0), RigidTransform2D(-2.9, 0.0, 1.0)],
+                                            [SimilarityTransform2D(2.0, 2.0, 0.4, 3.0, -4.0),
+                                             SimilarityTransform2D(0.5, 0.5, -2.9, 0.0, 1.0)],
+                                            [AffineTransform2D(2.0, 1.5, 0.39, 0.79, 160, 20),
+                                             AffineTransform2D(-0.5, 3.0, -0.2, -2.9, 0, 1)],
+                                            [ProjectiveTransform2D(0.01, 0.01, 2.0, 2.0, 0.39, 0.79, 160, 20),
+                                             ProjectiveTransform2D(-0.02, 0.0, -1.0, 0.5, 0.1, 2.0, -5, 3)]])
+    def test_get_decomposed_params(self, transforms: list) -> None:
+        """
+        Batched decomposition recovers the parameters that rebuild each matrix.
+        """
+        batch = TransformBatch2D.from_transforms(transforms)
+        params = batch.get_decomposed_params()
+        assert params.dtype == batch.model.params_dtype
+        assert params.shape == (2,)
+        for row, t in zip(params, transforms):
+            assert batch.model(*row) == t
+        with pytest.raises(NotImplementedError):
+            TransformBatch2D(np.eye(3)).get_decomposed_params()
+
+    def test_get_decomposed_params_projective_scale(self) -> None:
+        """
+        Matrices that are only known up to scale give the same parameters.
+        """
+        t = ProjectiveTransform2D(0.01, -0.02, 2.0, 1.5, 0.39, 0.79, 160, 20)
+        batch = TransformBatch2D(np.stack([t.M, -3.0 * t.M, t.normalized_M]), model=ProjectiveTransform2D)
+        params = batch.get_decomposed_params()
+        for row in params:
+            assert_allclose(list(row), [0.01, -0.02, 2.0, 1.5, 0.39, 0.79, 160, 20])
+
+    def test_apply_to_points(self, batch_fix: TransformBatch2D, transforms_fix: list) -> None:
+        """
+        """
+        points = Points2D.from_array(np.array([[1., 2., 1.], [3., 4., 1.]]))
+        transformed = batch_fix.apply_to_points(points)
+        assert transformed.shape == (3, 2, 3)
+        for i, t in enumerate(transforms_fix):
+            assert_allclose(transformed[i], points.apply_transform(t.M).array_form)
+        assert batch_fix.apply_to_points(Points2D()).shape == (3, 0, 3)
+
+
+@pytest.mark.parametrize(["cls", "params"], [(TranslationTransform2D, [[3.0, -1.0], [2.0, 5.0]]),
+                                             (RotationTransform2D, [[0.3, -2.0]]),
+                                             (ScaleTransform2D, [[2.0, 0.5], [1.0, 3.0]]),
+                                             (ShearTransform2D, [[0.39, -0.2]]),
+                                             (PerspectiveTransform2D, [[0.01, 0.0], [-0.02, 0.03]]),
+                                             (RigidTransform2D, [[0.3, -2.0], [3.0, -1.0], [2.0, 5.0]]),
+                                             (SimilarityTransform2D, [[2.0, 0.5], [2.0, 0.5], [0.3, -2.0],
+                                                                      [3.0, -1.0], [2.0, 5.0]]),
+                                             (AffineTransform2D, [[2.0, 0.5], [1.5, 3.0], [0.39, -0.2], [0.79, -2.0],
+                                                                  [160, -1.0], [20, 5.0]]),
+                                             (ProjectiveTransform2D, [[0.01, 0.0], [-0.02, 0.03], [2.0, 0.5],
+                                                                      [1.5, 3.0], [0.39, -0.2], [0.79, -2.0],
+                                                                      [160, -1.0], [20, 5.0]])])
+def test_from_params(cls: type, params: list) -> None:
+    """
+    The vectorized constructors give the same matrices as the
+    constructors of the transform objects.
+    """
+    batch = cls.from_params(*[np.array(p) for p in params])
+    assert isinstance(batch, TransformBatch2D)
+    assert batch.model is cls
+    assert batch.Ms.shape == (2, 3, 3)
+    for i in range(2):
+        assert_allclose(batch.Ms[i], cls(*[p[i] for p in params]).M, atol=1e-12)
+
+
+def test_from_params_broadcast() -> None:
+    """
+    """
+    batch = RigidTransform2D.from_params(np.linspace(0, 1, 5), 10.0, 0.0)
+    assert len(batch) == 5
+    assert_allclose(batch.Ms[:, 0, 2], 10.0)
+    with pytest.raises(ValueError):
+        RotationTransform2D.from_params(np.zeros((2, 2)))
+
+
+if __name__ == "__main__":
+    pass
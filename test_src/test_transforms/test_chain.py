@@ -0,0 +1,107 @@
+import pytest
+import numpy as np
+from numpy.testing import assert_allclose
+from src.transforms import *
+from src.primitives.point import Point2D
+from src.primitives.line import Line2D
+from src.primitives.rectangle import Rectangle2D
+from src.primitives_lists.points import Points2D
+from src.primitives_lists.lines import Lines2D
+from src.primitives_lists.rectangles import Rectangles2D
+
+
+@pytest.fixture
+def members_fix() -> list:
+    return [TranslationTransform2D(-5.0, 3.0), RotationTransform2D(0.4),
+            ScaleTransform2D(2.0, 0.5), TranslationTransform2D(5.0, -3.0)]
+
+
+@pytest.fixture
+def chain_fix(members_fix: list) -> TransformChain:
+    return TransformChain(members_fix)
+
+
+def fused(members: list) -> np.ndarray:
+    M = np.identity(3)
+    for t in members:
+        M = t.M @ M
+    return M
+
+
+class TestTransformChain:
+
+    def test_M(self, chain_fix: TransformChain, members_fix: list) -> None:
+        """
+        The first member is applied first.
+        """
+        assert_allclose(chain_fix.M, fused(members_fix))
+        assert_allclose(TransformChain().M, np.identity(3))
+        with pytest.raises(AttributeError):
+            chain_fix.M = np.identity(3)
+        with pytest.raises(TypeError):
+            TransformChain.from_M(np.identity(3))
+
+    def test_fuse(self, chain_fix: TransformChain, members_fix: list) -> None:
+        """
+        Only the changed suffix is re-fused.
+        """
+        assert chain_fix.fuse() == 4
+        assert chain_fix.fuse() == 0
+        members_fix[2].sx = 3.0
+        assert chain_fix.fuse() == 2
+        assert_allclose(chain_fix.M, fused(members_fix))
+        members_fix[0].M[0][2] = 1.0
+        assert chain_fix.fuse() == 4
+        chain_fix.partial = False
+        members_fix[3].tx = 0.0
+        assert chain_fix.fuse() == 4
+        assert_allclose(chain_fix.M, fused(members_fix))
+
+    def test_members(self, chain_fix: TransformChain, members_fix: list) -> None:
+        """
+        """
+        chain_fix.fuse()
+        shear = ShearTransform2D(0.3)
+        chain_fix.append(shear)
+        assert chain_fix.fuse() == 1
+        chain_fix[1] = np.identity(3)
+        assert chain_fix.fuse() == 4
+        del chain_fix[1]
+        assert len(chain_fix) == 4
+        assert chain_fix[1] is members_fix[2]
+        assert_allclose(chain_fix.M, fused(members_fix[:1] + members_fix[2:] + [shear]))
+        assert_allclose(chain_fix.get_inv_M() @ chain_fix.M, np.identity(3), atol=1e-12)
+
+    def test_apply_to_points(self, chain_fix: TransformChain) -> None:
+        """
+        """
+        points = Points2D([Point2D(1.0, 2.0, 1.0), Point2D(-3.0, 4.0, 1.0)])
+        transformed = chain_fix.apply_to_points(points)
+        assert_allclose(transformed.array_form, points.array_form @ chain_fix.M.T)
+
+    def test_apply_to_lines(self, chain_fix: TransformChain) -> None:
+        """
+        Points on a line stay on the transformed line.
+        """
+        p1, p2 = Point2D(1.0, 2.0, 1.0), Point2D(-3.0, 4.0, 1.0)
+        lines = Lines2D([Line2D(points=(p1, p2))])
+        transformed = chain_fix.apply_to_lines(lines)
+        points = chain_fix.apply_to_points(Points2D([p1, p2])).array_form
+        assert_allclose(points @ transformed.array_form[0], 0.0, atol=1e-12)
+
+    @pytest.mark.parametrize("from_origin", [True, False])
+    def test_apply_to_rectangles(self, chain_fix: TransformChain, from_origin: bool) -> None:
+        """
+        Same as applying the fused matrix to each rectangle.
+        """
+        rects = [Rectangle2D(Point2D(10., 10., 1.), Point2D(20., 10., 1.), Point2D(20., 20., 1.), Point2D(10., 20., 1.)),
+                 Rectangle2D(Point2D(0., 0., 1.), Point2D(4., 0., 1.), Point2D(4., 2., 1.), Point2D(0., 2., 1.))]
+        chain_fix.from_origin = from_origin
+        transformed = chain_fix.apply_to_rectangles(Rectangles2D(rects))
+        for rect, new_rect in zip(rects, transformed):
+            expected = rect.apply_transform(chain_fix)
+            assert_allclose(new_rect.corners.array_form, expected.corners.array_form)
+
+
+if __name__ == "__main__":
+    pass
@@ -14,7 +14,9 @@ def test_import() -> None:
     shear = ShearTransform2D()
     similarity = SimilarityTransform2D()
     transform_base = TransformBase2D()
+    transform_batch = TransformBatch2D(transform_base.M)
     translation = TranslationTransform2D()
+    transform_chain = TransformChain([rotation, translation])
 
 
 if __name__ == "__main__":
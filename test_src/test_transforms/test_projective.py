@@ -3,6 +3,7 @@ from unittest.mock import patch
 from numpy.testing import assert_allclose
 from src.transforms.transform_base import TransformBase2D
 from src.transforms.projective import ProjectiveTransform2D
+from src.transforms.affine import AffineTransform2D
 from src.primitives.point import Point2D
 
 
@@ -90,8 +91,62 @@ class TestProjectiveTransform2D:
         # Allow some error because this is an optimization problem.
         assert_allclose(perspective.M, proj_fix.perspective.M, rtol=1e-4, atol=1e-7)
         assert_allclose(perspective.M @ affine.M, proj_fix.M, rtol=1e-3, atol=1e-7)
-        
-        
+
+    def test_get_decomposed_from_M(self, proj_fix: ProjectiveTransform2D) -> None:
+        """
+        The closed form decomposition is exact, also when M is only
+        known up to scale.
+        """
+        affine, perspective = ProjectiveTransform2D.get_decomposed_from_M(proj_fix.M)
+        assert_allclose(affine.M, proj_fix.affine.M)
+        assert_allclose(perspective.M, proj_fix.perspective.M)
+        affine, perspective = ProjectiveTransform2D.get_decomposed_from_M(proj_fix.normalized_M)
+        assert_allclose(affine.M, proj_fix.affine.M)
+        assert_allclose(perspective.M, proj_fix.perspective.M)
+        with pytest.raises(ValueError):
+            ProjectiveTransform2D.get_decomposed_from_M(proj_fix.M, method="unknown")
+
+    def test_get_decomposed_from_M_optimize(self, proj_fix: ProjectiveTransform2D) -> None:
+        """
+        """
+        affine, perspective = ProjectiveTransform2D.get_decomposed_from_M(proj_fix.M, method="optimize")
+        assert_allclose(perspective.M, proj_fix.perspective.M, rtol=1e-4, atol=1e-7)
+        assert_allclose(perspective.M @ affine.M, proj_fix.M, rtol=1e-3, atol=1e-7)
+
+    def test_from_M(self, proj_fix: ProjectiveTransform2D) -> None:
+        """
+        """
+        proj = ProjectiveTransform2D.from_M(proj_fix.normalized_M)
+        assert "_affine" not in vars(proj)
+        assert_allclose(proj.normalized_M, proj_fix.normalized_M)
+        assert_allclose(proj.M, proj_fix.M)
+        assert "_affine" not in vars(proj)
+        assert proj.shear_theta == pytest.approx(0.39)
+        assert proj.perspective.per_x == pytest.approx(0.01)
+        assert_allclose(proj.affine.M, proj_fix.affine.M)
+
+    def test_shear_theta(self, proj_fix: ProjectiveTransform2D) -> None:
+        """
+        """
+        assert proj_fix.shear_theta == 0.39
+        proj_fix.shear_theta = 0.1
+        assert proj_fix.affine.shear_theta == 0.1
+        assert proj_fix.theta == 0.79
+
+    def test_set_params(self, proj_fix: ProjectiveTransform2D) -> None:
+        """
+        Nested affine also defers, so both matrices are rebuilt once.
+        """
+        with patch.object(ProjectiveTransform2D, "_rebuild_M", autospec=True,
+                          side_effect=TransformBase2D._rebuild_M) as patch_rebuild, \
+             patch.object(AffineTransform2D, "_rebuild_M", autospec=True,
+                          side_effect=TransformBase2D._rebuild_M) as patch_affine_rebuild:
+            proj_fix.set_params(per_x=0.0, sx=3.0, shear_theta=0.1, theta=-1.0, ty=5)
+            patch_rebuild.assert_called_once()
+            patch_affine_rebuild.assert_called_once()
+        assert proj_fix == ProjectiveTransform2D(0.0, 0.01, 3.0, 2.0, 0.1, -1.0, 160, 5)
+
+
 if __name__ == "__main__":
     pass
     
\ No newline at end of file
@@ -1,7 +1,8 @@
 import pytest
 from unittest.mock import patch, MagicMock
 import math
-from numpy.testing import assert_array_equal
+import numpy as np
+from numpy.testing import assert_array_equal, assert_allclose
 from src.transforms.transform_base import TransformBase2D
 from src.transforms.rigid import RigidTransform2D
 from src.primitives.point import Point2D
@@ -57,6 +58,20 @@ class TestRigidTransform2D:
         assert_array_equal(translation.M, rigid_fix.translation.M)
         assert_array_equal(translation.M @ rotation.M, rigid_fix.M)
 
+    def test_from_M_not_in_model(self) -> None:
+        """
+        A matrix outside the model is projected onto it, so the
+        inverse of the transform is the inverse of its M.
+        """
+        M = np.array([[0., -3., 4.], [2., 0.5, -1.], [0.1, 0., 1.]])
+        t = RigidTransform2D.from_M(M)
+        assert_array_equal(t.M[2], [0., 0., 1.])
+        assert_array_equal(t.M[:2, 2], [4., -1.])
+        assert_allclose(t.get_inv_M() @ t.M, np.identity(3), atol=1e-12)
+        # The scale is not kept by a later setter either.
+        t.tx = 5
+        assert_allclose(t.M[:2, :2], [[0., -1.], [1., 0.]], atol=1e-12)
+
 
 if __name__ == "__main__":
     pass
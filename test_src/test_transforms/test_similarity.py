@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import patch
-from numpy.testing import assert_array_equal
+import numpy as np
+from numpy.testing import assert_array_equal, assert_allclose
 from src.transforms.transform_base import TransformBase2D
 from src.transforms.similarity import SimilarityTransform2D
 from src.primitives.point import Point2D
@@ -72,8 +73,28 @@ class TestSimilarityTransform2D:
         scale, rigid = sim_fix.get_decomposed()
         assert_array_equal(scale.M, sim_fix.scale.M)
         assert_array_equal(rigid.M, sim_fix.rigid.M)
-        
-        
+
+    def test_translation(self, sim_fix: SimilarityTransform2D) -> None:
+        """
+        """
+        sim_fix.tx = 10
+        sim_fix.ty = -5
+        assert (sim_fix.tx, sim_fix.ty) == (10, -5)
+        assert_array_equal(sim_fix.M[:2, 2], [10, -5])
+
+    def test_from_M_not_in_model(self) -> None:
+        """
+        A matrix outside the model is projected onto it, so the
+        inverse of the transform is the inverse of its M.
+        """
+        M = np.array([[0., -3., 4.], [2., 0.5, -1.], [0.1, 0., 1.]])
+        t = SimilarityTransform2D.from_M(M)
+        assert_array_equal(t.M[2], [0., 0., 1.])
+        assert_array_equal(t.M[:2, 2], [4., -1.])
+        assert_allclose(t.get_inv_M() @ t.M, np.identity(3), atol=1e-12)
+        assert_allclose(t.M[:2, :2], [[0., -2.], [2., 0.]], atol=1e-12)
+
+
 if __name__ == "__main__":
     pass
     
\ No newline at end of file
@@ -1,7 +1,9 @@
 import pytest
 from unittest.mock import patch
 import math
-from numpy.testing import assert_array_equal
+import numpy as np
+from numpy.testing import assert_array_equal, assert_allclose
+from src.transforms import *
 from src.transforms.transform_base import TransformBase2D
 from src.primitives.point import Point2D
 
@@ -59,6 +61,47 @@ class TestTransformBase2D:
         inv = tb_fix.get_inv_M()
         assert_array_equal(inv, tb_fix.M)
 
+    def test_get_inv_M_cached(self, tb_fix: TransformBase2D) -> None:
+        """
+        The inverse is reused until M changes, also when M changes inplace.
+        """
+        inv = tb_fix.get_inv_M()
+        assert tb_fix.get_inv_M() is inv
+        with pytest.raises(ValueError):
+            inv[0][0] = 2.0
+        tb_fix.M[0][0] = 2.0
+        assert tb_fix.get_inv_M()[0][0] == 0.5
+        tb_fix.M = np.diag([4.0, 1.0, 1.0])
+        assert tb_fix.get_inv_M()[0][0] == 0.25
+        tb_fix.reset()
+        assert_array_equal(tb_fix.get_inv_M(), np.identity(3))
+
+    def test_get_inv_M_setter(self) -> None:
+        """
+        Parameter setters invalidate the cached inverse.
+        """
+        for t in [TranslationTransform2D(3.0, 4.0), RigidTransform2D(0.4, 3.0, 4.0)]:
+            t.get_inv_M()
+            t.tx = -1.0
+            assert_allclose(t.get_inv_M(), np.linalg.inv(t.M))
+
+    @pytest.mark.parametrize("transform", [TransformBase2D(), TranslationTransform2D(3.0, -4.0),
+                                           RotationTransform2D(0.4), ScaleTransform2D(2.0, -0.5),
+                                           ShearTransform2D(0.3), PerspectiveTransform2D(0.01, -0.02),
+                                           RigidTransform2D(0.4, 3.0, -4.0), SimilarityTransform2D(2.0, 2.0, 0.4, 3.0, -4.0),
+                                           AffineTransform2D(-2.0, 1.5, 0.39, 0.79, 160, 20),
+                                           ProjectiveTransform2D(0.01, 0.01, 2.0, 2.0, 0.39, 0.79, 160, 20)])
+    def test_inverse(self, transform: TransformBase2D) -> None:
+        """
+        Closed form inverses match np.linalg.inv and inverse() keeps the type
+        (projective matrices are only equal up to scale).
+        """
+        assert_allclose(transform.calculate_inv_M(), np.linalg.inv(transform.M), atol=1e-12)
+        inverse = transform.inverse()
+        assert type(inverse) is type(transform)
+        product = inverse.M @ transform.M
+        assert_allclose(product / product[2, 2], np.identity(3), atol=1e-9)
+
     def test_get_decomposed(self, tb_fix: TransformBase2D) -> None:
         """
         """